@@ -0,0 +1,68 @@
+"""Benchmark of the event loop lag during a cold deck load.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_deck_loading
+"""
+
+import asyncio
+import contextlib
+import functools
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from lexicard.deck_cache import DeckCache
+from lexicard.deck_journal import load_deck_with_journal
+from lexicard.metrics import LoopLagMonitor, Metrics
+from lexicard.models import save_deck_to_json_file
+
+from .bench_tab_storage import make_deck
+
+
+async def measure(load) -> tuple[float, float]:
+    """Run a load under a LoopLagMonitor and return (seconds, worst loop lag in ms)."""
+    monitor = LoopLagMonitor(Metrics(), interval=0.005)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    await load()
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.02)
+    monitor.stop()
+    return elapsed, monitor.max_lag_ms
+
+
+async def bench_cold_load(n: int = 50_000) -> None:
+    """Compare loading a deck on the loop, in a thread, and in a thread by chunks."""
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        path = Path(tmp) / "deck.json"
+        save_deck_to_json_file(make_deck(n), path)
+
+        async def on_loop():
+            DeckCache().get(path)
+
+        async def in_thread():
+            await DeckCache().get_async(path)
+
+        async def in_chunks():
+            await DeckCache(
+                async_loader=functools.partial(load_deck_with_journal, chunk_size=1000)
+            ).get_async(path)
+
+        results = {
+            name: await measure(load)
+            for name, load in (
+                ("get() on the loop", on_loop),
+                ("get_async()", in_thread),
+                ("get_async(), chunks of 1000", in_chunks),
+            )
+        }
+    print(f"cold load of a {n}-card deck")
+    for name, (elapsed, lag) in results.items():
+        print(f"  {name:28}: {elapsed:6.3f}s, worst loop lag {lag:6.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(bench_cold_load())
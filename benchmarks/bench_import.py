@@ -0,0 +1,63 @@
+"""Benchmark of full vs incremental re-imports of a large workbook.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_import
+"""
+
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import openpyxl
+
+from lexicard.importer import main
+
+HEADER = ["id", "has_sound", "has_typo", "phonetic", "thai", "english"]
+
+
+def write_workbook(path: Path, n_rows: int, changed: int = 0, sheets: int = 1) -> None:
+    """Write lexicon sheets of n_rows cards in total, the first `changed` ones with a new explanation."""
+    wb = openpyxl.Workbook(write_only=True)
+    per_sheet = n_rows // sheets
+    for s in range(sheets):
+        sheet = wb.create_sheet(f"lexicon{s}")
+        sheet.append(HEADER)
+        for i in range(s * per_sheet + 1, (s + 1) * per_sheet + 1):
+            sheet.append(
+                [i, None, False, f"kin{i}", f"กิน{i}", f"to eat {i}" + (" (v2)" if i <= changed else "")]
+            )
+    wb.save(path)
+
+
+def timed_import(*args: str) -> float:
+    """Run lexicard-import quietly and return its duration."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        main(list(args))
+    return time.perf_counter() - start
+
+
+def bench_reimport(n_rows: int = 50_000, changed: int = 10, sheets: int = 1) -> None:
+    """Compare a full re-import with incremental ones, on an unchanged and on an edited workbook."""
+    with tempfile.TemporaryDirectory() as tmp:
+        workbook = Path(tmp) / "big.xlsx"
+        out = Path(tmp) / "out"
+        write_workbook(workbook, n_rows, sheets=sheets)
+        timed_import(str(workbook), "-o", str(out), "-j", "1")
+
+        t_full = timed_import(str(workbook), "-o", str(out), "-j", "1")
+        t_unchanged = timed_import(str(workbook), "-o", str(out), "-j", "1", "--incremental")
+        write_workbook(workbook, n_rows, changed, sheets)
+        t_edited = timed_import(str(workbook), "-o", str(out), "-j", "1", "--incremental")
+    print(f"re-import {n_rows} rows in {sheets} sheets, one worker")
+    print(f"  full                       : {t_full:6.2f}s")
+    print(f"  incremental, unchanged     : {t_unchanged:6.2f}s")
+    print(f"  incremental, {changed:3} changed    : {t_edited:6.2f}s")
+
+
+if __name__ == "__main__":
+    bench_reimport()
+    bench_reimport(sheets=10)
@@ -0,0 +1,51 @@
+"""Micro-benchmarks for Lexicard validation and construction.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_models
+"""
+
+import json
+import timeit
+
+from lexicard.models import CARDS_ADAPTER, Lexicard, construct_cards, validate_cards
+
+
+def make_rows(n: int) -> list[dict]:
+    """Build n synthetic card rows, as an importer would."""
+    return [
+        {
+            "tid": i,
+            "sound": "0",
+            "check_for_correction": False,
+            "phonetic": f"kin{i}",
+            "target_word": f"กิน{i}",
+            "explain": f"to eat {i}",
+        }
+        for i in range(n)
+    ]
+
+
+def rows_per_second(func, n: int, repeat: int = 5) -> float:
+    """Return the best throughput of func over n rows."""
+    return n / min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def bench_validation(n: int = 50_000) -> None:
+    """Compare the ways of turning raw rows into Lexicard objects."""
+    rows = make_rows(n)
+    data = json.dumps(rows)
+    paths = {
+        "Lexicard(**row) per row": lambda: [Lexicard(**row) for row in rows],
+        "validate_cards (bulk)": lambda: validate_cards(rows),
+        "TypeAdapter.validate_json": lambda: CARDS_ADAPTER.validate_json(data),
+        "model_construct per row": lambda: [Lexicard.model_construct(**row) for row in rows],
+        "construct_cards (trusted)": lambda: construct_cards([dict(row) for row in rows]),
+    }
+    print(f"build {n} cards")
+    for name, func in paths.items():
+        print(f"  {name:27}: {rows_per_second(func, n):10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    bench_validation()
@@ -0,0 +1,55 @@
+"""Benchmark of the selection cost of answering a card.
+
+Compares selecting the next question on click with popping it from a PrefetchQueue,
+whose refill runs after the UI update.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_prefetch
+"""
+
+import random
+
+from lexicard.prefetch import PrefetchQueue
+from lexicard.probbucket import ProbBucket
+
+from .bench_tab_storage import make_deck, per_load
+
+
+def bench_next_question(n: int, multi: bool) -> None:
+    """Time the next-question step of a click, with and without prefetching."""
+    cards = make_deck(n).cards
+    buckets = ProbBucket(cards, rng=random.Random(0))
+    for card in cards[: n // 3]:
+        buckets.promote(card)
+    queue = PrefetchQueue(buckets, size=3, multi=multi)
+    queue.fill()
+
+    def on_click():
+        return buckets.pick_3_cards() if multi else buckets.pick_card()
+
+    def from_queue():
+        question = queue.pop()
+        queue.fill()  # run after the UI update by the pages
+        return question
+
+    def pop_only():
+        question = queue.pop()
+        # Put it back so that every pop is a hit
+        queue._queue.append((question, queue.buckets.bucket_of(question[0] if multi else question)))
+        return question
+
+    t_click, t_pop, t_total = (
+        per_load(on_click, number=2000),
+        per_load(pop_only, number=2000),
+        per_load(from_queue, number=2000),
+    )
+    print(f"{'multi' if multi else 'single'} mode, deck of {n} cards")
+    print(f"  select on click      : {t_click * 1e6:8.2f} us")
+    print(f"  pop from the queue   : {t_pop * 1e6:8.2f} us (pop + refill {t_total * 1e6:.2f} us)")
+
+
+if __name__ == "__main__":
+    for n in (100, 10_000):
+        for multi in (False, True):
+            bench_next_question(n, multi)
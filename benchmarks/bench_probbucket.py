@@ -0,0 +1,101 @@
+"""Micro-benchmarks for ProbBucket card selection.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_probbucket
+"""
+
+import contextlib
+import io
+import timeit
+import tracemalloc
+
+from lexicard.models import Lexicard
+from lexicard.probbucket import CardPool, ProbBucket
+
+
+def make_cards(n: int) -> list[Lexicard]:
+    """Build n synthetic cards."""
+    return [
+        Lexicard(
+            tid=i,
+            sound="0",
+            check_for_correction=False,
+            phonetic=f"p{i}",
+            target_word=f"t{i}",
+            explain=f"e{i}",
+        )
+        for i in range(n)
+    ]
+
+
+def make_bucket(n: int) -> ProbBucket:
+    """Build a bucket of n cards spread over the three buckets."""
+    cards = make_cards(n)
+    pb = ProbBucket(cards)
+    for card in cards[: n // 3]:
+        pb.promote(card, high_priority=True)
+    for card in cards[n // 3 : n // 2]:
+        pb.promote(card)
+    return pb
+
+
+def bench_pick_3(n_cards: int = 3000, repeat: int = 20000) -> None:
+    """Compare three chained pick_card calls with a single pick_n_cards(3)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        pb = make_bucket(n_cards)
+
+        def per_call() -> None:
+            q = pb.pick_card()
+            a1 = pb.pick_card([q])
+            pb.pick_card([q, a1])
+
+        def batched() -> None:
+            pb.pick_n_cards(3)
+
+        t_loop = timeit.timeit(per_call, number=repeat)
+        t_batch = timeit.timeit(batched, number=repeat)
+    print(f"pick 3 of {n_cards} cards, {repeat} rounds")
+    print(f"  per-call loop : {repeat / t_loop:10.0f} questions/s")
+    print(f"  pick_n_cards  : {repeat / t_batch:10.0f} questions/s")
+
+
+def bench_memory(n_cards: int = 100_000, learners: int = 10) -> None:
+    """Measure the per-learner memory of buckets sharing one card pool."""
+    cards = make_cards(n_cards)
+    pool = CardPool(cards)
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        buckets = [ProbBucket(pool=pool).add_cards(cards) for _ in range(learners)]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{learners} learners on a shared {n_cards}-card pool")
+    print(f"  {used / learners / n_cards:.1f} bytes per card per learner ({buckets[0].nbytes()} in arrays)")
+
+
+def bench_import(n_known: int = 100_000, n_new: int = 20_000) -> None:
+    """Time the evictions of a large import into a full bucket: one per card vs one bulk pass."""
+    cards = make_cards(n_known + n_new)
+    pool = CardPool(cards)
+
+    def full_bucket() -> ProbBucket:
+        pb = ProbBucket(pool=pool).add_cards(cards[:n_known])
+        for card in cards[:n_known]:
+            pb.promote(card, high_priority=True)
+        pb.LIMIT = n_known
+        return pb
+
+    print(f"import {n_new} cards into a full bucket of {n_known} known cards")
+    pb = full_bucket()
+    t_loop = timeit.timeit(lambda: [pb._forget() for _ in range(n_new)], number=1)
+    print(f"  one _forget per card        : {t_loop * 1000:8.1f} ms")
+    for policy in ("random", "least_recent", "longest_known"):
+        pb = full_bucket()
+        t_bulk = timeit.timeit(lambda: pb.evict(n_new, policy), number=1)
+        print(f"  evict {policy:<22}: {t_bulk * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    bench_pick_3()
+    bench_memory()
+    bench_import()
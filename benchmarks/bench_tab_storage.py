@@ -0,0 +1,73 @@
+"""Benchmark of the per-page-load cost of resolving a tab's deck.
+
+Compares the former tab storage, which held the whole deck and validated it again
+when it came back as a dict, with the current one, which holds the deck file and
+version and resolves them through the shared deck cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_tab_storage
+"""
+
+import json
+import tempfile
+import timeit
+from pathlib import Path
+
+from lexicard.deck_cache import DeckCache
+from lexicard.models import Deck, Lexicard, save_deck_to_json_file
+
+
+def make_deck(n: int) -> Deck:
+    """Build a deck of n synthetic cards."""
+    cards = [
+        Lexicard(
+            tid=i,
+            sound="0",
+            check_for_correction=False,
+            phonetic=f"kin{i}",
+            target_word=f"กิน{i}",
+            explain=f"to eat {i}",
+        )
+        for i in range(1, n + 1)
+    ]
+    return Deck(author="a", name="bench", description="d", target_language="th", cards=cards)
+
+
+def per_load(func, repeat: int = 5, number: int = 20) -> float:
+    """Return the best time of one call of func, in seconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench_page_load(n: int) -> None:
+    """Time the deck lookup of a page load and the tab storage it needs."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "deck.json"
+        deck = make_deck(n)
+        save_deck_to_json_file(deck, path)
+        cache = DeckCache()
+        cache.get(path)
+
+        old_tab = {"deck": deck.model_dump()}
+        new_tab = {"deck_path": str(path), "deck_version": list(cache.key(path)[1:])}
+
+        def old_load() -> Deck:
+            return Deck.model_validate(old_tab["deck"])
+
+        def new_load() -> Deck:
+            version = list(cache.key(new_tab["deck_path"])[1:])
+            deck = cache.get(new_tab["deck_path"])
+            assert version == new_tab["deck_version"]
+            return deck
+
+        t_old, t_new = per_load(old_load), per_load(new_load)
+        size_old = len(json.dumps(old_tab, ensure_ascii=False).encode())
+        size_new = len(json.dumps(new_tab).encode())
+    print(f"page load, deck of {n} cards")
+    print(f"  whole deck in tab storage : {t_old * 1e3:9.3f} ms, {size_old:>10} bytes per tab")
+    print(f"  path + version            : {t_new * 1e3:9.3f} ms, {size_new:>10} bytes per tab")
+
+
+if __name__ == "__main__":
+    for n in (100, 10_000):
+        bench_page_load(n)
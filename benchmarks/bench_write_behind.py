@@ -0,0 +1,59 @@
+"""Benchmark of the per-answer cost of persisting progress.
+
+Compares a ProgressLog writing and flushing each event on the answer that caused it
+with one queuing its events on a WriteBehind, whose background thread writes them in
+batches.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_write_behind
+"""
+
+import tempfile
+import time
+
+from lexicard.probbucket import ProbBucket
+from lexicard.progress import ProgressLog, write_progress
+from lexicard.write_behind import WriteBehind
+
+from .bench_tab_storage import make_deck
+
+
+def answer_times(log: ProgressLog, answers: int) -> list[float]:
+    """Answer cards like a fast clicker: pick, promote or demote, score; return each answer's time."""
+    bucket = log.attach(ProbBucket(make_deck(1000).cards))
+    times = []
+    for i in range(answers):
+        start = time.perf_counter()
+        card = bucket.pick_card()
+        if i % 3:
+            bucket.promote(card)
+            log.record_score(i)
+        else:
+            bucket.demote(card)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_answers(answers: int = 20_000) -> None:
+    """Time answers with the synchronous log and with the write-behind one."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        results["write per event"] = answer_times(ProgressLog("bench", "sync", tmp), answers)
+        writer = WriteBehind(write_progress)
+        results["write-behind"] = answer_times(ProgressLog("bench", "behind", tmp, writer), answers)
+        start = time.perf_counter()
+        writer.close()
+        drain = time.perf_counter() - start
+    print(f"{answers} answers, one snapshot every {ProgressLog.SNAPSHOT_EVERY} events")
+    for name, times in results.items():
+        times.sort()
+        mean, p99 = sum(times) / len(times), times[int(len(times) * 0.99)]
+        print(
+            f"  {name:16}: mean {mean * 1e6:7.1f} us, p99 {p99 * 1e6:7.1f} us, max {times[-1] * 1e3:6.2f} ms"
+        )
+    print(f"  drain on close  : {drain * 1e3:.1f} ms, {writer.dropped} writes dropped on a full buffer")
+
+
+if __name__ == "__main__":
+    bench_answers()
@@ -4,7 +4,9 @@ This package contains the core logic, data models, and UI components
 for the Lexicard application.
 """
 
+from .deck_store import DeckStore
 from .models import Deck, Lexicard, User
 from .probbucket import ProbBucket
+from .scheduler import DueScheduler
 
 __version__ = "0.1.0"
@@ -0,0 +1,259 @@
+"""Compact binary deck format for the Lexicard application.
+
+This module writes and reads decks in a columnar, memory-mappable format. A BinaryDeck
+maps the file read-only, so every process opening the same deck shares one copy of it
+through the page cache, and opening costs a header read whatever the deck size.
+
+Layout (little-endian, every section aligned on 8 bytes):
+
+    magic "LXD1" | u32 card count | u32 metadata length | metadata JSON (UTF-8)
+    i64 tids[count]                  in deck order
+    u32 tid_order[count]             card positions sorted by tid, the tid index
+    u8  check_for_correction[count]
+    for each of sound, phonetic, target_word, explain:
+        u32 offsets[count + 1] | UTF-8 blob, string i is blob[offsets[i]:offsets[i + 1]]
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any
+
+from .models import (
+    Deck,
+    DeckInfo,
+    Lexicard,
+    construct_cards,
+    load_deck_from_json_file,
+    save_deck_to_json_file,
+)
+
+MAGIC = b"LXD1"
+SUFFIX = ".lxd"
+_HEAD = struct.Struct("<4sII")
+STRING_FIELDS = ("sound", "phonetic", "target_word", "explain")
+METADATA_FIELDS = ("author", "name", "description", "target_language", "last_id_used")
+
+
+def _padding(size: int) -> bytes:
+    """Return the zero bytes that align a section ending at size on 8 bytes."""
+    return bytes(-size % 8)
+
+
+def _little_endian(values: array) -> bytes:
+    """Return the bytes of an array in little-endian order."""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def save_deck_to_binary_file(deck: Deck, file_path: str | Path) -> None:
+    """Serialize a Deck object to a binary deck file.
+
+    The file is written next to its destination and moved over it, so processes that
+    have the previous version mapped keep reading a consistent file.
+
+    Args:
+            deck: The Deck instance to save.
+            file_path: Destination path on the filesystem.
+    """
+    path = Path(file_path)
+    cards = deck.cards
+    count = len(cards)
+    tids = array("q", (card.tid for card in cards))
+    metadata = json.dumps({field: getattr(deck, field) for field in METADATA_FIELDS}).encode("utf-8")
+
+    sections = [_HEAD.pack(MAGIC, count, len(metadata)) + metadata]
+    sections.append(_little_endian(tids))
+    sections.append(_little_endian(array("I", sorted(range(count), key=tids.__getitem__))))
+    sections.append(bytes(card.check_for_correction for card in cards))
+    for field in STRING_FIELDS:
+        blob = bytearray()
+        offsets = array("I", [0])
+        for card in cards:
+            blob += getattr(card, field).encode("utf-8")
+            offsets.append(len(blob))
+        if len(blob) > 0xFFFFFFFF:
+            raise ValueError(f"the {field} column exceeds 4 GiB")
+        sections.append(_little_endian(offsets))
+        sections.append(bytes(blob))
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        for section in sections:
+            f.write(section)
+            f.write(_padding(len(section)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class BinaryDeck:
+    """A read-only deck backed by a memory-mapped binary deck file.
+
+    Columns are memoryviews over the mapping; a card's strings are decoded only when
+    the card is accessed, and looking a card up by tid is a binary search of the tid
+    index.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Map a binary deck file.
+
+        Args:
+                path: Path to a file written by save_deck_to_binary_file.
+        """
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        self._views = [view]
+        try:
+            magic, count, metadata_size = _HEAD.unpack_from(view)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a binary deck file")
+            pos = _HEAD.size
+            metadata = json.loads(bytes(view[pos : pos + metadata_size]))
+            pos += metadata_size
+            self.info = DeckInfo(**metadata, card_count=count)
+            self._metadata = metadata
+
+            def section(size: int, typecode: str = "B") -> Any:
+                nonlocal pos
+                pos += -pos % 8
+                if pos + size > len(view):
+                    raise ValueError(f"{self.path} is truncated")
+                raw = view[pos : pos + size]
+                self._views.append(raw)
+                pos += size
+                if typecode == "B":
+                    return raw
+                if sys.byteorder != "little":
+                    values = array(typecode, raw)
+                    values.byteswap()
+                    return values
+                typed = raw.cast(typecode)
+                self._views.append(typed)
+                return typed
+
+            self._tids = section(8 * count, "q")
+            self._tid_order = section(4 * count, "I")
+            self._checks = section(count)
+            self._columns = []
+            for _ in STRING_FIELDS:
+                offsets = section(4 * (count + 1), "I")
+                self._columns.append((offsets, section(offsets[-1])))
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        """Return the number of cards in the deck."""
+        return self.info.card_count
+
+    def __enter__(self) -> "BinaryDeck":
+        """Return the deck itself, to use it as a context manager."""
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        """Unmap the file."""
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory mapping; cards already returned stay valid."""
+        if self._mmap.closed:
+            return
+        for view in reversed(self._views):
+            view.release()
+        self._mmap.close()
+
+    def card(self, index: int) -> Lexicard:
+        """Return the card at a given index.
+
+        Args:
+                index: Position of the card in the deck (negative values count from the end).
+
+        Returns:
+                A Lexicard, built without validation since the writer validated it (see construct_cards).
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"card index {index} out of range")
+        sound, phonetic, target_word, explain = (
+            str(blob[offsets[index] : offsets[index + 1]], "utf-8") for offsets, blob in self._columns
+        )
+        row = {
+            "tid": self._tids[index],
+            "sound": sound,
+            "check_for_correction": bool(self._checks[index]),
+            "phonetic": phonetic,
+            "target_word": target_word,
+            "explain": explain,
+        }
+        return construct_cards([row])[0]
+
+    def cards(self, start: int = 0, stop: int | None = None) -> list[Lexicard]:
+        """Return the cards of a slice of the deck, in deck order."""
+        return [self.card(i) for i in range(*slice(start, stop).indices(len(self)))]
+
+    def by_tid(self, tid: int) -> Lexicard | None:
+        """Return the card with a given tid, or None, in O(log n)."""
+        order = self._tid_order
+        i = bisect.bisect_left(order, tid, key=self._tids.__getitem__)
+        if i < len(order) and self._tids[order[i]] == tid:
+            return self.card(order[i])
+        return None
+
+    def to_deck(self) -> Deck:
+        """Return all the cards as a full Deck."""
+        return Deck(**self._metadata, cards=self.cards())
+
+
+def load_deck_from_binary_file(file_path: str | Path) -> Deck:
+    """Deserialize a Deck object from a binary deck file.
+
+    Args:
+            file_path: Path to the binary deck file.
+
+    Returns:
+            A Deck instance.
+    """
+    with BinaryDeck(file_path) as deck:
+        return deck.to_deck()
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Convert a deck between the JSON and the binary formats, by file suffix."""
+    parser = argparse.ArgumentParser(
+        prog="lexicard-convert", description="Convert a deck between JSON and the binary format."
+    )
+    parser.add_argument("source", type=Path, help="deck to read, .json or .lxd")
+    parser.add_argument(
+        "destination", type=Path, nargs="?", help="file to write; the other format if omitted"
+    )
+    args = parser.parse_args(argv)
+
+    source: Path = args.source
+    if source.suffix == SUFFIX:
+        deck = load_deck_from_binary_file(source)
+        destination = args.destination or source.with_suffix(".json")
+    else:
+        deck = load_deck_from_json_file(source)
+        destination = args.destination or source.with_suffix(SUFFIX)
+
+    if destination.suffix == SUFFIX:
+        save_deck_to_binary_file(deck, destination)
+    else:
+        save_deck_to_json_file(deck, destination)
+    print(f"Converted {len(deck.cards)} cards from {source} to {destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Process-wide cache of loaded decks for the Lexicard application.
+
+This module provides the DeckCache class which keeps validated decks in memory, keyed
+by file version, so that every tab and page of the process shares one parsed copy of
+each deck file instead of reading and validating it again. Page handlers await
+DeckCache.get_async, which loads decks in a worker thread.
+"""
+
+import asyncio
+import contextlib
+import functools
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, InvalidStateError
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .deck_journal import journal_path, load_deck_with_journal
+from .models import Deck
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
+# (resolved path, modification time in ns, size in bytes, size of the journal in bytes)
+DeckKey = tuple[Path, int, int, int]
+
+
+class DeckCache:
+    """A thread-safe LRU cache of decks under a memory budget.
+
+    Entries are keyed by (path, mtime, size) plus the size of the deck's append-only
+    journal, so saving a deck or journaling a card edit makes the next lookup load the
+    new version. Concurrent lookups of a deck that is not cached, sync or async, wait on
+    a single load. Cached decks are shared: callers must not modify them.
+    """
+
+    MEMORY_FACTOR = 8  # estimated bytes in memory per byte of deck file
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        loader: Callable[[Path], Deck] = load_deck_with_journal,
+        metrics: "Metrics | None" = None,
+        async_loader: Callable[[Path], Deck] | None = None,
+    ) -> None:
+        """Initialize an empty cache.
+
+        Args:
+                max_bytes: Memory budget; least recently used decks are evicted above it.
+                loader: Function loading a deck, with its journal replayed, from a file path.
+                metrics: Optional instrumentation, records hits, misses and evictions.
+                async_loader: Loader run in a worker thread by get_async; loader if omitted.
+        """
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.async_loader = async_loader or loader
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[DeckKey, tuple[Deck, int]] = OrderedDict()  # key -> (deck, cost)
+        self._loading: dict[DeckKey, Future[Deck]] = {}
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached decks."""
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated memory held by the cached decks."""
+        return self._bytes
+
+    @staticmethod
+    def key(path: str | Path) -> DeckKey:
+        """Return the cache key of the current version of a deck file."""
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+        try:
+            journal_size = journal_path(resolved).stat().st_size
+        except FileNotFoundError:
+            journal_size = 0
+        return resolved, stat.st_mtime_ns, stat.st_size, journal_size
+
+    def get(self, path: str | Path) -> Deck:
+        """Return the deck of a file, loading it if this version is not cached.
+
+        Args:
+                path: Path to a JSON or binary deck file.
+
+        Returns:
+                The shared Deck instance.
+        """
+        key = self.key(path)
+        result, loading = self._claim(key)
+        if isinstance(result, Deck):
+            return result
+        return self._load(key, self.loader, result) if loading else result.result()
+
+    async def get_async(self, path: str | Path) -> Deck:
+        """Return the deck of a file, loading it in a worker thread if this version is not cached.
+
+        The event loop never blocks: a hit returns at once, a load already in flight is
+        awaited, and a new load runs async_loader in a thread. Cancelling the call, e.g.
+        when its client disconnects, leaves the load running for the other callers.
+
+        Args:
+                path: Path to a JSON or binary deck file.
+
+        Returns:
+                The shared Deck instance.
+        """
+        key = self.key(path)
+        result, loading = self._claim(key)
+        if isinstance(result, Deck):
+            return result
+        if loading:
+            return await asyncio.to_thread(self._load, key, self.async_loader, result)
+        # Shielded, so that cancelling this waiter does not cancel the shared future
+        return await asyncio.shield(asyncio.wrap_future(result))
+
+    def _claim(self, key: DeckKey) -> tuple[Deck | Future[Deck], bool]:
+        """Look a version up: the cached deck, or the future of its load and whether the caller must run it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._incr("deck_cache.hit")
+                return entry[0], False
+            future = self._loading.get(key)
+            if future is not None:
+                self._incr("deck_cache.wait")
+                return future, False
+            future = self._loading[key] = Future()
+            self._incr("deck_cache.miss")
+            return future, True
+
+    def _load(self, key: DeckKey, loader: Callable[[Path], Deck], future: Future[Deck]) -> Deck:
+        """Load a claimed version, cache it and resolve its future."""
+        try:
+            deck = loader(key[0])
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            with contextlib.suppress(InvalidStateError):  # cancelled, nobody waits for it
+                future.set_exception(e)
+            raise
+        with self._lock:
+            del self._loading[key]
+            self._store(key, deck)
+        with contextlib.suppress(InvalidStateError):
+            future.set_result(deck)
+        return deck
+
+    def peek(self, path: str | Path) -> Deck | None:
+        """Return the cached deck of a file, or None without loading it."""
+        try:
+            key = self.key(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def invalidate(self, path: str | Path | None = None) -> None:
+        """Drop every cached version of a file, or the whole cache if path is None."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            resolved = Path(path).resolve()
+            for key in [key for key in self._entries if key[0] == resolved]:
+                self._bytes -= self._entries.pop(key)[1]
+
+    def _store(self, key: DeckKey, deck: Deck) -> None:
+        """Insert a loaded deck, replacing older versions of its file and evicting LRU decks."""
+        for old in [old for old in self._entries if old[0] == key[0]]:
+            self._bytes -= self._entries.pop(old)[1]
+        cost = (key[2] + key[3]) * self.MEMORY_FACTOR
+        self._entries[key] = (deck, cost)
+        self._bytes += cost
+        # Always keep the deck just loaded, even if it alone exceeds the budget
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_cost) = self._entries.popitem(last=False)
+            self._bytes -= evicted_cost
+            self._incr("deck_cache.evict")
+
+    def _incr(self, name: str) -> None:
+        """Increase a counter if instrumentation is enabled."""
+        if self.metrics is not None:
+            self.metrics.incr(name)
+
+
+# Cache shared by all the pages of the process; async loads validate 1000 cards at a time
+deck_cache = DeckCache(async_loader=functools.partial(load_deck_with_journal, chunk_size=1000))
@@ -0,0 +1,96 @@
+"""Content-hash comparison of deck versions for the Lexicard application.
+
+This module provides the DeckDiff class which lists the cards added, changed and removed
+between two versions of a deck, matched by tid and compared by a hash of their
+normalized content, so a re-import only applies what really changed.
+"""
+
+import hashlib
+import unicodedata
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .models import Lexicard
+
+# Content fields, hashed in this order; the tid is the identity, not content
+CONTENT_FIELDS = ("sound", "check_for_correction", "phonetic", "target_word", "explain")
+
+
+def _normalize(value: Any) -> str:
+    """Return the canonical text of a field value: NFC, surrounding whitespace stripped."""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return unicodedata.normalize("NFC", str(value).strip())
+
+
+def content_hash(card: "Lexicard") -> bytes:
+    """Hash the normalized content of a card.
+
+    Cards differing only by Unicode normalization form or surrounding whitespace hash
+    the same, so re-saving a workbook does not turn every row into a change.
+    """
+    text = "\x1f".join(_normalize(getattr(card, field)) for field in CONTENT_FIELDS)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class DeckDiff:
+    """Differences between an old and a new version of a deck's cards.
+
+    Attributes:
+            added: Cards of the new version with a tid absent from the old one.
+            changed: (old card, new card) pairs sharing a tid but not their content.
+            removed: Cards of the old version with a tid absent from the new one.
+            unchanged: Number of cards present in both with the same content.
+    """
+
+    def __init__(self, old: Iterable["Lexicard"], new: Iterable["Lexicard"]) -> None:
+        """Compare two versions of a deck's cards, in O(n).
+
+        Args:
+                old: The stored cards.
+                new: The imported cards; if a tid repeats, the last card wins.
+        """
+        old_by_tid = {card.tid: card for card in old}
+        new_by_tid = {card.tid: card for card in new}
+        self.added: list[Lexicard] = []
+        self.changed: list[tuple[Lexicard, Lexicard]] = []
+        self.unchanged = 0
+        for tid, card in new_by_tid.items():
+            previous = old_by_tid.get(tid)
+            if previous is None:
+                self.added.append(card)
+            # Identical fields need no hashing
+            elif vars(previous) != vars(card) and content_hash(previous) != content_hash(card):
+                self.changed.append((previous, card))
+            else:
+                self.unchanged += 1
+        self.removed: list[Lexicard] = [card for tid, card in old_by_tid.items() if tid not in new_by_tid]
+
+    def __bool__(self) -> bool:
+        """Return True if the versions differ."""
+        return bool(self.added or self.changed or self.removed)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the diff as plain data for a report.
+
+        Returns:
+                {"added": [tids], "changed": [{"tid": 12, "fields": {"explain": ["old", "new"]}}],
+                "removed": [tids], "unchanged": count}.
+        """
+        return {
+            "added": [card.tid for card in self.added],
+            "changed": [
+                {
+                    "tid": new.tid,
+                    "fields": {
+                        field: [getattr(old, field), getattr(new, field)]
+                        for field in CONTENT_FIELDS
+                        if _normalize(getattr(old, field)) != _normalize(getattr(new, field))
+                    },
+                }
+                for old, new in self.changed
+            ],
+            "removed": [card.tid for card in self.removed],
+            "unchanged": self.unchanged,
+        }
@@ -0,0 +1,227 @@
+"""Incremental persistence of deck edits for the Lexicard application.
+
+This module provides the DeckJournal class which records card-level edits of a deck in
+a small append-only JSONL file next to it, e.g. "deck_data.json.journal.jsonl" for
+"deck_data.json". The journal is replayed on load and folded into the deck file by a
+background compaction, so editing one card costs one appended line instead of a full
+rewrite of the deck.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from .deck_binary import SUFFIX, load_deck_from_binary_file, save_deck_to_binary_file
+from .lazy_deck import LazyDeck
+from .models import Deck, Lexicard, load_deck_from_json_file, save_deck_to_json_file
+
+logger = logging.getLogger(__name__)
+
+
+def journal_path(deck_path: str | Path) -> Path:
+    """Return the path of the journal of a deck file.
+
+    It is named after the whole file name, so the JSON and binary files of a deck, e.g.
+    written side by side by lexicard-convert, each have their own journal.
+    """
+    path = Path(deck_path)
+    return path.with_name(f"{path.name}.journal.jsonl")
+
+
+def _load_base(path: Path, chunk_size: int | None = None) -> Deck:
+    """Load a deck file without its journal, by file suffix; see load_deck_with_journal."""
+    if path.suffix == SUFFIX:
+        return load_deck_from_binary_file(path)
+    if chunk_size is not None:
+        return LazyDeck(path).to_deck(chunk_size)
+    return load_deck_from_json_file(path)
+
+
+def _save_base(deck: Deck, path: Path) -> None:
+    """Save a deck file atomically, by file suffix."""
+    if path.suffix == SUFFIX:
+        save_deck_to_binary_file(deck, path)
+    else:
+        save_deck_to_json_file(deck, path)
+
+
+def _read_entries(data: bytes) -> list[dict[str, Any]]:
+    """Decode journal lines, stopping at a torn last line."""
+    entries = []
+    for line in data.splitlines():
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            break  # torn last line after a crash
+    return entries
+
+
+def apply_entries(deck: Deck, entries: list[dict[str, Any]]) -> Deck:
+    """Apply journal entries to a deck, in place.
+
+    Entries are {"op": "upsert", "card": {...}}, which replaces the card with the same
+    tid or appends it, and {"op": "delete", "tid": 12}. Both are idempotent, so replaying
+    entries already folded into the deck is harmless.
+
+    Args:
+            deck: The deck to update.
+            entries: The decoded journal entries, oldest first.
+
+    Returns:
+            The same deck.
+    """
+    if not entries:
+        return deck
+    positions = {card.tid: i for i, card in enumerate(deck.cards)}
+    deleted = False
+    for entry in entries:
+        if entry["op"] == "upsert":
+            card = Lexicard.model_validate(entry["card"])
+            deck.last_id_used = max(deck.last_id_used, card.tid)
+            i = positions.get(card.tid)
+            if i is None:
+                positions[card.tid] = len(deck.cards)
+                deck.cards.append(card)
+            else:
+                deck.cards[i] = card
+        elif entry["op"] == "delete" and entry["tid"] in positions:
+            deck.cards[positions.pop(entry["tid"])] = None  # type: ignore[call-overload]
+            deleted = True
+    if deleted:
+        deck.cards = [card for card in deck.cards if card is not None]
+    return deck
+
+
+def load_deck_with_journal(path: str | Path, chunk_size: int | None = None) -> Deck:
+    """Load a deck file and replay its journal.
+
+    Args:
+            path: Path to a JSON or binary deck file.
+            chunk_size: Validate the cards of a JSON file this many at a time, releasing
+                    the GIL in between (see LazyDeck.to_deck); slower, but a load in a
+                    worker thread no longer stalls the event loop. Binary files are not
+                    validated and ignore it.
+
+    Returns:
+            The deck, with every journaled edit applied.
+    """
+    path = Path(path)
+    deck = _load_base(path, chunk_size)
+    try:
+        data = journal_path(path).read_bytes()
+    except FileNotFoundError:
+        return deck
+    return apply_entries(deck, _read_entries(data))
+
+
+class DeckJournal:
+    """Append-only journal of card edits for one deck file.
+
+    Each edit is one line, synced to disk before returning. When the journal outgrows
+    COMPACT_BYTES, a background thread rewrites the deck file with the edits applied
+    and drops them from the journal; edits appended meanwhile are kept.
+    """
+
+    COMPACT_BYTES = 64 * 1024  # journal size that triggers a background compaction
+
+    def __init__(self, deck_path: str | Path) -> None:
+        """Initialize the journal of a deck file.
+
+        Args:
+                deck_path: Path to the JSON or binary deck file.
+        """
+        self.deck_path = Path(deck_path)
+        self.path = journal_path(self.deck_path)
+        self._lock = threading.Lock()
+        self._compactor: threading.Thread | None = None
+
+    def upsert(self, card: Lexicard) -> None:
+        """Record a new or edited card."""
+        self._append({"op": "upsert", "card": card.model_dump()})
+
+    def delete(self, tid: int) -> None:
+        """Record the removal of a card."""
+        self._append({"op": "delete", "tid": tid})
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        """Append one entry, sync it, and start a compaction if the journal is large."""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+        if size >= self.COMPACT_BYTES:
+            self.compact_in_background()
+
+    def compact_in_background(self) -> threading.Thread:
+        """Start a compaction in a daemon thread, unless one is already running."""
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self._compact_logged, daemon=True)
+                self._compactor.start()
+            return self._compactor
+
+    def _compact_logged(self) -> None:
+        """Run a compaction, logging failures since no caller is there to catch them."""
+        try:
+            self.compact()
+        except Exception:
+            logger.exception("compaction of %s failed", self.path)
+
+    def compact(self) -> int:
+        """Fold the journal into the deck file.
+
+        The deck is rewritten atomically first, then the folded entries are dropped from
+        the journal. A crash in between only leaves entries that are replayed again.
+
+        Returns:
+                The number of entries folded into the deck file.
+        """
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return 0
+        entries = _read_entries(data)
+        if entries:
+            _save_base(apply_entries(_load_base(self.deck_path), entries), self.deck_path)
+
+        with self._lock:
+            # Keep what was appended while the deck was being rewritten
+            with self.path.open("rb") as f:
+                f.seek(len(data))
+                tail = f.read()
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with tmp_path.open("wb") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        logger.debug("compacted %d entries of %s", len(entries), self.path)
+        return len(entries)
+
+    def replace_deck(self, deck: Deck) -> None:
+        """Write a whole new version of the deck and drop the journal.
+
+        Used when a deck is rewritten from another source, e.g. an import, whose content
+        supersedes the journaled edits; replaying them would revert it.
+        """
+        with self._lock:
+            _save_base(deck, self.deck_path)
+            self.path.unlink(missing_ok=True)
+
+
+@functools.cache
+def _journal(resolved: Path) -> DeckJournal:
+    """Return the journal of a resolved deck path, one instance per process."""
+    return DeckJournal(resolved)
+
+
+def get_journal(deck_path: str | Path) -> DeckJournal:
+    """Return the shared journal of a deck file, so its appends and compactions are serialized."""
+    return _journal(Path(deck_path).resolve())
@@ -0,0 +1,224 @@
+"""Indexed, editable decks for the Lexicard application.
+
+This module provides the IndexedDeck class, which wraps a Deck with a tid index and
+allocates new tids, and the DeckStore class which manages several of them by name.
+Decks opened from a file record their edits in the file's journal (see deck_journal).
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from .deck_journal import DeckJournal, get_journal, load_deck_with_journal
+from .models import Deck, Lexicard, save_deck_to_json_file
+
+if TYPE_CHECKING:
+    from .deck_diff import DeckDiff
+
+
+class IndexedDeck:
+    """A deck with O(1) card lookup, update and delete by tid.
+
+    The deck keeps its cards list, plus a tid -> card dict and a tid -> position dict into
+    that list. Deleting moves the last card into the hole, like ProbBucket does, so the
+    order of the remaining cards is not preserved. Tids are allocated monotonically from
+    the deck's last_id_used and never reused, even after a delete.
+    """
+
+    def __init__(self, deck: Deck, journal: DeckJournal | None = None) -> None:
+        """Index a deck; the store takes ownership of it.
+
+        Args:
+                deck: The deck to index. Its cards list is modified in place by later edits.
+                journal: Optional journal recording every edit of the deck.
+
+        Raises:
+                ValueError: If two cards of the deck share a tid.
+        """
+        self.deck = deck
+        self.journal = journal
+        self._by_tid: dict[int, Lexicard] = {}
+        self._positions: dict[int, int] = {}
+        for i, card in enumerate(deck.cards):
+            if card.tid in self._by_tid:
+                raise ValueError(f"duplicate tid {card.tid} in deck {deck.name}")
+            self._by_tid[card.tid] = card
+            self._positions[card.tid] = i
+        # Older decks did not record last_id_used
+        deck.last_id_used = max(deck.last_id_used, max(self._by_tid, default=0))
+
+    @property
+    def name(self) -> str:
+        """Name of the deck."""
+        return self.deck.name
+
+    def __len__(self) -> int:
+        """Return the number of cards in the deck."""
+        return len(self.deck.cards)
+
+    def __contains__(self, tid: int) -> bool:
+        """Check whether the deck holds a card with this tid."""
+        return tid in self._by_tid
+
+    def __iter__(self) -> Iterator[Lexicard]:
+        """Iterate over the cards, in deck order."""
+        return iter(self.deck.cards)
+
+    def get(self, tid: int) -> Lexicard | None:
+        """Return the card with a given tid, or None."""
+        return self._by_tid.get(tid)
+
+    def position(self, tid: int) -> int | None:
+        """Return the position of a card in the deck's cards list, or None."""
+        return self._positions.get(tid)
+
+    def allocate_id(self) -> int:
+        """Reserve and return a new, never used tid."""
+        self.deck.last_id_used += 1
+        return self.deck.last_id_used
+
+    def create(self, **fields: Any) -> Lexicard:
+        """Create a card with a newly allocated tid and add it to the deck.
+
+        Args:
+                **fields: The Lexicard fields other than tid.
+
+        Returns:
+                The new card.
+        """
+        card = Lexicard(tid=self.allocate_id(), **fields)
+        self.add(card)
+        return card
+
+    def add(self, card: Lexicard) -> None:
+        """Add a card that already has a tid, e.g. from an import.
+
+        Raises:
+                ValueError: If the deck already holds a card with this tid.
+        """
+        if card.tid in self._by_tid:
+            raise ValueError(f"tid {card.tid} already in deck {self.name}")
+        self._by_tid[card.tid] = card
+        self._positions[card.tid] = len(self.deck.cards)
+        self.deck.cards.append(card)
+        self.deck.last_id_used = max(self.deck.last_id_used, card.tid)
+        if self.journal is not None:
+            self.journal.upsert(card)
+
+    def update(self, card: Lexicard) -> None:
+        """Replace the card having the same tid, keeping its position.
+
+        Raises:
+                KeyError: If the deck holds no card with this tid.
+        """
+        position = self._positions[card.tid]
+        self._by_tid[card.tid] = card
+        self.deck.cards[position] = card
+        if self.journal is not None:
+            self.journal.upsert(card)
+
+    def delete(self, tid: int) -> Lexicard:
+        """Remove a card, moving the last card of the deck into its position.
+
+        Returns:
+                The removed card.
+
+        Raises:
+                KeyError: If the deck holds no card with this tid.
+        """
+        card = self._by_tid.pop(tid)
+        position = self._positions.pop(tid)
+        cards = self.deck.cards
+        last = cards.pop()
+        if last is not card:
+            cards[position] = last
+            self._positions[last.tid] = position
+        if self.journal is not None:
+            self.journal.delete(tid)
+        return card
+
+    def apply_diff(self, diff: "DeckDiff") -> None:
+        """Apply the added, changed and removed cards of a new version of the deck.
+
+        Each card costs one O(1) edit, and one journal line if the deck has a journal.
+        """
+        for _, card in diff.changed:
+            self.update(card)
+        for card in diff.added:
+            self.add(card)
+        for card in diff.removed:
+            self.delete(card.tid)
+
+
+class DeckStore:
+    """Editable decks by name."""
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self._decks: dict[str, IndexedDeck] = {}
+        self._paths: dict[str, Path] = {}
+
+    def __len__(self) -> int:
+        """Return the number of decks."""
+        return len(self._decks)
+
+    def __contains__(self, name: str) -> bool:
+        """Check whether a deck of this name is in the store."""
+        return name in self._decks
+
+    def __iter__(self) -> Iterator[IndexedDeck]:
+        """Iterate over the decks."""
+        return iter(self._decks.values())
+
+    def __getitem__(self, name: str) -> IndexedDeck:
+        """Return the deck of a given name; raises KeyError if absent."""
+        return self._decks[name]
+
+    def add(self, deck: Deck) -> IndexedDeck:
+        """Add an in-memory deck, not backed by a file.
+
+        Raises:
+                ValueError: If a deck of the same name is already in the store.
+        """
+        if deck.name in self._decks:
+            raise ValueError(f"deck {deck.name} already in the store")
+        indexed = self._decks[deck.name] = IndexedDeck(deck)
+        return indexed
+
+    def open(self, path: str | Path) -> IndexedDeck:
+        """Load a JSON or binary deck file, with its journal replayed, and journal its edits.
+
+        Args:
+                path: Path to the deck file; existing Deck JSON files load unchanged.
+
+        Returns:
+                The indexed deck, also reachable by name.
+        """
+        path = Path(path)
+        indexed = self.add(load_deck_with_journal(path))
+        indexed.journal = get_journal(path)
+        self._paths[indexed.name] = path
+        return indexed
+
+    def save(self, name: str, path: str | Path | None = None) -> None:
+        """Save a deck to a JSON file atomically.
+
+        Args:
+                name: Name of the deck.
+                path: Destination; the file the deck was opened from if omitted. Saving to
+                        that file also folds its journal into it.
+        """
+        indexed = self._decks[name]
+        source = self._paths.get(name)
+        if path is not None and Path(path) != source:
+            save_deck_to_json_file(indexed.deck, path)
+        elif source is None:
+            raise ValueError(f"deck {name} was not opened from a file")
+        else:
+            # Every edit is in the journal, whatever the file format
+            get_journal(source).compact()
+
+    def remove(self, name: str) -> IndexedDeck:
+        """Remove a deck from the store, without touching its file."""
+        self._paths.pop(name, None)
+        return self._decks.pop(name)
@@ -0,0 +1,137 @@
+"""Module for choosing plausible wrong answers in multi-choice questions.
+
+This module provides the DistractorIndex class which, once per deck, ranks for every card
+the other cards that are most easily confused with it, and then serves distractors with
+distinct explanations in O(1) per question.
+"""
+
+import random
+import re
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .models import Lexicard
+
+THAI_CHARS = re.compile(r"[\u0e00-\u0e7f]+")
+
+
+def part_of_speech(explain: str) -> str:
+    """Guess a coarse part of speech from an English explanation.
+
+    Args:
+            explain: The card's explanation, e.g. "to eat", "(pronoun)" or "quickly".
+
+    Returns:
+            A short tag such as "verb", "adverb", "(pronoun)" or "other".
+    """
+    text = explain.strip().lower()
+    if text.startswith("("):
+        return text.split(")")[0] + ")"  # grammatical notes like "(pronoun)" or "(emphasis)"
+    if text.startswith("to "):
+        return "verb"
+    if text.endswith("ly"):
+        return "adverb"
+    if text.endswith(("ing", "ed")):
+        return "verb-form"
+    return "other"
+
+
+def card_features(card: "Lexicard") -> tuple[set[str], tuple[str, int]]:
+    """Compute the similarity features of a card.
+
+    Args:
+            card: The card to describe.
+
+    Returns:
+            A pair (lexical features, block). Lexical features are Thai character bigrams of
+            the target word and the phonetic prefix; the block is (part of speech, explanation
+            length bucket).
+    """
+    features = {f"pre:{card.phonetic[:2].lower()}"}
+    for run in THAI_CHARS.findall(card.target_word):
+        features.update(f"ng:{run[i : i + 2]}" for i in range(len(run) - 1))
+    return features, (part_of_speech(card.explain), len(card.explain) // 5)
+
+
+class DistractorIndex:
+    """A precomputed table of confusable cards for multi-choice questions.
+
+    Candidates of a card share Thai bigrams or a phonetic prefix with it, ranked by the
+    number of shared features plus a bonus for the same part of speech and explanation
+    length. Each candidate list only holds cards whose explanation differs from the card's
+    and from the other candidates, so any subset of it is a valid set of answers.
+    """
+
+    CANDIDATES = 8  # distractors kept per card
+    MAX_POSTING = 64  # features shared by more cards are too common to rank by
+
+    def __init__(self, cards_list: Iterable["Lexicard"], rng: random.Random | None = None) -> None:
+        """Build the index over a deck's cards.
+
+        Args:
+                cards_list: The cards of the deck.
+                rng: Random generator used to pad short candidate lists; a fixed seed if omitted,
+                        so the index of a deck is reproducible.
+        """
+        self._rng = rng or random.Random(0)
+        cards = list(cards_list)
+        features = [card_features(card) for card in cards]
+
+        postings: dict[str, list[int]] = defaultdict(list)
+        blocks: dict[tuple[str, int], list[int]] = defaultdict(list)
+        for i, (lexical, block) in enumerate(features):
+            for feature in lexical:
+                postings[feature].append(i)
+            blocks[block].append(i)
+
+        self._candidates: dict[int, tuple[Lexicard, ...]] = {}
+        for i, card in enumerate(cards):
+            lexical, block = features[i]
+            scores: Counter[int] = Counter()
+            for feature in lexical:
+                posting = postings[feature]
+                if len(posting) <= self.MAX_POSTING:
+                    scores.update(posting)
+            for j in scores:
+                if features[j][1] == block:
+                    scores[j] += 2
+            scores.pop(i, None)
+
+            ranked = [j for j, _ in scores.most_common()]
+            ranked.extend(self._sample(blocks[block], self.CANDIDATES))
+            ranked.extend(self._sample(range(len(cards)), 4 * self.CANDIDATES))
+
+            texts = {card.explain}
+            chosen: list[Lexicard] = []
+            for j in ranked:
+                other = cards[j]
+                if other.explain not in texts:
+                    texts.add(other.explain)
+                    chosen.append(other)
+                    if len(chosen) == self.CANDIDATES:
+                        break
+            self._candidates[card.tid] = tuple(chosen)
+
+    def _sample(self, population: list[int] | range, k: int) -> list[int]:
+        """Draw up to k distinct items from a population."""
+        return self._rng.sample(population, min(k, len(population)))
+
+    def candidates(self, card: "Lexicard") -> tuple["Lexicard", ...]:
+        """Return the ranked distractor candidates of a card."""
+        return self._candidates.get(card.tid, ())
+
+    def pick(self, card: "Lexicard", k: int = 2, rng: random.Random | None = None) -> list["Lexicard"]:
+        """Pick k distractors for a card, all with distinct explanations.
+
+        Args:
+                card: The question card.
+                k: Number of distractors wanted.
+                rng: Random generator to draw with; the global one if omitted.
+
+        Returns:
+                Up to k cards; fewer if the deck lacks distinct explanations.
+        """
+        candidates = self.candidates(card)
+        return (rng or random).sample(candidates, min(k, len(candidates)))
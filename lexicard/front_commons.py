@@ -4,19 +4,25 @@ This module provides common layout frames, navigation elements, and global
 state objects used across multiple pages of the application.
 """
 
-from collections.abc import Callable, Generator
+import asyncio
+import json
+from collections.abc import Callable, Generator, Iterable
 from contextlib import contextmanager
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Optional
+from urllib.parse import quote
 
+from fastapi import HTTPException
 from nicegui import app, ui
-from pydantic import ValidationError
-from starlette.responses import RedirectResponse
+from starlette.responses import FileResponse, RedirectResponse
 
-from .probbucket import ProbBucket
+from .metrics import LoopLagMonitor, Metrics
+from .progress import PROGRESS_DIR, write_progress
+from .sessions import Session, SessionRegistry
+from .write_behind import WriteBehind
 
 if TYPE_CHECKING:
-    from .models import Deck, Lexicard
+    from .models import Deck, DeckInfo, Lexicard
 
 # Constants and Global state
 IS_DEV = True  # Flag for developer mode notifications
@@ -27,19 +33,40 @@ command_bar: ui.footer | None = None
 # Asset directory relative to this file
 ASSETS_DIR = Path(__file__).parent.parent / "assets"
 
+# URL of the audio files of the assets directory, behind the authentication middleware
+AUDIO_URL = "/audio"
+AUDIO_SUFFIX = ".mp3"
 
-class Tally:
-    """A simple observable counter for tracking scores."""
 
-    def __init__(self) -> None:
-        """Initialize the tally counter to zero."""
-        self.tally: int = 0
+@app.get(AUDIO_URL + "/{filename}")
+def audio_file(filename: str) -> FileResponse:
+    """Serve an audio file of the assets directory, with range requests for streaming.
 
+    Only the audio files directly in the assets directory are served, not the other
+    assets such as the example workbook.
+    """
+    path = ASSETS_DIR / filename
+    if path.suffix != AUDIO_SUFFIX or path.name != filename or not path.is_file():
+        raise HTTPException(status_code=404, detail="Not Found")
+    return FileResponse(path, media_type="audio/mpeg")
+
+
+# Server instrumentation: event loop lag, see LoopLagMonitor
+server_metrics = Metrics()
+loop_lag_monitor = LoopLagMonitor(server_metrics)
+app.on_startup(loop_lag_monitor.start)
+app.on_shutdown(loop_lag_monitor.stop)
 
-# Global instances for session tracking (Note: Not multi-user safe)
-daily_score = Tally()
-current_deck: Optional["Deck"] = None
-learning_buckets: ProbBucket | None = None
+# Reviews and scores are written to the progress logs in batches, by a background thread
+progress_writer = WriteBehind(write_progress, metrics=server_metrics, name="progress_writer")
+
+# Practice sessions of every learner, by user and deck; saved to their progress logs on shutdown,
+# before the writer writes what is still pending. Tests point session_registry.progress_dir elsewhere.
+# session_registry.engine selects the card selection engine of new sessions: "probbucket"
+# (weighted buckets) or "due" (due-date scheduler), see scheduler.ENGINES.
+session_registry = SessionRegistry(progress_dir=PROGRESS_DIR, writer=progress_writer)
+app.on_shutdown(session_registry.close)
+app.on_shutdown(progress_writer.close)
 
 
 def get_command_bar() -> ui.footer | None:
@@ -52,56 +79,178 @@ def get_command_bar() -> ui.footer | None:
 
 
 def get_deck() -> Optional["Deck"]:
-    """Retrieve the current deck from storage or global state.
+    """Retrieve the deck of the current tab.
+
+    Tab storage only holds the deck file and the version of it the tab last saw; the
+    deck itself is shared by every tab through the deck cache. A tab without a deck
+    gets the default one. A version that is not cached is loaded on the spot, so pages
+    await load_deck instead.
 
     Returns:
             The current Deck object or None.
     """
-    global current_deck
-    from .models import Deck, load_deck_from_json_file, FILE_PATH
+    from .deck_cache import deck_cache
 
+    path = get_deck_path()
+    if path is None:
+        return None
     try:
-        # Attempt to retrieve from tab-specific storage
-        stored_deck = app.storage.tab.get("deck", None)
-        if stored_deck:
-            if isinstance(stored_deck, dict):
-                current_deck = Deck.model_validate(stored_deck)
-            else:
-                current_deck = stored_deck
-            notify_dev(f"Deck loaded from storage: {current_deck.name}", "positive")
-        else:
-            # Load default if none found
-            try:
-                current_deck = load_deck_from_json_file(FILE_PATH)
-                app.storage.tab.update({"deck": current_deck})
-                notify_dev(f"Default deck loaded: {current_deck.name}", "positive")
-            except Exception as e:
-                print(f"FAILED to load default deck: {e}")
-                current_deck = None
-                notify_dev("Failed to load default deck", "negative")
-        return current_deck
-    except (RuntimeError, ValidationError) as e:
+        version = list(deck_cache.key(path)[1:])
+        deck = deck_cache.get(path)
+    except Exception as e:
+        print(f"FAILED to load deck {path}: {e}")
+        notify_dev("Failed to load deck", "negative")
+        return None
+    _remember_deck(path, version, deck)
+    return deck
+
+
+async def load_deck() -> Optional["Deck"]:
+    """Load the deck of the current tab without blocking the event loop.
+
+    Page handlers await it before rendering; the deck is parsed in a worker thread and
+    concurrent loads of the same deck share one parse. Click handlers must not load
+    the deck: they use the session the page opened, see open_session.
+
+    Returns:
+            The current Deck object or None.
+    """
+    from .deck_cache import deck_cache
+
+    path = get_deck_path()
+    if path is None:
+        return None
+    try:
+        version = list(deck_cache.key(path)[1:])
+        deck = await deck_cache.get_async(path)
+    except Exception as e:
+        print(f"FAILED to load deck {path}: {e}")
+        notify_dev("Failed to load deck", "negative")
+        return None
+    _remember_deck(path, version, deck)
+    return deck
+
+
+def get_deck_path() -> str | None:
+    """Return the deck file of the current tab, the default deck if the tab has none.
+
+    Returns:
+            The path of the deck file, or None without a client connection.
+    """
+    from .models import FILE_PATH
+
+    try:
+        tab = app.storage.tab
+        tab.pop("deck", None)  # whole decks stored by older versions
+        return tab.get("deck_path") or str(FILE_PATH)
+    except RuntimeError as e:
         # tab storage is only available with a client connection
         print(f"### Error accessing storage: {e}")
         return None
 
 
+def _remember_deck(path: str, version: list[int], deck: "Deck") -> None:
+    """Record in tab storage the deck file and version the tab now uses."""
+    tab = app.storage.tab
+    if tab.get("deck_version") != version:
+        notify_dev(f"Deck loaded: {deck.name}", "positive")
+        tab.update({"deck_path": path, "deck_version": version})
+
 
-def get_learning_buckets() -> ProbBucket | None:
-    """Obtain the user's probability buckets for the current deck.
+def get_deck_info(path: str | None = None, load: bool = True) -> Optional["DeckInfo"]:
+    """Retrieve the metadata of the current version of a deck.
+
+    The deck cache gives the info of a loaded deck, journal edits included. A JSON deck
+    file that is not loaded and has no journal only has its header read, without
+    validating its cards; other decks must be loaded.
+
+    Args:
+            path: Path to the deck file; the current tab's deck, see get_deck_path, if omitted.
+            load: Whether to load the deck if needed; if False, None is returned instead, so
+                    that a caller on the event loop never waits for a load.
 
     Returns:
-            A ProbBucket instance managed globally.
+            The DeckInfo of the deck or None.
     """
-    global learning_buckets
-    if learning_buckets:
-        return learning_buckets
+    from .deck_cache import deck_cache
+    from .lazy_deck import read_deck_info
+    from .models import DeckInfo
 
-    learning_buckets = ProbBucket()
-    deck = get_deck()
-    if deck:
-        learning_buckets.add_cards(deck.cards)
-    return learning_buckets
+    path = path or get_deck_path()
+    if path is None:
+        return None
+    try:
+        deck = deck_cache.peek(path)
+        if deck is None:
+            has_journal = deck_cache.key(path)[3] > 0
+            if not has_journal and Path(path).suffix == ".json":
+                return read_deck_info(path)
+            if not load:
+                return None
+            deck = deck_cache.get(path)
+    except (OSError, ValueError) as e:
+        print(f"FAILED to read deck info: {e}")
+        return None
+    return DeckInfo(
+        author=deck.author,
+        name=deck.name,
+        description=deck.description,
+        target_language=deck.target_language,
+        card_count=len(deck.cards),
+    )
+
+
+def get_session(deck: Optional["Deck"] = None) -> Session | None:
+    """Obtain the practice session of the logged-in user on a deck.
+
+    Args:
+            deck: The deck being learned; the current deck, see get_deck, if omitted.
+
+    Returns:
+            The user's Session from the session registry, or None without a deck.
+    """
+    if deck is None:
+        deck = get_deck()
+    if deck is None:
+        return None
+    return session_registry.get(app.storage.user.get("username", "anonymous"), deck)
+
+
+async def open_session(distractors: bool = False) -> Session | None:
+    """Load the current deck and open the user's practice session on it for this tab.
+
+    The session is kept in client storage and pinned in the registry until the tab is
+    closed, so click handlers get the very session the page was rendered with from
+    get_tab_session, even after the registry's idle or memory limits pass, and without
+    resolving the deck again.
+
+    Args:
+            distractors: Whether the page asks multi-choice questions; the distractor index
+                    of the deck version is then built, once for all its sessions, in a thread.
+
+    Returns:
+            The user's Session, or None without a deck.
+    """
+    deck = await load_deck()
+    session = get_session(deck) if deck else None
+    if session is None:
+        return None
+    if distractors:
+        await asyncio.to_thread(session.buckets.pool.build_distractors)
+    if app.storage.client.get("session") is not session:
+        session_registry.pin(session)
+        ui.context.client.on_delete(lambda: session_registry.unpin(session))
+        app.storage.client["session"] = session
+    return session
+
+
+def get_tab_session() -> Session | None:
+    """Return the session opened by the page of the current tab, see open_session.
+
+    Returns:
+            The tab's Session, or None if the page opened none.
+    """
+    return app.storage.client.get("session")
 
 
 def add_custom_styles() -> None:
@@ -179,9 +328,14 @@ def frame(navigation_title: str, buttons_callback: Callable | None = None) -> Ge
 
         ui.space()
 
-        if deck := get_deck():
-            ui.label(f"cards: {len(deck.cards)}")
-            ui.badge(0, color="skyblue").props("align: middle").bind_text_from(daily_score, "tally")
+        # Only the info at hand: a deck not loaded yet is not loaded for the header
+        if deck_info := get_deck_info(load=False):
+            ui.label(f"cards: {deck_info.card_count}")
+            # Only pages that opened the session show the score, the others do not load the deck
+            if session := session_registry.peek(
+                app.storage.user.get("username", "anonymous"), deck_info.name
+            ):
+                ui.badge(0, color="skyblue").props("align: middle").bind_text_from(session.score, "tally")
 
         with ui.button(icon="menu").props("flat color=white round"):
             with ui.menu():
@@ -282,6 +436,10 @@ def report_typo(card: "Lexicard") -> Any:
     Returns:
             An awaitable object representing the dialog.
     """
+    from .deck_journal import get_journal
+    from .models import Lexicard
+
+    path = get_deck_path()
     with ui.context.client.content:
         with ui.dialog() as dialog, ui.card():
             ui.label(f"Typo on {card.target_word if card else 'card'}?").classes("text-h5 text-bold")
@@ -303,17 +461,51 @@ def report_typo(card: "Lexicard") -> Any:
                     f"{typo_audio.text if typo_audio.value else ''}"
                 )
                 notify(report_msg)
+                if isinstance(card, Lexicard) and path:
+                    # One journal line instead of rewriting the deck file; it is synced, so off the loop
+                    flagged = card.model_copy(update={"check_for_correction": True})
+                    await asyncio.to_thread(lambda: get_journal(path).upsert(flagged))
 
     return show_result()
 
 
+def audio_url(filename: str) -> str:
+    """Return the URL of an audio file of the assets directory.
+
+    Args:
+            filename: The name of the audio file (without .mp3 extension).
+    """
+    return f"{AUDIO_URL}/{quote(filename)}{AUDIO_SUFFIX}"
+
+
+# Browser-side cache of Audio objects by URL, shared by preload_audio and auto_play
+_AUDIO_CACHE_JS = "(window.lexicardAudio = window.lexicardAudio || {})"
+
+
+def preload_audio(filenames: Iterable[str]) -> None:
+    """Have the browser fetch audio files ahead of time, so playing them starts at once.
+
+    Args:
+            filenames: Names of audio files (without .mp3 extension), e.g. PrefetchQueue.sounds().
+    """
+    urls = [audio_url(filename) for filename in filenames]
+    if urls:
+        ui.run_javascript(
+            f"const cache = {_AUDIO_CACHE_JS};"
+            f"for (const url of {json.dumps(urls)}) {{"
+            "if (!cache[url]) { cache[url] = new Audio(url); cache[url].preload = 'auto'; } }"
+        )
+
+
 def auto_play(filename: str) -> None:
-    """Silently load and play an audio file from the assets directory.
+    """Play an audio file from the assets directory, preloaded or not.
 
     Args:
             filename: The name of the audio file (without .mp3 extension).
     """
-    audio_path = ASSETS_DIR / f"{filename}.mp3"
-    audio_element = ui.audio(str(audio_path))
-    audio_element.set_visibility(False)
-    audio_element.play()
+    url = json.dumps(audio_url(filename))
+    ui.run_javascript(
+        f"const cache = {_AUDIO_CACHE_JS};"
+        f"const audio = cache[{url}] = cache[{url}] || new Audio({url});"
+        "audio.currentTime = 0; audio.play().catch(() => {});"
+    )
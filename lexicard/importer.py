@@ -0,0 +1,365 @@
+"""Batch import of lexicon workbooks for the Lexicard application.
+
+This module provides the lexicard-import command, which parses many Excel workbooks and
+sheets in parallel worker processes and writes one deck per sheet, or merges them all
+into a single deck, then prints per-row errors and a throughput summary.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+from xml.etree import ElementTree
+
+import openpyxl
+
+from .deck_binary import SUFFIX
+from .deck_diff import DeckDiff
+from .deck_journal import get_journal
+from .deck_store import DeckStore, IndexedDeck
+from .models import Deck, construct_cards, iter_cards_from_excel
+
+# First header cell of the sheets holding cards, as in assets/decxample.xlsx
+ID_HEADERS = ("id", "tid")
+# Sheet digests of the last import of each deck, next to the deck files
+MANIFEST = "lexicard-import.json"
+# Above this many card edits, an incremental import rewrites the deck file instead of journaling them
+MAX_JOURNAL_EDITS = 1000
+
+
+class SheetImport:
+    """Result of the import of one sheet, sent back from a worker process.
+
+    Attributes:
+            path: The workbook.
+            sheet: The sheet name.
+            cards: The accepted cards, as validated dicts.
+            rows: Number of rows read, header excluded.
+            errors: (row number, message) of each rejected row.
+            seconds: Time spent parsing and validating the sheet.
+    """
+
+    def __init__(self, path: Path, sheet: str) -> None:
+        """Initialize an empty result for a sheet."""
+        self.path = path
+        self.sheet = sheet
+        self.cards: list[dict[str, Any]] = []
+        self.rows = 0
+        self.errors: list[tuple[int, str]] = []
+        self.seconds = 0.0
+
+
+def available_cpus() -> int:
+    """Return the number of cores this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def find_workbooks(sources: list[str]) -> list[Path]:
+    """Expand directories (all their .xlsx files) and glob patterns into workbook paths.
+
+    Args:
+            sources: Files, directories or glob patterns, e.g. ["releases/", "extra/*.xlsx"].
+
+    Returns:
+            The distinct workbooks, sorted; Excel lock files ("~$...") are skipped.
+    """
+    found: set[Path] = set()
+    for source in sources:
+        path = Path(source)
+        if path.is_dir():
+            found.update(path.glob("*.xlsx"))
+        elif path.is_file():
+            found.add(path)
+        else:
+            found.update(Path(match) for match in glob.glob(source, recursive=True))
+    return sorted(p for p in found if p.suffix == ".xlsx" and not p.name.startswith("~$"))
+
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_PACKAGE_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}Relationship"
+# Index of the shared string of a cell, e.g. <c r="A2" t="s"><v>12</v></c>
+_SHARED_STRING_CELL = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+
+
+def sheet_digests(path: Path) -> dict[str, str]:
+    """Return a hash of the content of each sheet of a workbook, by sheet name.
+
+    A sheet's hash covers its XML part, the shared strings it refers to and the styles,
+    but not the other sheets, so editing one sheet leaves the digests of the others
+    unchanged. It is much cheaper than parsing the sheet.
+    """
+    with zipfile.ZipFile(path) as archive:
+        names = set(archive.namelist())
+        strings = []
+        if "xl/sharedStrings.xml" in names:
+            root = ElementTree.fromstring(archive.read("xl/sharedStrings.xml"))
+            strings = ["".join(item.itertext()).encode("utf-8") for item in root.iter(f"{_MAIN_NS}si")]
+        styles = archive.read("xl/styles.xml") if "xl/styles.xml" in names else b""
+        targets = {
+            rel.get("Id"): rel.get("Target", "")
+            for rel in ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels")).iter(_PACKAGE_REL)
+        }
+        digests = {}
+        for sheet in ElementTree.fromstring(archive.read("xl/workbook.xml")).iter(f"{_MAIN_NS}sheet"):
+            target = targets.get(sheet.get(_REL_ID), "")
+            part = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+            data = archive.read(part) if part in names else b""
+            digest = hashlib.blake2b(styles, digest_size=16)
+            digest.update(data)
+            for match in _SHARED_STRING_CELL.finditer(data):
+                i = int(match[1])
+                digest.update(b"\x00" + (strings[i] if i < len(strings) else b""))
+            digests[sheet.get("name", "")] = digest.hexdigest()
+        return digests
+
+
+def deck_name_of(path: Path, sheet: str, deck_name: str | None) -> str:
+    """Return the name of the deck a sheet goes to: deck_name if merging, else "<workbook>.<sheet>"."""
+    return deck_name or f"{path.stem}.{sheet}"
+
+
+def lexicon_sheets(path: Path, names: list[str] | None = None) -> list[str]:
+    """Return the sheets of a workbook that hold cards.
+
+    Args:
+            path: The workbook.
+            names: Sheets to import; if omitted, every sheet whose first header cell is in ID_HEADERS.
+
+    Returns:
+            The sheet names, in workbook order.
+    """
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if names:
+            return [name for name in wb.sheetnames if name in names]
+        sheets = []
+        for sheet in wb.worksheets:
+            header = next(sheet.iter_rows(max_row=1, values_only=True), None)
+            if header and str(header[0]).strip().lower() in ID_HEADERS:
+                sheets.append(sheet.title)
+        return sheets
+    finally:
+        wb.close()
+
+
+def import_sheet(path: Path, sheet: str) -> SheetImport:
+    """Parse and validate one sheet; runs in a worker process."""
+    result = SheetImport(path, sheet)
+    start = time.perf_counter()
+
+    def on_progress(rows: int, accepted: int, rejected: int) -> None:
+        result.rows = rows
+
+    def on_error(row_idx: int, error: Exception) -> None:
+        result.errors.append((row_idx, str(error).splitlines()[0]))
+
+    for chunk in iter_cards_from_excel(path, sheet, on_progress=on_progress, on_error=on_error):
+        result.cards.extend(card.model_dump() for card in chunk)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def build_decks(
+    results: list[SheetImport], deck_name: str | None, author: str, language: str
+) -> tuple[list[Deck], int]:
+    """Group imported sheets into decks.
+
+    Args:
+            results: The sheet imports, in workbook and sheet order.
+            deck_name: Merge every sheet into a deck of this name; one deck per sheet if None.
+            author: Author of the decks.
+            language: Target language of the decks.
+
+    Returns:
+            The decks, and the number of cards that replaced a card with the same tid
+            (later sheets win).
+    """
+    groups: dict[str, list[SheetImport]] = {}
+    for result in results:
+        groups.setdefault(deck_name_of(result.path, result.sheet, deck_name), []).append(result)
+
+    decks, replaced = [], 0
+    for name, group in groups.items():
+        sources = ", ".join(f"{r.path.name}:{r.sheet}" for r in group)
+        deck = IndexedDeck(
+            Deck(author=author, name=name, description=f"Imported from {sources}", target_language=language)
+        )
+        for result in group:
+            # Validated in the worker, no need to validate again
+            for card in construct_cards(result.cards):
+                if card.tid in deck:
+                    deck.update(card)
+                    replaced += 1
+                else:
+                    deck.add(card)
+        decks.append(deck.deck)
+    return decks, replaced
+
+
+def update_deck_file(deck: Deck, path: Path) -> DeckDiff:
+    """Apply an imported deck to an existing deck file, keeping its unchanged cards.
+
+    A handful of edits go to the deck's journal, one line each; larger diffs rewrite
+    the file once.
+
+    Args:
+            deck: The imported version of the deck.
+            path: The existing JSON or binary deck file.
+
+    Returns:
+            The differences applied, against the stored deck with its journal replayed.
+    """
+    indexed = DeckStore().open(path)
+    diff = DeckDiff(indexed.deck.cards, deck.cards)
+    edits = len(diff.added) + len(diff.changed) + len(diff.removed)
+    if edits > MAX_JOURNAL_EDITS:
+        indexed.journal = None
+    indexed.apply_diff(diff)
+    if edits > MAX_JOURNAL_EDITS:
+        get_journal(path).replace_deck(indexed.deck)
+    return diff
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Import workbooks into deck files, see lexicard-import --help."""
+    parser = argparse.ArgumentParser(
+        prog="lexicard-import", description="Import lexicon workbooks into decks."
+    )
+    parser.add_argument("sources", nargs="+", help="workbooks, directories or glob patterns")
+    parser.add_argument("-o", "--output", type=Path, default=Path(), help="directory of the deck files")
+    parser.add_argument("--format", choices=("json", "lxd"), default="json", help="deck file format")
+    parser.add_argument("--sqlite", type=Path, help="store the decks in this SQLite database instead")
+    parser.add_argument("--sheet", action="append", help="sheet to import (repeatable); default: card sheets")
+    parser.add_argument("--deck-name", help="merge every sheet into one deck of this name")
+    parser.add_argument("--author", default="", help="author of the decks")
+    parser.add_argument("--language", default="th", help="target language of the decks")
+    parser.add_argument("-j", "--jobs", type=int, default=available_cpus(), help="worker processes")
+    parser.add_argument("--max-errors", type=int, default=20, help="row errors printed per sheet")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only apply the added, changed and removed cards to existing decks; skip decks whose sheets are unchanged",
+    )
+    parser.add_argument("--diff-report", type=Path, help="write the per-deck diffs to this JSON file")
+    args = parser.parse_args(argv)
+
+    workbooks = find_workbooks(args.sources)
+    if not workbooks:
+        sys.exit("no workbook found")
+    start = time.perf_counter()
+    tasks = [(path, sheet) for path in workbooks for sheet in lexicon_sheets(path, args.sheet)]
+    if not tasks:
+        sys.exit("no sheet with cards found")
+
+    storage = None
+    if args.sqlite:
+        from .storage_sqlite import SqliteStorage
+
+        storage = SqliteStorage(args.sqlite)
+        manifest_path = args.sqlite.with_suffix(".import.json")
+    else:
+        args.output.mkdir(parents=True, exist_ok=True)
+        manifest_path = args.output / MANIFEST
+    extension = SUFFIX if args.format == "lxd" else ".json"
+
+    # A deck whose sheets did not change since its last import is left alone
+    digests = {path: sheet_digests(path) for path in workbooks}
+    fingerprints: dict[str, dict[str, str]] = {}
+    for path, sheet in tasks:
+        name = deck_name_of(path, sheet, args.deck_name)
+        fingerprints.setdefault(name, {})[f"{path.name}:{sheet}"] = digests[path][sheet]
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    skipped = set()
+    if args.incremental:
+        stored = (
+            {info.name for info in storage.list_decks()}
+            if storage
+            else {name for name in fingerprints if (args.output / f"{name}{extension}").exists()}
+        )
+        skipped = {name for name in stored if manifest.get(name) == fingerprints.get(name)}
+    unchanged = len(tasks)
+    tasks = [task for task in tasks if deck_name_of(*task, args.deck_name) not in skipped]
+    unchanged -= len(tasks)
+
+    results: dict[tuple[Path, str], SheetImport] = {}
+    workers = max(1, min(args.jobs, len(tasks)))
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(import_sheet, path, sheet) for path, sheet in tasks]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.path, result.sheet] = result
+                print(
+                    f"{result.path.name}:{result.sheet}: {len(result.cards)} cards, "
+                    f"{len(result.errors)} rejected, {result.seconds:.2f}s"
+                )
+                for row_idx, message in result.errors[: args.max_errors]:
+                    print(f"  row {row_idx}: {message}")
+                if len(result.errors) > args.max_errors:
+                    print(f"  ... {len(result.errors) - args.max_errors} more")
+
+    ordered = [results[task] for task in tasks]
+    decks, replaced = build_decks(ordered, args.deck_name, args.author, args.language)
+    report: dict[str, dict] = {name: {"skipped": True} for name in sorted(skipped)}
+    for deck in decks:
+        diff = None
+        if storage:
+            stored_deck = storage.load_deck(deck.name) if args.incremental else None
+            if stored_deck is None:
+                storage.save_deck(deck)
+            else:
+                diff = DeckDiff(stored_deck.cards, deck.cards)
+                storage.apply_diff(deck.name, diff)
+        else:
+            path = args.output / f"{deck.name}{extension}"
+            if args.incremental and path.exists():
+                diff = update_deck_file(deck, path)
+            else:
+                get_journal(path).replace_deck(deck)  # journaled edits of an older version are void
+        report[deck.name] = diff.to_dict() if diff else {"created": len(deck.cards)}
+        if diff:
+            print(
+                f"{deck.name}: {len(diff.added)} added, {len(diff.changed)} changed, "
+                f"{len(diff.removed)} removed, {diff.unchanged} unchanged"
+            )
+        manifest[deck.name] = fingerprints[deck.name]
+    if storage:
+        storage.close()
+
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+    if args.diff_report:
+        args.diff_report.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    elapsed = time.perf_counter() - start
+    rows = sum(r.rows for r in ordered)
+    accepted = sum(len(r.cards) for r in ordered)
+    rejected = sum(len(r.errors) for r in ordered)
+    if not tasks:
+        print(
+            f"Nothing to import: {unchanged} sheets unchanged, {len(skipped)} decks skipped, in {elapsed:.2f}s"
+        )
+        return
+    print(
+        f"Imported {len(workbooks)} workbooks, {len(tasks)} sheets into {len(decks)} decks "
+        f"with {workers} workers: {rows} rows, {accepted} cards, {rejected} rejected, "
+        f"{replaced} duplicate tids replaced, in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)"
+    )
+    if skipped:
+        print(f"{unchanged} sheets unchanged, {len(skipped)} decks skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Lazy loading of deck files.
+
+This module reads the metadata and card count of a JSON deck file without validating
+its cards, and provides the LazyDeck class which parses and validates cards one at a
+time, only when they are accessed.
+"""
+
+import functools
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+from .models import Deck, DeckInfo, Lexicard, validate_cards
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"\s*")
+# A "tid" key can only appear in cards; inside a JSON string its quotes would be escaped
+_tid_key = re.compile(rb'"tid"\s*:')
+
+
+def _skip(text: str, pos: int) -> int:
+    """Return the position of the first non-whitespace character from pos."""
+    return _whitespace.match(text, pos).end()
+
+
+def _scan_header(text: str) -> tuple[dict[str, Any], int | None]:
+    """Decode the top-level fields of a deck, stopping at the cards array.
+
+    Decks written by save_deck_to_json_file have their cards last, so the fields
+    before them are all the metadata.
+
+    Args:
+            text: The whole JSON document.
+
+    Returns:
+            The fields found before "cards", and the position of the cards array (None if absent).
+    """
+    fields: dict[str, Any] = {}
+    pos = _skip(text, 0)
+    if text[pos : pos + 1] != "{":
+        raise ValueError("a deck file must hold a JSON object")
+    pos = _skip(text, pos + 1)
+    while pos < len(text) and text[pos] != "}":
+        key, pos = _decoder.raw_decode(text, pos)
+        pos = _skip(text, pos)
+        if text[pos : pos + 1] != ":":
+            raise ValueError(f"expected ':' at position {pos}")
+        pos = _skip(text, pos + 1)
+        if key == "cards":
+            return fields, pos
+        fields[key], pos = _decoder.raw_decode(text, pos)
+        pos = _skip(text, pos)
+        if text[pos : pos + 1] == ",":
+            pos = _skip(text, pos + 1)
+    return fields, None
+
+
+class LazyDeck:
+    """A deck file whose cards are decoded and validated on demand.
+
+    Opening costs one read and a scan of the metadata. Accessing card i decodes the
+    raw cards up to i, and validates only card i.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """Open a JSON deck file.
+
+        Args:
+                path: Path to a file written by save_deck_to_json_file.
+        """
+        self.path = Path(path)
+        data = self.path.read_bytes()
+        self._text = data.decode("utf-8")
+        fields, self._pos = _scan_header(self._text)
+        if self._pos is None:
+            fields.setdefault("cards", [])
+        elif any(key not in fields for key in ("author", "name", "description", "target_language")):
+            # Hand-edited file with the metadata after the cards: decode it all
+            fields = json.loads(self._text)
+            self._pos = None
+        count = len(fields["cards"]) if self._pos is None else len(_tid_key.findall(data))
+        self.info = DeckInfo.model_validate({**fields, "card_count": count})
+        self._metadata = {key: value for key, value in fields.items() if key != "cards"}
+        self._raw: list[dict[str, Any]] = fields.get("cards", [])
+        if self._pos is not None:
+            self._pos = _skip(self._text, self._pos + 1)  # first card, past '['
+        self._cards: dict[int, Lexicard] = {}  # index -> validated card
+        self._tid_index: dict[int, int] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of cards in the deck."""
+        return self.info.card_count
+
+    def _decode_until(self, count: int) -> None:
+        """Decode raw cards until at least count of them (or all) are available."""
+        while self._pos is not None and len(self._raw) < count:
+            if self._text[self._pos] == "]":
+                self._pos = None
+                break
+            raw, pos = _decoder.raw_decode(self._text, self._pos)
+            self._raw.append(raw)
+            pos = _skip(self._text, pos)
+            if self._text[pos] == ",":
+                pos = _skip(self._text, pos + 1)
+            self._pos = pos
+        if self._pos is None:
+            self._text = ""  # everything is decoded, free the document
+
+    def card(self, index: int) -> Lexicard:
+        """Return the card at a given index, validating it on first access.
+
+        Args:
+                index: Position of the card in the deck (negative values count from the end).
+
+        Returns:
+                The validated Lexicard.
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"card index {index} out of range")
+        card = self._cards.get(index)
+        if card is None:
+            self._decode_until(index + 1)
+            card = self._cards[index] = Lexicard.model_validate(self._raw[index])
+        return card
+
+    def cards(self, start: int = 0, stop: int | None = None) -> list[Lexicard]:
+        """Return the cards of a slice of the deck.
+
+        Args:
+                start: Index of the first card.
+                stop: Index past the last card; the end of the deck if omitted.
+
+        Returns:
+                The validated cards, in deck order.
+        """
+        return [self.card(i) for i in range(*slice(start, stop).indices(len(self)))]
+
+    def by_tid(self, tid: int) -> Lexicard | None:
+        """Return the card with a given tid, or None.
+
+        The first call decodes all raw cards to build the tid index, but validates none.
+        """
+        if self._tid_index is None:
+            self._decode_until(len(self))
+            self._tid_index = {raw["tid"]: i for i, raw in enumerate(self._raw)}
+        index = self._tid_index.get(tid)
+        return None if index is None else self.card(index)
+
+    def to_deck(self, chunk_size: int | None = None) -> Deck:
+        """Validate all the cards and return a full Deck.
+
+        Args:
+                chunk_size: If set, cards are decoded and validated this many at a time, and
+                        the GIL is released between chunks. Loading in a worker thread then
+                        stalls the event loop for one chunk at most, not for the whole deck.
+        """
+        if chunk_size is None:
+            return Deck(**self._metadata, cards=self.cards())
+        cards: list[Lexicard] = []
+        for start in range(0, len(self), chunk_size):
+            self._decode_until(start + chunk_size)
+            cards.extend(validate_cards(self._raw[start : start + chunk_size]))
+            time.sleep(0)  # yield the GIL to the other threads
+        return Deck(**self._metadata, cards=cards)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_deck_info(path: Path, mtime_ns: int, size: int) -> DeckInfo:
+    """Read the metadata of a deck file; cached per file version."""
+    return LazyDeck(path).info
+
+
+def read_deck_info(path: str | Path) -> DeckInfo:
+    """Return the metadata and card count of a deck file.
+
+    The result is cached by (path, modification time, size), so repeated calls for an
+    unchanged file cost a stat() only.
+
+    Args:
+            path: Path to a JSON deck file.
+
+    Returns:
+            The deck's DeckInfo.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    return _cached_deck_info(path, stat.st_mtime_ns, stat.st_size)
+
+
+def list_decks(directory: str | Path) -> list[DeckInfo]:
+    """Return the metadata of every JSON deck file of a directory, sorted by deck name."""
+    return sorted((read_deck_info(path) for path in Path(directory).glob("*.json")), key=lambda d: d.name)
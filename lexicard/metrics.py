@@ -0,0 +1,133 @@
+"""Lightweight instrumentation for the Lexicard engines.
+
+This module provides the Metrics class, a set of named counters and histograms that the
+card selection code updates when instrumentation is enabled, and that can be read back
+programmatically, e.g. by a benchmark or a debug page. The LoopLagMonitor class records
+how late the asyncio event loop runs its callbacks.
+"""
+
+import asyncio
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Any
+
+# Default histogram bucket upper bounds, suited to bucket sizes and small counts
+DEFAULT_BOUNDS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10_000, 100_000)
+
+
+class Histogram:
+    """A fixed-bucket histogram of observed values."""
+
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_BOUNDS) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+                bounds: Sorted upper bounds of the buckets; larger values go to an overflow bucket.
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the histogram as plain data, listing only the non-empty buckets."""
+        buckets = {f"<={bound}": n for bound, n in zip(self.bounds, self.counts, strict=False) if n}
+        if self.counts[-1]:
+            buckets[f">{self.bounds[-1]}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class Metrics:
+    """Named counters and histograms.
+
+    Engines hold an optional Metrics instance and skip all instrumentation when it is
+    None, so it costs nothing unless enabled.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty counters and histograms."""
+        self.counters: Counter[str] = Counter()
+        self.histograms: dict[str, Histogram] = {}
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Increase a counter."""
+        self.counters[name] += amount
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a value in a histogram, creating it with the default bounds if needed."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return all counters and histograms as plain data."""
+        return {
+            "counters": dict(self.counters),
+            "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+        }
+
+    def reset(self) -> None:
+        """Clear all counters and histograms."""
+        self.counters.clear()
+        self.histograms.clear()
+
+
+class LoopLagMonitor:
+    """Measures the latency of an asyncio event loop.
+
+    A task sleeps for interval over and over; how much later than asked it wakes up is
+    the time the loop was busy with something else, e.g. a blocking call in a page
+    handler. Each lag is recorded, in milliseconds, in the histogram named name.
+    """
+
+    def __init__(self, metrics: Metrics, interval: float = 0.1, name: str = "event_loop.lag_ms") -> None:
+        """Initialize a stopped monitor.
+
+        Args:
+                metrics: Where the lags are recorded.
+                interval: Seconds between two measures.
+                name: Name of the histogram.
+        """
+        self.metrics = metrics
+        self.interval = interval
+        self.name = name
+        self.max_lag_ms = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start measuring; must be called from the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        """Stop measuring."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        """Sleep and record the oversleep, until cancelled."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - start - self.interval) * 1000)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self.metrics.observe(self.name, lag_ms)
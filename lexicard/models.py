@@ -4,12 +4,15 @@ This module defines Pydantic models for Lexicards, Decks, and Users,
 and provides utility functions for loading and saving data from JSON and Excel.
 """
 
+import json
+import os
+from collections.abc import Callable, Iterator
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
 import openpyxl
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
 
 class Lexicard(BaseModel):
@@ -40,6 +43,8 @@ class Deck(BaseModel):
             name: Name of the deck.
             description: Brief description of the deck's content.
             target_language: ISO language code (e.g., 'th', 'en').
+            last_id_used: Highest tid ever allocated in this deck, see DeckStore; 0 in decks
+                    saved before it was recorded.
             cards: List of Lexicard objects included in the deck.
     """
 
@@ -47,10 +52,77 @@ class Deck(BaseModel):
     name: str
     description: str
     target_language: str
-    _last_id_used: int  # Internal field for ID management
+    last_id_used: int = 0
     cards: list[Lexicard] = []
 
 
+# Validator of card lists, built once: building a TypeAdapter is far costlier than using it
+CARDS_ADAPTER = TypeAdapter(list[Lexicard])
+_CARD_FIELDS = frozenset(Lexicard.model_fields)
+
+
+def validate_cards(rows: list[dict[str, Any]]) -> list[Lexicard]:
+    """Validate raw card rows in bulk.
+
+    One call validates the whole list in pydantic-core, instead of one model call per row.
+
+    Args:
+            rows: Card data as dicts, e.g. rows of an import.
+
+    Returns:
+            The validated Lexicard objects, in row order.
+
+    Raises:
+            ValidationError: If any row is invalid; the error locations start with the row index.
+    """
+    return CARDS_ADAPTER.validate_python(rows)
+
+
+def construct_cards(rows: list[dict[str, Any]]) -> list[Lexicard]:
+    """Build cards from trusted data, without validation.
+
+    Only for data that was validated before, such as our own deck files: every row
+    must hold exactly the Lexicard fields with values of the right types. This does what
+    Lexicard.model_construct does for such rows, without its per-field checks, and the
+    rows become the cards' attribute dicts.
+
+    Args:
+            rows: Card data as dicts, not reused by the caller.
+
+    Returns:
+            The Lexicard objects, in row order.
+    """
+    new = object.__new__
+    set_attr = object.__setattr__
+    cards = []
+    for row in rows:
+        card = new(Lexicard)
+        set_attr(card, "__dict__", row)
+        set_attr(card, "__pydantic_fields_set__", set(_CARD_FIELDS))
+        set_attr(card, "__pydantic_extra__", None)
+        set_attr(card, "__pydantic_private__", None)
+        cards.append(card)
+    return cards
+
+
+class DeckInfo(BaseModel):
+    """Model for the metadata of a deck, without its cards.
+
+    Attributes:
+            author: Name of the deck creator.
+            name: Name of the deck.
+            description: Brief description of the deck's content.
+            target_language: ISO language code (e.g., 'th', 'en').
+            card_count: Number of cards in the deck.
+    """
+
+    author: str
+    name: str
+    description: str
+    target_language: str
+    card_count: int
+
+
 class User(BaseModel):
     """Model for a user profile and learning progress.
 
@@ -87,36 +159,145 @@ toto_user = User.model_validate(TOTO_DATA)
 
 
 def save_deck_to_json_file(deck: Deck, file_path: str | Path) -> None:
-    """Serialize a Deck object to a JSON file.
+    """Serialize a Deck object to a JSON file, atomically.
+
+    The deck is written to a temporary file next to the destination, synced to disk,
+    and renamed over it, so a crash leaves either the previous file or the new one.
 
     Args:
             deck: The Deck instance to save.
             file_path: Destination path on the filesystem.
     """
     path = Path(file_path)
-    with path.open("w", encoding="utf-8") as f:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
         f.write(deck.model_dump_json(indent=2))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
     print(f"Model successfully saved to {path}")
 
 
-def load_deck_from_json_file(file_path: str | Path) -> Deck:
+def load_deck_from_json_file(file_path: str | Path, trusted: bool = False) -> Deck:
     """Deserialize a Deck object from a JSON file.
 
     Args:
             file_path: Path to the JSON file.
+            trusted: If True, the file was written by save_deck_to_json_file and its cards
+                    are built without validation (see construct_cards).
 
     Returns:
-            A validated Deck instance.
+            A Deck instance, validated unless trusted.
     """
     path = Path(file_path)
     with path.open("r", encoding="utf-8") as f:
         json_raw = f.read()
 
-    deck = Deck.model_validate_json(json_raw)
+    if trusted:
+        data = json.loads(json_raw)
+        deck = Deck(**{**data, "cards": construct_cards(data.get("cards", []))})
+    else:
+        deck = Deck.model_validate_json(json_raw)
     print(f"Model successfully loaded from {path}")
     return deck
 
 
+def _print_row_error(row_idx: int, error: Exception) -> None:
+    """Default row error reporter of the Excel importer."""
+    print(f"Error processing row {row_idx}: {error}")
+
+
+def _validate_chunk(
+    row_numbers: list[int], chunk_data: list[dict[str, Any]], on_error: Callable[[int, Exception], None]
+) -> list[Lexicard]:
+    """Validate a chunk of card rows in bulk, falling back to row by row if any is invalid."""
+    try:
+        return validate_cards(chunk_data)
+    except ValidationError:
+        pass
+    cards = []
+    for row_idx, card_data in zip(row_numbers, chunk_data, strict=True):
+        try:
+            cards.append(Lexicard(**card_data))
+        except ValidationError as e:
+            on_error(row_idx, e)
+    return cards
+
+
+def iter_cards_from_excel(
+    file_path: str | Path,
+    sheet_name: str = "lexicon",
+    chunk_size: int = 1000,
+    on_progress: Callable[[int, int, int], None] | None = None,
+    on_error: Callable[[int, Exception], None] = _print_row_error,
+) -> Iterator[list[Lexicard]]:
+    """Stream validated flashcards from an Excel sheet, in chunks.
+
+    The workbook is opened in read-only mode, so rows are parsed lazily and memory use
+    does not depend on the size of the sheet.
+
+    Args:
+            file_path: Path to the .xlsx file.
+            sheet_name: Name of the sheet holding the cards, with a header row.
+            chunk_size: Number of cards per yielded chunk.
+            on_progress: Called after each chunk with (rows read, cards accepted, rows rejected).
+            on_error: Called with (row number, exception) for each rejected row.
+
+    Yields:
+            Lists of up to chunk_size Lexicard objects, in sheet order.
+    """
+    path = Path(file_path)
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = wb[sheet_name]
+        row_numbers: list[int] = []
+        chunk_data: list[dict[str, Any]] = []
+        rows = accepted = rejected = 0
+
+        # Iterate over rows, assuming first row is header.
+        for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+            rows += 1
+            if not row or row[0] is None:
+                continue
+
+            try:
+                card_data = {
+                    "tid": int(row[0]),
+                    "sound": str(row[1]) if row[1] is not None else "0",
+                    "check_for_correction": bool(row[2]),
+                    "phonetic": str(row[3]) if row[3] is not None else "",
+                    "target_word": str(row[4]) if row[4] is not None else "",
+                    "explain": str(row[5]) if row[5] is not None else "",
+                }
+            except (ValueError, TypeError, IndexError) as e:
+                rejected += 1
+                on_error(row_idx, e)
+                continue
+            row_numbers.append(row_idx)
+            chunk_data.append(card_data)
+
+            if len(chunk_data) >= chunk_size:
+                chunk = _validate_chunk(row_numbers, chunk_data, on_error)
+                accepted += len(chunk)
+                rejected += len(chunk_data) - len(chunk)
+                row_numbers, chunk_data = [], []
+                if chunk:
+                    yield chunk
+                if on_progress:
+                    on_progress(rows, accepted, rejected)
+
+        if chunk_data:
+            chunk = _validate_chunk(row_numbers, chunk_data, on_error)
+            accepted += len(chunk)
+            rejected += len(chunk_data) - len(chunk)
+            if chunk:
+                yield chunk
+        if on_progress:
+            on_progress(rows, accepted, rejected)
+    finally:
+        wb.close()
+
+
 def load_deck_from_excel(file_path: str | Path = "decxample.xlsx") -> Deck:
     """Load flashcard data from an Excel workbook and convert to a Deck.
 
@@ -126,31 +307,9 @@ def load_deck_from_excel(file_path: str | Path = "decxample.xlsx") -> Deck:
     Returns:
             A Deck object containing cards from the 'lexicon' sheet.
     """
-    path = Path(file_path)
-    wb = openpyxl.load_workbook(path, data_only=True)
-    sheet = wb["lexicon"]
     cards: list[Lexicard] = []
-
-    # Iterate over rows, assuming first row is header.
-    for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-        if not row or row[0] is None:
-            continue
-
-        try:
-            card_data = {
-                "tid": int(row[0]),
-                "sound": str(row[1]) if row[1] is not None else "0",
-                "check_for_correction": bool(row[2]),
-                "phonetic": str(row[3]) if row[3] is not None else "",
-                "target_word": str(row[4]) if row[4] is not None else "",
-                "explain": str(row[5]) if row[5] is not None else "",
-            }
-
-            lexicard = Lexicard(**card_data)
-            cards.append(lexicard)
-        except (ValueError, TypeError, IndexError, ValidationError) as e:
-            print(f"Error processing row {row_idx}: {e}")
-            continue
+    for chunk in iter_cards_from_excel(file_path):
+        cards.extend(chunk)
 
     print(f"ABOUT TO CONVERT {len(cards)} cards")
 
@@ -159,7 +318,7 @@ def load_deck_from_excel(file_path: str | Path = "decxample.xlsx") -> Deck:
         "name": "demodeck",
         "description": "a deck targeting Thai to demo the app.",
         "target_language": "th",
-        "_last_id_used": 1538,
+        "last_id_used": max((card.tid for card in cards), default=0),
         "cards": cards,
     }
 
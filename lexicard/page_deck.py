@@ -4,36 +4,47 @@ This module provides a UI to load decks from storage, display metadata,
 and view card lists in a tabular format.
 """
 
-from nicegui import Client, app, ui
+import asyncio
 
-from .front_commons import display_message, display_text, frame, get_deck, notify_dev
-from .models import FILE_PATH, Lexicard, load_deck_from_json_file
+from nicegui import Client, ui
+
+from .deck_cache import deck_cache
+from .front_commons import display_message, display_text, frame, get_deck_info, get_deck_path
+from .lazy_deck import LazyDeck
+from .models import Lexicard
 
 
 @ui.page("/page_deck")
 async def deck_page(client: Client) -> None:
     """Render the deck overview and selection page."""
     await client.connected()
+    # File reads and parsing run in worker threads, not on the event loop
+    path = get_deck_path()
+    info = await asyncio.to_thread(get_deck_info, path) if path else None
+    preview = []
+    if info is not None:
+        # Show first 10 cards as a preview, only decoding them if the deck is not loaded yet
+        cached = deck_cache.peek(path)
+        preview = (
+            cached.cards[:10] if cached else await asyncio.to_thread(lambda: LazyDeck(path).cards(0, 10))
+        )
 
     with frame("Deck"):
         display_message("Select a Deck, or create one")
 
-        deck = get_deck()
-        if not deck:
-            # Mock behavior: automatically load the default deck if none selected
-            deck = load_deck_from_json_file(FILE_PATH)
-            app.storage.tab.update({"deck": deck})
-            notify_dev("Default deck loaded from storage", "positive")
+        if info is None:
+            display_text("The deck could not be read.")
+            return
 
         display_text("Currently Selected:").classes("font-bold")
 
         with ui.card().classes("gap-0 p-2 w-full max-w-2xl"):
             with ui.grid(columns=2).classes("w-full"):
-                ui.input(label="Name", value=deck.name).props("readonly")
-                ui.input(label="Author", value=deck.author).props("readonly")
-                ui.input(label="Language", value=deck.target_language).props("readonly")
-                ui.number(label="Cards", value=len(deck.cards)).props("readonly")
-                ui.textarea(label="Description", value=deck.description).props("readonly rows=2").classes(
+                ui.input(label="Name", value=info.name).props("readonly")
+                ui.input(label="Author", value=info.author).props("readonly")
+                ui.input(label="Language", value=info.target_language).props("readonly")
+                ui.number(label="Cards", value=info.card_count).props("readonly")
+                ui.textarea(label="Description", value=info.description).props("readonly rows=2").classes(
                     "col-span-full"
                 )
 
@@ -44,8 +55,7 @@ async def deck_page(client: Client) -> None:
             {"name": k, "label": k.replace("_", " ").capitalize(), "field": k}
             for k in Lexicard.model_fields.keys()
         ]
-        # Show first 10 cards as a preview
-        rows = [card.model_dump() for card in deck.cards[:10]]
+        rows = [card.model_dump() for card in preview]
 
         table = ui.table(
             columns=columns,
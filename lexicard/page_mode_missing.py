@@ -13,7 +13,7 @@ from .front_commons import (
     display_text,
     frame,
     get_command_bar,
-    get_deck,
+    load_deck,
     notify,
     report_typo,
 )
@@ -51,7 +51,7 @@ async def mode_missing_page(client: Client) -> None:
     """Render the missing-word practice page."""
     await client.connected()
 
-    deck = get_deck()
+    deck = await load_deck()
     if not deck:
         display_message("No deck selected. Redirecting...")
         await asyncio.sleep(2)
@@ -8,22 +8,24 @@ import asyncio
 import random
 from typing import Any, Optional
 
-from nicegui import Client, ui
+from nicegui import Client, app, ui
 
 from .front_commons import (
     auto_play,
-    daily_score,
     display_message,
     display_text,
     frame,
     get_command_bar,
-    get_deck,
-    get_learning_buckets,
+    get_tab_session,
     notify,
     notify_dev,
+    open_session,
+    preload_audio,
     report_typo,
 )
 from .models import Lexicard
+from .prefetch import PrefetchQueue
+from .sessions import Session
 
 
 class MultiChoiceState:
@@ -38,7 +40,6 @@ class MultiChoiceState:
         self.explain: str = ""
         self.choices: list[str] = ["", "", ""]
         self.correct_index: int = -1
-        self.chips: list[ui.chip] = []
         # Bindable choice shortcuts
         self.choice_0: str = ""
         self.choice_1: str = ""
@@ -57,12 +58,14 @@ class MultiChoiceState:
         self.phonetic = card.phonetic
         self.explain = card.explain
 
-        # Build and shuffle choices
-        choice_texts = [c.explain for c in cards]
-        random.shuffle(choice_texts)
+        # Shuffle the cards rather than their texts, so the correct chip is found by identity
+        # even if two cards share the same explanation
+        shuffled = list(cards)
+        random.shuffle(shuffled)
+        choice_texts = [c.explain for c in shuffled]
 
         self.choices = choice_texts
-        self.correct_index = choice_texts.index(card.explain)
+        self.correct_index = next(i for i, c in enumerate(shuffled) if c is card)
 
         # Update shortcuts for binding
         self.choice_0 = choice_texts[0]
@@ -70,8 +73,27 @@ class MultiChoiceState:
         self.choice_2 = choice_texts[2]
 
 
-# Global state for multi-choice page
-state = MultiChoiceState()
+def get_state() -> MultiChoiceState:
+    """Return the multi-choice state of the tab's session, shared by the user's tabs."""
+    session = get_tab_session()
+    return session.page_state("multi", MultiChoiceState) if session else MultiChoiceState()
+
+
+def get_prefetch_queue(session: Session) -> PrefetchQueue:
+    """Return the queue of the next questions, with their distractors, of the user's session."""
+    return session.page_state("multi.prefetch", lambda: PrefetchQueue(session.buckets, multi=True))
+
+
+def refill_prefetch_queue(session: Session) -> None:
+    """Select the next questions ahead of time and have the browser preload their audio."""
+    queue = get_prefetch_queue(session)
+    queue.fill()
+    preload_audio(queue.sounds())
+
+
+def get_chips() -> list[ui.chip]:
+    """Return the choice chips of the current tab."""
+    return app.storage.client.get("chips", [])
 
 
 def add_multi_choice_command_bar() -> None:
@@ -92,7 +114,7 @@ def add_multi_choice_command_bar() -> None:
             ui.button(icon="loop", on_click=reveal_answers).classes("h-8 hover:shadow").tooltip(
                 "Reveal correct answer"
             )
-            ui.button(icon="bug_report", on_click=lambda: report_typo(state.current_card)).classes(
+            ui.button(icon="bug_report", on_click=lambda: report_typo(get_state().current_card)).classes(
                 "h-8 hover:shadow"
             ).tooltip("Report a typo")
 
@@ -106,8 +128,8 @@ def add_multi_choice_command_bar() -> None:
 
 def reveal_answers() -> None:
     """Reveal the correct answer and mark user selection as right or wrong."""
-    for i in range(3):
-        chip = state.chips[i]
+    state = get_state()
+    for i, chip in enumerate(get_chips()):
         chip.set_enabled(False)
 
         if i == state.correct_index:
@@ -126,19 +148,20 @@ def reveal_answers() -> None:
 
 
 def pick_next_question() -> None:
-    """Select a new set of cards and reset the multi-choice UI."""
-    buckets = get_learning_buckets()
-    if not buckets:
+    """Show the next question, prefetched with its distractors, and reset the multi-choice UI."""
+    session = get_tab_session()
+    if not session:
         return
 
-    cards = buckets.pick_3_cards()
-    if all(cards):
-        state.set_cards(cards)
-        for chip in state.chips:
+    cards = get_prefetch_queue(session).pop()
+    if cards and all(cards):
+        session.page_state("multi", MultiChoiceState).set_cards(cards)
+        for chip in get_chips():
             chip.set_enabled(True)
             chip.selected = False
             chip.classes(remove="text-bold")
             chip.props(remove="outline color=red").props("color=primary")
+    refill_prefetch_queue(session)
 
 
 def record_multi_score(points: int) -> None:
@@ -147,17 +170,20 @@ def record_multi_score(points: int) -> None:
     Args:
             points: 1 for correct, -1 for incorrect.
     """
-    buckets = get_learning_buckets()
-    if not buckets or not state.current_card:
+    session = get_tab_session()
+    if not session:
+        return
+    state = session.page_state("multi", MultiChoiceState)
+    if not state.current_card:
         return
 
     if points == 1:
-        daily_score.tally += 1
-        buckets.promote(state.current_card, high_priority=True)
+        session.add_score(1)
+        session.buckets.promote(state.current_card, high_priority=True)
     else:
-        buckets.demote(state.current_card)
+        session.buckets.demote(state.current_card)
 
-    notify_dev(f"Score: {daily_score.tally}")
+    notify_dev(f"Score: {session.score.tally}")
 
 
 def on_user_choice(event_args: Any) -> None:
@@ -172,19 +198,19 @@ async def mode_multi_page(client: Client) -> None:
     """Render the multi-choice practice interface."""
     await client.connected()
 
-    deck = get_deck()
-    if not deck:
+    # The handlers use this session, pinned until the tab is closed
+    session = await open_session(distractors=True)
+    if not session:
         display_message("Redirecting to deck selection...")
         await asyncio.sleep(2)
         ui.navigate.to("/page_deck")
         return
 
     # Initial setup
-    buckets = get_learning_buckets()
-    if buckets:
-        initial_cards = buckets.pick_3_cards()
-        if all(initial_cards):
-            state.set_cards(initial_cards)
+    state = session.page_state("multi", MultiChoiceState)
+    initial_cards = get_prefetch_queue(session).pop()
+    if initial_cards and all(initial_cards):
+        state.set_cards(initial_cards)
 
     with frame("Practice: Multi-Choice"):
         ui.row().classes("my-4")
@@ -211,5 +237,8 @@ async def mode_multi_page(client: Client) -> None:
                 state.choices[2], selectable=True, on_selection_change=on_user_choice
             ).bind_text_from(state, "choice_2")
 
-        state.chips = [chip0, chip1, chip2]
+        # Elements belong to this tab, the question state to the user's session
+        app.storage.client["chips"] = [chip0, chip1, chip2]
         add_multi_choice_command_bar()
+
+    refill_prefetch_queue(session)
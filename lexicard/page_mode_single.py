@@ -7,22 +7,24 @@ can listen to audio, and reveal the translation and details.
 import asyncio
 from typing import Optional
 
-from nicegui import Client, ui
+from nicegui import Client, app, ui
 
 from .front_commons import (
     auto_play,
-    daily_score,
     display_message,
     display_text,
     frame,
     get_command_bar,
-    get_deck,
-    get_learning_buckets,
+    get_tab_session,
     notify,
     notify_dev,
+    open_session,
+    preload_audio,
     report_typo,
 )
 from .models import Lexicard
+from .prefetch import PrefetchQueue
+from .sessions import Session
 
 
 class QuestionState:
@@ -49,15 +51,26 @@ class QuestionState:
         self.explain = card.explain
 
 
-# Global module-level state for the page
-question_state = QuestionState()
-answer_label: ui.label | None = None
-reveal_button: ui.button | None = None
+def get_question_state() -> QuestionState:
+    """Return the question state of the tab's session, shared by the user's tabs."""
+    session = get_tab_session()
+    return session.page_state("single", QuestionState) if session else QuestionState()
+
+
+def get_prefetch_queue(session: Session) -> PrefetchQueue:
+    """Return the queue of the next cards of the user's session."""
+    return session.page_state("single.prefetch", lambda: PrefetchQueue(session.buckets))
+
+
+def refill_prefetch_queue(session: Session) -> None:
+    """Select the next cards ahead of time and have the browser preload their audio."""
+    queue = get_prefetch_queue(session)
+    queue.fill()
+    preload_audio(queue.sounds())
 
 
 def add_practice_command_bar() -> None:
     """Add specialized practice buttons to the application footer."""
-    global reveal_button
     command_bar = get_command_bar()
     if not command_bar:
         return
@@ -74,7 +87,8 @@ def add_practice_command_bar() -> None:
             ui.button(icon="done", on_click=lambda: record_score(2)).classes("h-8 hover:shadow").tooltip(
                 "I know the answer"
             )
-            reveal_button = (
+            # Elements belong to this tab, the question state to the user's session
+            app.storage.client["reveal_button"] = (
                 ui.button(icon="loop", on_click=reveal_answer)
                 .classes("h-8 hover:shadow")
                 .tooltip("Reveal translation")
@@ -83,9 +97,9 @@ def add_practice_command_bar() -> None:
             ui.button(icon="close", on_click=lambda: record_score(-1)).classes("h-8 hover:shadow").tooltip(
                 "I don't know it"
             )
-            ui.button(icon="bug_report", on_click=lambda: report_typo(question_state.current_card)).classes(
-                "h-8 hover:shadow"
-            ).tooltip("Report a typo")
+            ui.button(
+                icon="bug_report", on_click=lambda: report_typo(get_question_state().current_card)
+            ).classes("h-8 hover:shadow").tooltip("Report a typo")
 
         ui.space()
 
@@ -97,7 +111,8 @@ def add_practice_command_bar() -> None:
 
 def reveal_answer() -> None:
     """Display the card's explanation and disable the reveal button."""
-    global answer_label, reveal_button
+    answer_label = app.storage.client.get("answer_label")
+    reveal_button = app.storage.client.get("reveal_button")
     if answer_label:
         answer_label.visible = True
     if reveal_button:
@@ -105,28 +120,30 @@ def reveal_answer() -> None:
 
 
 def pick_next_card() -> Lexicard | None:
-    """Select a new card from the learning buckets and reset the UI.
+    """Show the next card, prefetched from the learning buckets, and reset the UI.
 
     Returns:
             The new Lexicard or None if buckets are empty.
     """
-    global reveal_button, answer_label
-    buckets = get_learning_buckets()
-    if not buckets:
+    session = get_tab_session()
+    if not session:
         return None
 
-    next_card = buckets.pick_card()
+    next_card = get_prefetch_queue(session).pop()
     if next_card:
-        question_state.set_card(next_card)
+        session.page_state("single", QuestionState).set_card(next_card)
+        answer_label = app.storage.client.get("answer_label")
+        reveal_button = app.storage.client.get("reveal_button")
         if reveal_button:
             reveal_button.enable()
         if answer_label:
             answer_label.visible = False
 
-        # Proactively play sound if available
+        # Proactively play sound if available; it was preloaded with the queue
         if next_card.sound != "0":
             auto_play(next_card.sound)
 
+    refill_prefetch_queue(session)
     return next_card
 
 
@@ -136,18 +153,23 @@ def record_score(points_type: int) -> None:
     Args:
             points_type: 2 for mastery, -1 for failure, 0 for skip.
     """
-    global reveal_button, answer_label
-    buckets = get_learning_buckets()
-    if not buckets or not question_state.current_card:
+    session = get_tab_session()
+    if not session:
+        return
+    question_state = session.page_state("single", QuestionState)
+    if not question_state.current_card:
         return
+    buckets = session.buckets
+    answer_label = app.storage.client.get("answer_label")
+    reveal_button = app.storage.client.get("reveal_button")
 
     if points_type == 2:  # Success
         is_mastered = reveal_button.enabled if reveal_button else False
         if is_mastered:
-            daily_score.tally += 2
+            session.add_score(2)
             buckets.promote(question_state.current_card, high_priority=True)
         else:
-            daily_score.tally += 1
+            session.add_score(1)
             buckets.promote(question_state.current_card)
         pick_next_card()
 
@@ -162,26 +184,26 @@ def record_score(points_type: int) -> None:
     elif points_type == 0:  # Skip
         pick_next_card()
 
-    notify_dev(f"Score updated to {daily_score.tally}")
+    notify_dev(f"Score updated to {session.score.tally}")
 
 
 @ui.page("/page_mode_single")
 async def mode_single_page(client: Client) -> None:
     """Render the single-card practice interface."""
-    global answer_label
     await client.connected()
 
-    deck = get_deck()
-    if not deck:
+    # The handlers use this session, pinned until the tab is closed
+    session = await open_session()
+    if not session:
         display_message("Redirecting to deck selection...")
         await asyncio.sleep(2)
         ui.navigate.to("/page_deck")
         return
 
     # Load initial card
-    buckets = get_learning_buckets()
-    if buckets:
-        initial_card = buckets.get_current_card()
+    question_state = session.page_state("single", QuestionState)
+    if not question_state.current_card:
+        initial_card = get_prefetch_queue(session).pop()
         if initial_card:
             question_state.set_card(initial_card)
 
@@ -208,3 +230,6 @@ async def mode_single_page(client: Client) -> None:
         answer_label = ui.label(question_state.explain).classes("text-h4 text-primary centered-wrapped-text")
         answer_label.bind_text_from(question_state, "explain")
         answer_label.visible = False
+        app.storage.client["answer_label"] = answer_label
+
+    refill_prefetch_queue(session)
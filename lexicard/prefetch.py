@@ -0,0 +1,106 @@
+"""Prefetching of practice questions for the Lexicard application.
+
+This module provides the PrefetchQueue class which keeps the next questions of a
+practice session selected ahead of time, so that answering a card only pops the next
+question, whose audio the browser has already loaded.
+"""
+
+from collections import deque
+from typing import TYPE_CHECKING, Optional, Union
+
+from .probbucket import ProbBucket
+from .scheduler import DueScheduler
+
+if TYPE_CHECKING:
+    from .models import Lexicard
+
+# A single card, or a multi-choice (question, incorrect 1, incorrect 2) triple
+Question = Union["Lexicard", tuple[Optional["Lexicard"], Optional["Lexicard"], Optional["Lexicard"]]]
+
+
+def question_card(question: Question) -> "Lexicard":
+    """Return the card asked by a question."""
+    return question[0] if isinstance(question, tuple) else question
+
+
+class PrefetchQueue:
+    """The next questions of a session, selected ahead of time.
+
+    Questions are drawn from a ProbBucket in batches with pick_n_cards, so no card is
+    queued twice, as single cards or, with multi, with their distractors. Drawing
+    journals nothing: pop records the pick of the question it hands out, so a progress
+    log only holds the cards actually shown. A queued question stays valid while the
+    bucket's weights are those it was drawn with and its card is still in the bucket it
+    was drawn from: a promote or demote that changes the weights drops the whole queue,
+    one that moves a queued card drops that question. The next card of a
+    DueScheduler depends on every review, so it is never prefetched.
+    """
+
+    def __init__(self, buckets: ProbBucket | DueScheduler, size: int = 3, multi: bool = False) -> None:
+        """Initialize an empty queue.
+
+        Args:
+                buckets: The session's card selection engine.
+                size: Number of questions kept ahead.
+                multi: Draw multi-choice triples instead of single cards.
+        """
+        self.buckets = buckets
+        self.size = size if isinstance(buckets, ProbBucket) else 0
+        self.multi = multi
+        self._queue: deque[tuple[Question, int | None]] = deque()  # (question, bucket drawn from)
+        self._weights: tuple[int, ...] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of questions queued, valid or not."""
+        return len(self._queue)
+
+    def _draw(self) -> Question | None:
+        """Select one question now, journaling its pick."""
+        if self.multi:
+            question = self.buckets.pick_3_cards()
+            return question if question[0] else None
+        return self.buckets.pick_card()
+
+    def _question(self, card: "Lexicard") -> Question:
+        """Build the question asking a card drawn ahead of time."""
+        if self.multi:
+            return (card, *self.buckets.pick_distractors(card))
+        return card
+
+    def _validate(self) -> None:
+        """Drop the whole queue if the weights changed since it was filled."""
+        if isinstance(self.buckets, ProbBucket):
+            weights = self.buckets.weights()
+            if weights != self._weights:
+                self._queue.clear()
+                self._weights = weights
+
+    def pop(self) -> Question | None:
+        """Return the next question: the first valid queued one, else one selected now."""
+        self._validate()
+        while self._queue:
+            question, bucket = self._queue.popleft()
+            card = question_card(question)
+            if self.buckets.bucket_of(card) == bucket:
+                self.buckets.record_pick(card)
+                return question
+        return self._draw()
+
+    def fill(self) -> None:
+        """Select questions until size of them are queued; call it after answering, off the critical path."""
+        self._validate()
+        missing = self.size - len(self._queue)
+        if missing <= 0:
+            return
+        queued = [question_card(question) for question, _ in self._queue]
+        for card in self.buckets.pick_n_cards(missing, exclude=queued):
+            self._queue.append((self._question(card), self.buckets.bucket_of(card)))
+
+    def clear(self) -> None:
+        """Drop every queued question, e.g. after the deck changed."""
+        self._queue.clear()
+
+    def sounds(self) -> list[str]:
+        """Return the audio files of the queued questions, to preload them."""
+        sounds = (question_card(question).sound for question, _ in self._queue)
+        return [sound for sound in sounds if sound != "0"]
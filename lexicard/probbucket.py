@@ -4,37 +4,352 @@ This module provides the ProbBucket class which tracks words in different stages
 and selects them based on weighted probabilities.
 """
 
+import heapq
+import logging
 import random
-from typing import TYPE_CHECKING, Optional
+import threading
+import time
+from array import array
+from collections.abc import Callable, Iterable
+from typing import TYPE_CHECKING, Any, Optional, Protocol
+
+from .distractors import DistractorIndex
+from .metrics import Metrics
 
 if TYPE_CHECKING:
+    from .deck_diff import DeckDiff
     from .models import Deck, Lexicard
 
 
+logger = logging.getLogger(__name__)
+
+# Bucket codes, in the same order as the probability weights used by pick_card
+KNOWN, REVIEW, LEARN = 0, 1, 2
+BUCKET_NAMES = ("known", "review", "learn")
+ABSENT = 0xFF  # code of pool cards that are in none of the buckets
+
+
+class Journal(Protocol):
+    """Receiver of the events of a ProbBucket, e.g. a ProgressLog."""
+
+    def append(self, event: dict[str, Any]) -> None:
+        """Record one event."""
+
+
+class CardPool:
+    """A read-only table of cards, shared by the engines of all the learners of a deck version.
+
+    Cards are addressed by position. Positions never change, cards can only be appended,
+    so buckets built on the same pool can refer to cards by position safely. The pool
+    also holds the distractor index of its cards, built once for all its buckets.
+    """
+
+    def __init__(self, cards_list: Iterable["Lexicard"] = ()) -> None:
+        """Initialize the pool with an optional list of cards.
+
+        Args:
+                cards_list: Cards to put in the pool, in order.
+        """
+        self._cards: list[Lexicard] = []
+        self._positions: dict[int, int] = {}  # tid -> position
+        self._distractors: DistractorIndex | None = None
+        self._distractors_lock = threading.Lock()
+        self.extend(cards_list)
+
+    def __len__(self) -> int:
+        """Return the number of cards in the pool."""
+        return len(self._cards)
+
+    def card(self, position: int) -> "Lexicard":
+        """Return the card at a given position."""
+        return self._cards[position]
+
+    def position(self, tid: int) -> int | None:
+        """Return the position of the card with a given tid, or None if it is not pooled."""
+        return self._positions.get(tid)
+
+    @property
+    def distractors(self) -> DistractorIndex:
+        """The distractor index of the pooled cards, built on first use, see build_distractors."""
+        if self._distractors is not None:
+            return self._distractors
+        return self.build_distractors()
+
+    def build_distractors(self) -> DistractorIndex:
+        """Build the distractor index unless it is built already, e.g. in a worker thread.
+
+        It takes seconds for a large deck. Concurrent calls wait for a single build.
+
+        Returns:
+                The distractor index of the pooled cards.
+        """
+        with self._distractors_lock:
+            if self._distractors is None:
+                self._distractors = DistractorIndex(self._cards)
+            return self._distractors
+
+    def add(self, card: "Lexicard") -> int:
+        """Append a card unless a card with the same tid is pooled already.
+
+        Args:
+                card: The card to add.
+
+        Returns:
+                The position of the card in the pool.
+        """
+        position = self._positions.get(card.tid)
+        if position is None:
+            position = len(self._cards)
+            self._positions[card.tid] = position
+            self._cards.append(card)
+            self._distractors = None
+        return position
+
+    def extend(self, cards_list: Iterable["Lexicard"]) -> None:
+        """Append all the cards that are not pooled yet."""
+        for card in cards_list:
+            self.add(card)
+
+    def update(self, card: "Lexicard") -> int:
+        """Replace the pooled card having the same tid, or append the card if none is pooled.
+
+        Every bucket built on the pool sees the new card at the same position.
+
+        Returns:
+                The position of the card in the pool.
+        """
+        position = self._positions.get(card.tid)
+        if position is None:
+            return self.add(card)
+        self._cards[position] = card
+        self._distractors = None
+        return position
+
+
+def evict_random(bucket: "ProbBucket", k: int) -> list[int]:
+    """Eviction policy: k known cards drawn uniformly."""
+    return bucket.rng.sample(bucket._known, k)
+
+
+def evict_least_recent(bucket: "ProbBucket", k: int) -> list[int]:
+    """Eviction policy: the k known cards reviewed least recently."""
+    return heapq.nsmallest(k, bucket._known, key=bucket._last_seen.__getitem__)
+
+
+def evict_longest_known(bucket: "ProbBucket", k: int) -> list[int]:
+    """Eviction policy: the k cards that have been known for the longest time."""
+    return heapq.nsmallest(k, bucket._known, key=bucket._known_since.__getitem__)
+
+
+# An eviction policy returns the pool positions of k distinct cards of the 'known' bucket
+EvictionPolicy = Callable[["ProbBucket", int], list[int]]
+EVICTION_POLICIES: dict[str, EvictionPolicy] = {
+    "random": evict_random,
+    "least_recent": evict_least_recent,
+    "longest_known": evict_longest_known,
+}
+
+
 class ProbBucket:
     """A weighted probability system for selecting flashcards.
 
     Cards are organized into three buckets: known, review, and learn.
     Selection is weighted to favor cards that are still being learned or need review.
+
+    Cards themselves live in a CardPool that can be shared by many buckets. A bucket
+    only stores pool positions: one ``array('I')`` per bucket with swap-remove storage,
+    plus a ``bytearray`` of bucket codes and an ``array('I')`` of slots indexed by
+    position. Two more ``array('I')`` keep the last review time and the time each card
+    became known, in seconds, for the eviction policies. That is 17 bytes per card per
+    learner, and membership checks and moves between buckets are O(1).
     """
 
-    LIMIT = 3000  # memory is limited, older known words might be removed to make space
+    LIMIT = 200_000  # memory is limited, older known words might be removed to make space
 
-    def __init__(self, cards_list: list["Lexicard"] | None = None) -> None:
+    def __init__(
+        self,
+        cards_list: list["Lexicard"] | None = None,
+        pool: CardPool | None = None,
+        metrics: Metrics | None = None,
+        clock: Callable[[], float] = time.time,
+        rng: random.Random | None = None,
+    ) -> None:
         """Initialize the probability bucket with an optional list of cards.
 
         Args:
                 cards_list: Initial cards to put into the 'learn' bucket.
+                pool: Shared card pool; a private pool is created if omitted.
+                metrics: Instrumentation sink; no instrumentation if omitted.
+                clock: Function returning the current time in seconds.
+                rng: Random generator owned by this bucket; a new, randomly seeded one if omitted.
+                        Pass ``random.Random(seed)`` for reproducible runs.
         """
-        self._known: list[Lexicard] = []
-        self._review: list[Lexicard] = []
+        self.metrics = metrics
+        self._clock = clock
+        self.rng = rng if rng is not None else random.Random()
+        self._pool = pool if pool is not None else CardPool(cards_list or ())
+        self._known = array("I")
+        self._review = array("I")
+        self._learn = array("I")
+        self._buckets: tuple[array, array, array] = (self._known, self._review, self._learn)
+        self._codes = bytearray()  # pool position -> bucket code
+        self._slots = array("I")  # pool position -> slot in its bucket
+        self._last_seen = array("I")  # pool position -> time of the last review
+        self._known_since = array("I")  # pool position -> time the card entered 'known'
         if cards_list:
-            self._learn: list[Lexicard] = cards_list.copy()
-        else:
-            self._learn: list[Lexicard] = []
+            self._extend(LEARN, cards_list)
 
-        self.print_sizes()
+        self._record_sizes()
         self._current_card: Lexicard | None = None
+        self.journal: Journal | None = None  # receives pick/promote/demote events when set
+
+    def __contains__(self, card: "Lexicard") -> bool:
+        """Check whether a card is held in any bucket, in O(1).
+
+        Args:
+                card: The card to look up.
+
+        Returns:
+                True if a card with the same tid is in one of the buckets.
+        """
+        return self._position(card.tid) is not None
+
+    @property
+    def pool(self) -> CardPool:
+        """The card pool the bucket positions refer to."""
+        return self._pool
+
+    def sizes(self) -> tuple[int, int, int]:
+        """Return the number of cards in the (known, review, learn) buckets."""
+        return len(self._known), len(self._review), len(self._learn)
+
+    def nbytes(self) -> int:
+        """Return the memory used by the per-learner arrays, not counting the shared pool."""
+        arrays = (self._slots, self._last_seen, self._known_since, *self._buckets)
+        return len(self._codes) + sum(a.itemsize * len(a) for a in arrays)
+
+    def bucket_of(self, card: "Lexicard") -> int | None:
+        """Return the bucket code (KNOWN, REVIEW or LEARN) currently holding a card.
+
+        Args:
+                card: The card to look up.
+
+        Returns:
+                The bucket code, or None if the card is not in any bucket.
+        """
+        position = self._position(card.tid)
+        return None if position is None else self._codes[position]
+
+    def cards_in(self, bucket: int) -> list["Lexicard"]:
+        """Return the cards of a bucket (KNOWN, REVIEW or LEARN), in storage order."""
+        return [self._pool.card(position) for position in self._buckets[bucket]]
+
+    def get_state(self) -> dict[str, list[Any]]:
+        """Return the tids of the known and review cards; all other cards are in 'learn'.
+
+        The times the eviction policies rank by are included as [tid, time] pairs, for
+        the cards that have one: "last_seen" and "known_since".
+        """
+        card = self._pool.card
+        return {
+            "known": [card(position).tid for position in self._known],
+            "review": [card(position).tid for position in self._review],
+            "last_seen": [
+                [card(p).tid, t] for p, t in enumerate(self._last_seen) if t and self._codes[p] != ABSENT
+            ],
+            "known_since": [[card(p).tid, self._known_since[p]] for p in self._known if self._known_since[p]],
+        }
+
+    def restore_state(self, state: dict[str, list[Any]]) -> None:
+        """Move the cards listed in a get_state() result back to their bucket, with their times.
+
+        Tids of cards that are not in any bucket are ignored.
+
+        Args:
+                state: A mapping with "known" and "review" lists of tids, and optionally
+                        "last_seen" and "known_since" lists of [tid, time] pairs.
+        """
+        for bucket, key in ((KNOWN, "known"), (REVIEW, "review")):
+            for tid in state.get(key, ()):
+                position = self._position(tid)
+                if position is not None:
+                    self._move(position, bucket)
+        for times, key in ((self._last_seen, "last_seen"), (self._known_since, "known_since")):
+            for tid, t in state.get(key, ()):
+                position = self._position(tid)
+                if position is not None:
+                    times[position] = t
+
+    def replay_event(self, event: dict[str, Any]) -> None:
+        """Apply a promote or demote event recorded by a journal, at its time; other events are ignored.
+
+        Events without a "ts", recorded by older versions, are applied at the current time.
+        """
+        position = self._position(event["tid"])
+        if position is None:
+            return
+        card = self._pool.card(position)
+        now = event.get("ts", int(self._clock()))
+        if event["op"] == "promote":
+            self._promote(card, event.get("high_priority", False), now)
+        elif event["op"] == "demote":
+            self._demote(card, now)
+
+    def _emit(self, op: str, card: "Lexicard", **details: Any) -> None:
+        """Send an event to the journal, if any."""
+        if self.journal is not None:
+            self.journal.append({"op": op, "tid": card.tid, **details})
+
+    def _position(self, tid: int) -> int | None:
+        """Return the pool position of a card held in a bucket, or None."""
+        position = self._pool.position(tid)
+        if position is None or position >= len(self._codes) or self._codes[position] == ABSENT:
+            return None
+        return position
+
+    def _insert(self, bucket: int, position: int) -> None:
+        """Append a pool position to a bucket and record its code and slot."""
+        missing = position + 1 - len(self._codes)
+        if missing > 0:
+            self._codes.extend(bytes([ABSENT]) * missing)
+            for per_position in (self._slots, self._last_seen, self._known_since):
+                per_position.frombytes(bytes(per_position.itemsize * missing))
+        storage = self._buckets[bucket]
+        self._codes[position] = bucket
+        self._slots[position] = len(storage)
+        storage.append(position)
+
+    def _extend(self, bucket: int, cards: list["Lexicard"]) -> None:
+        """Append the cards not already held to a bucket, pooling them if needed."""
+        for card in cards:
+            if self._position(card.tid) is None:
+                self._insert(bucket, self._pool.add(card))
+
+    def _remove(self, position: int) -> int:
+        """Swap-remove a pool position from its bucket in O(1).
+
+        The last card of the bucket takes the freed slot, so bucket order is not preserved.
+
+        Args:
+                position: Pool position of a card held in a bucket.
+
+        Returns:
+                The code of the bucket the card was removed from.
+        """
+        bucket = self._codes[position]
+        slot = self._slots[position]
+        storage = self._buckets[bucket]
+        last = storage.pop()
+        if slot < len(storage):
+            storage[slot] = last
+            self._slots[last] = slot
+        self._codes[position] = ABSENT
+        return bucket
+
+    def _move(self, position: int, bucket: int) -> None:
+        """Move a card held in a bucket to another bucket in O(1)."""
+        self._remove(position)
+        self._insert(bucket, position)
 
     def get_current_card(self) -> Optional["Lexicard"]:
         """Retrieve the current card or pick a new one if none exists.
@@ -50,6 +365,14 @@ class ProbBucket:
         """Print the current count of cards in each bucket to the console."""
         print(f"known {len(self._known)} ——— review {len(self._review)} ——— learn {len(self._learn)}")
 
+    def _record_sizes(self) -> None:
+        """Record the bucket sizes in the metrics and the debug log, if enabled."""
+        if self.metrics is not None:
+            for name, storage in zip(BUCKET_NAMES, self._buckets, strict=True):
+                self.metrics.observe(f"size.{name}", len(storage))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("known %d, review %d, learn %d", *self.sizes())
+
     def add_cards(self, cards_list: list["Lexicard"]) -> "ProbBucket":
         """Add new cards to the 'learn' bucket.
 
@@ -59,23 +382,15 @@ class ProbBucket:
         Returns:
                 The current ProbBucket instance.
         """
-        self._learn.extend(cards_list)
-        self.print_sizes()
+        self._extend(LEARN, cards_list)
+        self._record_sizes()
         return self
 
-    def pick_card(self, exclude: list["Lexicard"] | None = None) -> Optional["Lexicard"]:
-        """Pick a single card based on the current learning state probabilities.
-
-        Args:
-                exclude: Optional list of cards to ignore during selection.
-
-        Returns:
-                A randomly selected Lexicard or None if empty.
-        """
+    def _probs(self) -> list[int] | None:
+        """Return the selection weights for [known, review, learn], or None if all buckets are empty."""
         if not self._learn:
             if not self._review:
                 if not self._known:
-                    print("ERROR no cards")
                     return None
                 else:
                     probs = [100, 0, 0]
@@ -95,11 +410,117 @@ class ProbBucket:
                     probs = [0, 30, 70]
                 else:
                     probs = [10, 20, 70]
-        print(probs)
-        return self._pick(probs, exclude)
+        return probs
+
+    def weights(self) -> tuple[int, ...] | None:
+        """Return the selection weights for (known, review, learn), or None if all buckets are empty.
+
+        They only change when a bucket becomes empty or stops being empty, so picks made
+        ahead of time (see PrefetchQueue) stay valid across most promotes and demotes.
+        """
+        probs = self._probs()
+        return None if probs is None else tuple(probs)
+
+    def pick_card(self, exclude: list["Lexicard"] | None = None) -> Optional["Lexicard"]:
+        """Pick a single card based on the current learning state probabilities.
+
+        Args:
+                exclude: Optional list of cards to ignore during selection.
+
+        Returns:
+                A randomly selected Lexicard or None if empty.
+        """
+        probs = self._probs()
+        if probs is None:
+            logger.warning("no cards to pick from")
+            return None
+        logger.debug("probabilities %s", probs)
+        picked = self._pick(probs, exclude)
+        if picked:
+            self._emit("pick", picked)
+        return picked
+
+    def pick_n_cards(
+        self, n: int, distinct: bool = True, exclude: list["Lexicard"] | None = None
+    ) -> list["Lexicard"]:
+        """Pick n cards in one pass, based on the current learning state probabilities.
+
+        The probability table and the exclusions are set up once for the whole batch.
+        With ``distinct``, each picked card is swapped out of the eligible range before
+        the next draw, i.e. the cards are drawn without replacement. The cards are not
+        shown yet: neither the current card nor the journal change, see record_pick.
+
+        Args:
+                n: Number of cards to pick.
+                distinct: If True, no card is returned twice.
+                exclude: Optional list of cards to ignore during selection.
+
+        Returns:
+                The picked cards; fewer than n if not enough cards are available.
+        """
+        probs = self._probs()
+        if probs is None:
+            logger.warning("no cards to pick from")
+            return []
+        logger.debug("probabilities %s", probs)
+        excluded = self._exclude_to_tail({c.tid for c in exclude if c}) if exclude else [0, 0, 0]
+        picked: list[Lexicard] = []
+        for _ in range(n):
+            position = self._draw(probs, excluded)
+            if position is None:
+                break
+            picked.append(self._pool.card(position))
+            if distinct:
+                self._exclude_position(position, excluded)
+        return picked
+
+    def record_pick(self, card: "Lexicard") -> None:
+        """Make a card picked ahead of time, e.g. by pick_n_cards, the current card and journal its pick.
+
+        Args:
+                card: The card being shown.
+        """
+        self._current_card = card
+        self._emit("pick", card)
+
+    def _exclude_to_tail(self, exclude_ids: Iterable[int], excluded: list[int] | None = None) -> list[int]:
+        """Swap excluded cards to the tail of their bucket.
+
+        Afterwards the first ``len(bucket) - excluded[bucket]`` slots of each bucket hold
+        only eligible cards. Bucket order carries no meaning, so the swaps are kept.
+
+        Args:
+                exclude_ids: Distinct tids of the cards to move out of the eligible range.
+                excluded: Per-bucket counts from a previous call, to extend an existing exclusion.
+
+        Returns:
+                The number of excluded cards per bucket, as [known, review, learn].
+        """
+        if excluded is None:
+            excluded = [0, 0, 0]
+        for tid in exclude_ids:
+            position = self._position(tid)
+            if position is not None:
+                self._exclude_position(position, excluded)
+        return excluded
+
+    def _exclude_position(self, position: int, excluded: list[int]) -> None:
+        """Swap one card held in a bucket to the tail of the bucket's eligible range."""
+        bucket = self._codes[position]
+        slot = self._slots[position]
+        storage = self._buckets[bucket]
+        tail = len(storage) - 1 - excluded[bucket]
+        if slot != tail:
+            other = storage[tail]
+            storage[slot], storage[tail] = other, position
+            self._slots[other] = slot
+            self._slots[position] = tail
+        excluded[bucket] += 1
+        if self.metrics is not None:
+            self.metrics.incr("exclusions")
 
     def _pick(self, probs: list[int], exclude: list["Lexicard"] | None = None) -> Optional["Lexicard"]:
-        """Internal method for weighted selection with safety retries and fallbacks.
+        """Internal method for exact weighted selection with exclusions.
 
         Args:
                 probs: A list of 3 integers representing weights for [known, review, learn].
@@ -108,72 +529,176 @@ class ProbBucket:
         Returns:
                 A selected Lexicard or None.
         """
-        exclude_ids = {c.tid for c in exclude} if exclude else set()
-
-        # Try random weighted selection first (max 50 retries for efficiency)
-        for _ in range(50):
-            chosen_collection = random.choices([self._known, self._review, self._learn], weights=probs, k=1)[
-                0
-            ]
-            if not chosen_collection:
-                continue
-
-            picked = random.choice(chosen_collection)
-            if picked.tid not in exclude_ids:
-                print(picked)
-                self._current_card = picked
-                return picked
-
-        # Fallback: if random picking fails (e.g., small buckets), look at all available cards
-        all_possible = self._known + self._review + self._learn
-        # Use a dict for de-duplication by tid to simulate set behavior
-        unique_cards = {c.tid: c for c in all_possible}.values()
-        available = [c for c in unique_cards if c.tid not in exclude_ids]
-
-        if not available:
-            print("ERROR: Not enough unique cards available to pick with current exclusion list.")
+        excluded = self._exclude_to_tail({c.tid for c in exclude if c}) if exclude else [0, 0, 0]
+        position = self._draw(probs, excluded)
+        if position is None:
+            logger.warning("not enough cards available to pick with the current exclusion list")
+            if self.metrics is not None:
+                self.metrics.incr("exclusion_failures")
             return None
-
-        picked = random.choice(available)
-        print(f"Fallback selection used: {picked}")
+        picked = self._pool.card(position)
+        logger.debug("picked card %d", picked.tid)
         self._current_card = picked
         return picked
 
+    def _draw(self, probs: list[int], excluded: list[int]) -> int | None:
+        """Draw one card from the eligible slots left by _exclude_to_tail.
+
+        A bucket is drawn with weight ``probs[b] * eligible[b] / len(bucket)``, which is the
+        distribution the plain weighted draw has once excluded cards are rejected, then a
+        card is drawn uniformly from that bucket's eligible slots. No retries are needed.
+
+        Args:
+                probs: A list of 3 integers representing weights for [known, review, learn].
+                excluded: Number of excluded cards at the tail of each bucket.
+
+        Returns:
+                The pool position of the drawn card, or None if no card is eligible.
+        """
+        eligible = [len(storage) - n for storage, n in zip(self._buckets, excluded, strict=True)]
+        weights = [
+            prob * count / len(storage) if count else 0
+            for prob, count, storage in zip(probs, eligible, self._buckets, strict=True)
+        ]
+        if not any(weights):
+            # Every weighted bucket is empty or excluded: draw uniformly from what remains
+            weights = eligible
+            if not any(weights):
+                return None
+            if self.metrics is not None:
+                self.metrics.incr("fallbacks")
+
+        bucket = self.rng.choices((KNOWN, REVIEW, LEARN), weights=weights, k=1)[0]
+        if self.metrics is not None:
+            self.metrics.incr(f"picks.{BUCKET_NAMES[bucket]}")
+        return self._buckets[bucket][self.rng.randrange(eligible[bucket])]
+
     def pick_3_cards(self) -> tuple[Optional["Lexicard"], Optional["Lexicard"], Optional["Lexicard"]]:
         """Pick one question card and two incorrect answer cards.
 
+        The incorrect answers come from the pool's distractor index: cards easily confused
+        with the question, whose explanations differ from it and from each other.
+
         Returns:
                 A tuple of (question_card, incorrect_1, incorrect_2).
         """
-        q = self.pick_card()
-        a1 = self.pick_card([q]) if q else None
-        a2 = self.pick_card([q, a1]) if q and a1 else None
-        return q, a1, a2
+        picked = self.pick_n_cards(1)
+        if not picked:
+            return None, None, None
+        q = picked[0]
+        self.record_pick(q)
+        return (q, *self.pick_distractors(q))
+
+    def pick_distractors(self, card: "Lexicard") -> tuple[Optional["Lexicard"], Optional["Lexicard"]]:
+        """Pick two incorrect answer cards for a question card, see pick_3_cards.
+
+        Args:
+                card: The question card.
+
+        Returns:
+                A tuple of (incorrect_1, incorrect_2), None where the deck has too few candidates.
+        """
+        a1, a2 = [*self._pool.distractors.pick(card, 2, self.rng), None, None][:2]
+        return a1, a2
 
     def _forget(self) -> None:
         """Internal method to remove a 'known' card when the memory limit is reached."""
         if len(self._known) == 0:
-            print("ERROR: memory full, cannot add new word(s)")
+            logger.error("memory full, cannot add new word(s)")
             return
-        to_forget = self._pick([100, 0, 0])  # select from words that have been mastered
-        if to_forget:
-            self._known.remove(to_forget)
+        self.evict(1)
+
+    def evict(self, k: int, policy: str | EvictionPolicy = "random") -> int:
+        """Remove up to k cards from the 'known' bucket in one pass.
+
+        Args:
+                k: Number of cards to remove.
+                policy: Name of a policy in EVICTION_POLICIES, or a policy function.
+
+        Returns:
+                The number of cards removed.
+        """
+        k = min(k, len(self._known))
+        if k <= 0:
+            return 0
+        choose = EVICTION_POLICIES[policy] if isinstance(policy, str) else policy
+        victims = choose(self, k)
+        if len(victims) * 8 < len(self._known):
+            for position in victims:
+                self._remove(position)
+        else:
+            # Many victims: drop them all and re-slot the survivors in a single pass
+            for position in victims:
+                self._codes[position] = ABSENT
+            self._known[:] = array("I", [p for p in self._known if self._codes[p] == KNOWN])
+            for slot, position in enumerate(self._known):
+                self._slots[position] = slot
+        if self.metrics is not None:
+            self.metrics.incr("evictions", len(victims))
+        return len(victims)
+
+    def apply_diff(self, diff: "DeckDiff", pool: CardPool | None = None) -> None:
+        """Apply a new version of the deck while keeping the learning state of its cards.
+
+        The bucket moves to a pool of the new version, so the old pool, which buckets on
+        the old version may share, is left as it is. Changed cards stay in their bucket,
+        added cards go to 'learn', and removed cards leave their bucket and, being out of
+        the pool, the distractors.
+
+        Args:
+                diff: Differences between the deck's cards held here and the new version.
+                pool: Pool of the new version's cards, e.g. shared by its sessions; a private
+                        pool of the cards held after the diff if omitted.
+        """
+        removed = {card.tid for card in diff.removed}
+        changed = {card.tid: card for _, card in diff.changed}
+        held: list[tuple[int, Lexicard, int]] = []  # (bucket, card, old position)
+        for bucket, storage in enumerate(self._buckets):
+            for position in storage:
+                card = self._pool.card(position)
+                if card.tid not in removed:
+                    held.append((bucket, changed.get(card.tid, card), position))
+        if pool is None:
+            pool = CardPool([*(card for _, card, _ in held), *diff.added])
+
+        last_seen, known_since = self._last_seen, self._known_since
+        self._pool = pool
+        for storage in self._buckets:
+            del storage[:]
+        self._codes = bytearray()
+        self._slots = array("I")
+        self._last_seen = array("I")
+        self._known_since = array("I")
+        for bucket, card, old_position in held:
+            position = pool.add(card)  # already pooled, unless the pool lacks a card of the diff
+            self._insert(bucket, position)
+            self._last_seen[position] = last_seen[old_position]
+            self._known_since[position] = known_since[old_position]
+        self._extend(LEARN, diff.added)
+
+        if self._current_card is not None:
+            position = self._position(self._current_card.tid)
+            self._current_card = None if position is None else self._pool.card(position)
+        self._record_sizes()
 
     def forget_known(self) -> None:
         """Clear the 'known' bucket completely."""
-        self._known = []
+        for position in self._known:
+            self._codes[position] = ABSENT
+        del self._known[:]
 
     def forget_all(self) -> None:
         """Clear all buckets (known, review, and learn)."""
-        self._known = []
-        self._review = []
-        self._learn = []
+        for storage in self._buckets:
+            del storage[:]
+        self._codes[:] = bytes([ABSENT]) * len(self._codes)
 
-    def x_add_cards(self, cards: list["Lexicard"]) -> None:
+    def x_add_cards(self, cards: list["Lexicard"], policy: str | EvictionPolicy = "random") -> None:
         """Add a large set of cards, potentially purging old 'known' cards if over limit.
 
         Args:
                 cards: List of Lexicard objects to add.
+                policy: Eviction policy choosing the 'known' cards to purge, see evict().
         """
         lk = len(self._known)
         lr = len(self._review)
@@ -181,14 +706,13 @@ class ProbBucket:
         ln = len(cards)
         if lk + lr + ll + ln >= self.LIMIT:  # need more space
             if ln > lk:
-                print("ERROR: too many new words")
+                logger.error("too many new words")
                 return
             if lk <= (lk + lr + ll + ln - self.LIMIT):
-                print("ERROR: too many new words")
+                logger.error("too many new words")
                 return
-            for _ in range(lk + lr + ll + ln - self.LIMIT):
-                self._forget()
-        self._learn.extend(cards)
+            self.evict(lk + lr + ll + ln - self.LIMIT, policy)
+        self._extend(LEARN, cards)
 
     def promote(self, card: "Lexicard", high_priority: bool = False) -> None:
         """Move a card to the next higher learning stage.
@@ -197,20 +721,24 @@ class ProbBucket:
                 card: The card to promote.
                 high_priority: If True, moves directly to 'known' from 'learn'.
         """
-        self.print_sizes()
-        if card in self._known:
+        self._promote(card, high_priority, int(self._clock()))
+
+    def _promote(self, card: "Lexicard", high_priority: bool, now: int) -> None:
+        """Promote a card as of a given time, see promote."""
+        position = self._position(card.tid)
+        bucket = None if position is None else self._codes[position]
+        if bucket == KNOWN:
             pass  # nothing to do, already at top
-        elif card in self._review:
-            self._review.remove(card)
-            self._known.append(card)
-        else:  # assume! card in _learn
-            if card in self._learn:
-                self._learn.remove(card)
-                if high_priority:
-                    self._known.append(card)
-                else:
-                    self._review.append(card)
-        self.print_sizes()
+        elif bucket == REVIEW:
+            self._move(position, KNOWN)
+        elif bucket == LEARN:
+            self._move(position, KNOWN if high_priority else REVIEW)
+        if position is not None:
+            self._last_seen[position] = now
+            if bucket != KNOWN and self._codes[position] == KNOWN:
+                self._known_since[position] = now
+        self._emit("promote", card, high_priority=high_priority, ts=now)
+        self._record_sizes()
 
     def demote(self, card: "Lexicard") -> None:
         """Move a card back to a lower learning stage.
@@ -218,16 +746,22 @@ class ProbBucket:
         Args:
                 card: The card to demote.
         """
-        self.print_sizes()
-        if card in self._known:
-            self._known.remove(card)
-            self._review.append(card)
-        elif card in self._review:
-            self._review.remove(card)
-            self._learn.append(card)
-        else:  # assume! card in _learn
+        self._demote(card, int(self._clock()))
+
+    def _demote(self, card: "Lexicard", now: int) -> None:
+        """Demote a card as of a given time, see demote."""
+        position = self._position(card.tid)
+        bucket = None if position is None else self._codes[position]
+        if position is not None:
+            self._last_seen[position] = now
+        if bucket == KNOWN:
+            self._move(position, REVIEW)
+        elif bucket == REVIEW:
+            self._move(position, LEARN)
+        else:  # in _learn, or not in any bucket
             pass  # already at the bottom
-        self.print_sizes()
+        self._emit("demote", card, ts=now)
+        self._record_sizes()
 
 
 def test_picks(deck: "Deck") -> None:
@@ -0,0 +1,228 @@
+"""Persistence of learning progress for the Lexicard application.
+
+This module provides the ProgressLog class which records the review events of one user
+on one deck in an append-only JSONL log, and periodically compacts them into a snapshot
+of the bucket membership, so that a ProbBucket can be restored quickly after a restart.
+With a WriteBehind, events and automatic snapshots are written by its background thread,
+in batches, instead of on the click that caused them.
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .probbucket import ProbBucket
+    from .write_behind import WriteBehind
+
+# Default location of the progress files, next to the package
+PROGRESS_DIR = Path(__file__).parent.parent / "progress"
+
+
+# A pending write of a ProgressLog: (log, seq, JSONL line or snapshot state)
+ProgressWrite = tuple["ProgressLog", int, str | dict[str, Any]]
+
+
+def write_progress(batch: list[ProgressWrite]) -> None:
+    """Write a batch of pending progress writes, with one file write per log.
+
+    Only the last snapshot of each log is written, followed by the lines queued after
+    it: it holds everything queued before, so a writer that lags writes fewer snapshots.
+
+    Args:
+            batch: Writes queued by ProgressLog instances on a WriteBehind, in order.
+    """
+    lines: dict[ProgressLog, list[tuple[int, str]]] = {}
+    snapshots: dict[ProgressLog, dict[str, Any]] = {}
+    for log, seq, payload in batch:
+        if isinstance(payload, str):
+            lines.setdefault(log, []).append((seq, payload))
+        else:
+            snapshots[log] = payload
+            lines.pop(log, None)
+    for log, state in snapshots.items():
+        log._write_snapshot(state)
+    for log, log_lines in lines.items():
+        log._write_lines(log_lines)
+
+
+def _safe_name(name: str) -> str:
+    """Turn a user or deck name into a string usable in a file name."""
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+class ProgressLog:
+    """Append-only review log and snapshots for one user and one deck.
+
+    Every event gets a sequence number. A snapshot stores the known and review tids
+    together with the sequence number of the last event it includes, so restoring is
+    loading the snapshot and replaying only the events of the log tail that come after.
+
+    Without a writer, every event is written and flushed by append. With one, append
+    only queues the event line; so does an automatic snapshot, once its state is taken.
+    append runs on the event loop, so it never waits for a full writer: the event is
+    dropped and a snapshot, which holds it, is queued as soon as there is room again.
+    Lines and snapshots queued before a newer snapshot reached the disk are skipped.
+    """
+
+    SNAPSHOT_EVERY = 500  # events appended between two automatic snapshots
+
+    def __init__(
+        self,
+        user: str,
+        deck_name: str,
+        directory: str | Path = PROGRESS_DIR,
+        writer: "WriteBehind[ProgressWrite] | None" = None,
+    ) -> None:
+        """Initialize the log files location for a user and a deck.
+
+        Args:
+                user: Name of the learner.
+                deck_name: Name of the deck being learned.
+                directory: Folder holding the progress files.
+                writer: Optional write-behind buffer flushed with write_progress.
+        """
+        stem = f"{_safe_name(user)}--{_safe_name(deck_name)}"
+        self.directory = Path(directory)
+        self.log_path = self.directory / f"{stem}.log.jsonl"
+        self.snapshot_path = self.directory / f"{stem}.snapshot.json"
+        self.writer = writer
+        self._file: IO[str] | None = None
+        self._lock = threading.Lock()  # guards the files, written by the writer's thread too
+        self._seq = 0
+        self._snapshot_seq = 0  # seq of the snapshot on disk
+        self._since_snapshot = 0
+        self._bucket: ProbBucket | None = None
+        self.score = 0  # the learner's score, saved with the snapshots
+
+    def attach(self, bucket: "ProbBucket") -> "ProbBucket":
+        """Restore a bucket from disk, then record its future events in this log.
+
+        Args:
+                bucket: A bucket holding the deck's cards, all in the 'learn' bucket.
+
+        Returns:
+                The same bucket, restored.
+        """
+        self.restore(bucket)
+        bucket.journal = self
+        self._bucket = bucket
+        return bucket
+
+    def restore(self, bucket: "ProbBucket") -> None:
+        """Apply the snapshot and the newer log events to a bucket.
+
+        Args:
+                bucket: The bucket to restore; it must not have a journal attached yet.
+        """
+        if self.snapshot_path.exists():
+            snapshot = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            bucket.restore_state(snapshot)
+            self._seq = self._snapshot_seq = snapshot["seq"]
+            self.score = snapshot.get("score", 0)
+
+        if not self.log_path.exists():
+            return
+        with self.log_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn last line after a crash
+                if event["seq"] <= self._seq:
+                    continue
+                self._seq = event["seq"]
+                self._since_snapshot += 1
+                if event["op"] == "score":
+                    self.score = event["score"]
+                else:
+                    bucket.replay_event(event)
+
+    def append(self, event: dict[str, Any]) -> None:
+        """Append one event to the log, and snapshot if enough events have piled up.
+
+        Args:
+                event: The event emitted by the bucket, e.g. {"op": "promote", "tid": 12}.
+        """
+        self._seq += 1
+        line = json.dumps({"seq": self._seq, **event}) + "\n"
+        if self.writer is None:
+            self._write_lines([(self._seq, line)])
+        elif not self.writer.offer((self, self._seq, line)):
+            self._since_snapshot = self.SNAPSHOT_EVERY  # the next snapshot holds the dropped event
+        self._since_snapshot += 1
+        if self._bucket is not None and self._since_snapshot >= self.SNAPSHOT_EVERY:
+            if self.writer is None:
+                self.snapshot()
+            elif not self.writer.full() and self.writer.offer((self, self._seq, self._state(self._bucket))):
+                self._since_snapshot = 0
+
+    def record_score(self, score: int) -> None:
+        """Set the learner's score and append it to the log.
+
+        Args:
+                score: The new score.
+        """
+        self.score = score
+        self.append({"op": "score", "score": score})
+
+    def _state(self, bucket: "ProbBucket") -> dict[str, Any]:
+        """Return the snapshot state of a bucket, with the current seq and score."""
+        return {"seq": self._seq, "score": self.score, **bucket.get_state()}
+
+    def snapshot(self) -> None:
+        """Write a snapshot of the attached bucket and truncate the log, now."""
+        if self._bucket is None:
+            return
+        self._write_snapshot(self._state(self._bucket))
+        self._since_snapshot = 0
+
+    def _write_lines(self, lines: list[tuple[int, str]]) -> None:
+        """Append (seq, line) pairs to the log, except those a snapshot on disk already holds."""
+        with self._lock:
+            text = "".join(line for seq, line in lines if seq > self._snapshot_seq)
+            if not text:
+                return
+            if self._file is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._file = self.log_path.open("a", encoding="utf-8")
+            self._file.write(text)
+            self._file.flush()
+
+    def _write_snapshot(self, state: dict[str, Any]) -> None:
+        """Write a snapshot state and truncate the log, unless a newer snapshot is on disk."""
+        with self._lock:
+            if state["seq"] < self._snapshot_seq:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # One write: each system call hands the GIL over, and the writer's thread waits
+            # up to sys.getswitchinterval() to get it back from a busy event loop
+            text = json.dumps(state)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self._snapshot_seq = state["seq"]
+
+            # Events up to seq are in the snapshot; restarting the log is safe even if we crash here
+            if self._file is not None:
+                self._file.truncate(0)
+            else:
+                self._file = self.log_path.open("w", encoding="utf-8")
+
+    def close(self) -> None:
+        """Snapshot the attached bucket and close the log file.
+
+        Writes of this log still queued on the writer are older than the snapshot, so
+        they are skipped.
+        """
+        self.snapshot()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,115 @@
+"""Deterministic replay of practice sessions.
+
+This module replays a recorded sequence of answers against a fresh engine whose random
+generator and clock are fixed, so that the exact card sequence of a session can be
+reproduced, e.g. to compare the behaviour and speed of two versions of an engine.
+"""
+
+import random
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from .scheduler import ENGINES
+
+if TYPE_CHECKING:
+    from .models import Lexicard
+
+# Possible answers to a card, as given on the single practice page
+PROMOTE_HIGH = "promote_high"  # known without revealing the answer
+PROMOTE = "promote"  # known after revealing the answer
+DEMOTE = "demote"  # not known
+SKIP = "skip"  # next card without answering
+ANSWERS = (PROMOTE_HIGH, PROMOTE, DEMOTE, SKIP)
+
+
+class ReplayClock:
+    """A clock that only moves when told to, for reproducible timestamps."""
+
+    def __init__(self, start: float = 1_000_000_000.0, step: float = 10.0) -> None:
+        """Initialize the clock.
+
+        Args:
+                start: Initial time in seconds.
+                step: Seconds added by each tick().
+        """
+        self.now = start
+        self.step = step
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+    def tick(self) -> None:
+        """Advance the clock by one step."""
+        self.now += self.step
+
+
+def replay(
+    cards: list["Lexicard"],
+    answers: Iterable[str],
+    seed: int = 0,
+    engine: str = "probbucket",
+    step: float = 10.0,
+) -> list[int]:
+    """Replay answers against a new engine and return the tids of the cards shown.
+
+    The same cards, answers, seed, engine and step always give the same sequence.
+
+    Args:
+            cards: The deck's cards, in deck order.
+            answers: One answer per card shown, each one of ANSWERS.
+            seed: Seed of the engine's random generator.
+            engine: Name of the engine in scheduler.ENGINES.
+            step: Seconds of the replay clock between two answers.
+
+    Returns:
+            The tids of the picked cards, one per answer (fewer if the engine runs out of cards).
+    """
+    clock = ReplayClock(step=step)
+    scheduler = ENGINES[engine](cards, clock=clock, rng=random.Random(seed))
+    shown: list[int] = []
+    for answer in answers:
+        card = scheduler.pick_card()
+        if card is None:
+            break
+        shown.append(card.tid)
+        if answer == PROMOTE_HIGH:
+            scheduler.promote(card, high_priority=True)
+        elif answer == PROMOTE:
+            scheduler.promote(card)
+        elif answer == DEMOTE:
+            scheduler.demote(card)
+        elif answer != SKIP:
+            raise ValueError(f"unknown answer {answer!r}")
+        clock.tick()
+    return shown
+
+
+def answers_from_events(events: Iterable[dict[str, Any]]) -> list[str]:
+    """Extract the answers of a session from its journal events, e.g. a ProgressLog.
+
+    A pick followed by a promote or demote of the same card is an answer; a pick followed
+    by another pick is a skip.
+
+    Args:
+            events: Journal events in order, as written by ProbBucket.
+
+    Returns:
+            One answer per picked card, each one of ANSWERS.
+    """
+    answers: list[str] = []
+    pending: int | None = None  # tid of a pick still waiting for its answer
+    for event in events:
+        if event["op"] == "pick":
+            if pending is not None:
+                answers.append(SKIP)
+            pending = event["tid"]
+        elif event["op"] in ("promote", "demote") and event["tid"] == pending:
+            if event["op"] == "demote":
+                answers.append(DEMOTE)
+            else:
+                answers.append(PROMOTE_HIGH if event.get("high_priority") else PROMOTE)
+            pending = None
+    if pending is not None:
+        answers.append(SKIP)
+    return answers
@@ -0,0 +1,315 @@
+"""Module for scheduling flashcards by due date.
+
+This module provides the DueScheduler class, an SM-2 style alternative to ProbBucket.
+Each card carries an interval, an ease factor and a due timestamp, and the card due
+first is always served next. A card picked and left unanswered is requeued
+RELEARN_DELAY later on the next pick, so skipping moves on to another card.
+"""
+
+import heapq
+import itertools
+import logging
+import random
+import sys
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Optional
+
+from .probbucket import CardPool, ProbBucket
+
+if TYPE_CHECKING:
+    from .deck_diff import DeckDiff
+    from .models import Lexicard
+
+logger = logging.getLogger(__name__)
+
+
+class CardSchedule:
+    """Scheduling state of a single card.
+
+    Attributes:
+            due: Timestamp (seconds) from which the card should be shown again.
+            ease: SM-2 ease factor, multiplies the interval after each success.
+            interval: Current interval in seconds, 0 while the card is being learned.
+            reps: Number of consecutive successful reviews.
+            seq: Sequence number of the card's live entry in the scheduler heap.
+    """
+
+    __slots__ = ("due", "ease", "interval", "reps", "seq")
+
+    def __init__(self, due: float, ease: float, seq: int) -> None:
+        """Initialize the schedule of a new, never reviewed card."""
+        self.due = due
+        self.ease = ease
+        self.interval = 0.0
+        self.reps = 0
+        self.seq = seq
+
+
+class DueScheduler:
+    """A due-date scheduler for selecting flashcards.
+
+    Cards live in a heap ordered by due timestamp. Updating a card pushes a new heap
+    entry and leaves the previous one stale, so picking the next due card and recording
+    a review are both O(log n). The public surface mirrors ProbBucket so the practice
+    pages can use either engine; distractors come from a CardPool too, shared with the
+    other sessions on the deck version.
+    """
+
+    DAY = 86400.0
+    DEFAULT_EASE = 2.5
+    MIN_EASE = 1.3
+    RELEARN_DELAY = 60.0  # seconds before a failed card is shown again
+    NEW_CARD_SPACING = 20.0  # seconds between the due times of cards never seen
+
+    def __init__(
+        self,
+        cards_list: list["Lexicard"] | None = None,
+        pool: CardPool | None = None,
+        clock: Callable[[], float] = time.time,
+        rng: random.Random | None = None,
+    ) -> None:
+        """Initialize the scheduler with an optional list of cards.
+
+        Args:
+                cards_list: Initial cards, scheduled as new cards in list order.
+                pool: Shared card pool, whose distractor index is used; a private pool if omitted.
+                clock: Function returning the current time in seconds.
+                rng: Random generator for the distractors; a new, randomly seeded one if omitted.
+        """
+        self._clock = clock
+        self.rng = rng if rng is not None else random.Random()
+        self._cards: dict[int, Lexicard] = {}
+        self._pool = pool if pool is not None else CardPool()
+        self._state: dict[int, CardSchedule] = {}
+        self._heap: list[tuple[float, int, int]] = []  # (due, seq, tid)
+        self._seq = itertools.count()
+        self._current_card: Lexicard | None = None
+        self._unanswered: int | None = None  # tid of the last card picked, until it is reviewed
+        if cards_list:
+            self.add_cards(cards_list)
+
+    def __len__(self) -> int:
+        """Return the number of scheduled cards."""
+        return len(self._cards)
+
+    def __contains__(self, card: "Lexicard") -> bool:
+        """Check whether a card is scheduled."""
+        return card.tid in self._cards
+
+    def nbytes(self) -> int:
+        """Return an estimate of the memory used by the schedules, not counting the cards."""
+        containers = sys.getsizeof(self._cards) + sys.getsizeof(self._state) + sys.getsizeof(self._heap)
+        schedules = sys.getsizeof(CardSchedule(0.0, 0.0, 0)) * len(self._state)
+        return containers + schedules + sys.getsizeof((0.0, 0, 0)) * len(self._heap)
+
+    @property
+    def pool(self) -> CardPool:
+        """The card pool the distractors are drawn from."""
+        return self._pool
+
+    def get_schedule(self, card: "Lexicard") -> CardSchedule | None:
+        """Return the scheduling state of a card, or None if it is not scheduled."""
+        return self._state.get(card.tid)
+
+    def get_current_card(self) -> Optional["Lexicard"]:
+        """Retrieve the current card or pick a new one if none exists.
+
+        Returns:
+                The current Lexicard object or None if no cards are available.
+        """
+        if not self._current_card:
+            self._current_card = self.pick_card()
+        return self._current_card
+
+    def add_cards(self, cards_list: list["Lexicard"]) -> "DueScheduler":
+        """Schedule new cards, spaced NEW_CARD_SPACING apart after the current time.
+
+        Args:
+                cards_list: List of Lexicard objects to add, already scheduled ones are ignored.
+
+        Returns:
+                The current DueScheduler instance.
+        """
+        due = self._clock()
+        for card in cards_list:
+            if card.tid in self._cards:
+                continue
+            self._cards[card.tid] = card
+            self._pool.add(card)  # a no-op for the cards of a shared pool's deck
+            self._state[card.tid] = CardSchedule(due, self.DEFAULT_EASE, -1)
+            self._push(card.tid, due)
+            due += self.NEW_CARD_SPACING
+        return self
+
+    def due_count(self) -> int:
+        """Count the cards whose due time has passed, in O(n)."""
+        now = self._clock()
+        return sum(1 for state in self._state.values() if state.due <= now)
+
+    def _push(self, tid: int, due: float) -> None:
+        """Push a fresh heap entry for a card, making its previous entry stale."""
+        state = self._state[tid]
+        state.due = due
+        state.seq = next(self._seq)
+        heapq.heappush(self._heap, (due, state.seq, tid))
+        if len(self._heap) > 2 * len(self._state) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop stale heap entries."""
+        self._heap = [(state.due, state.seq, tid) for tid, state in self._state.items()]
+        heapq.heapify(self._heap)
+
+    def pick_card(self, exclude: list["Lexicard"] | None = None) -> Optional["Lexicard"]:
+        """Pick the card due first, even if it is not due yet.
+
+        If the card of the previous pick_card was neither promoted nor demoted, it was
+        skipped: it is requeued RELEARN_DELAY from now first, instead of being picked again.
+
+        Args:
+                exclude: Optional list of cards to ignore during selection.
+
+        Returns:
+                The selected Lexicard or None if no card is available.
+        """
+        if self._unanswered in self._state:
+            self._push(self._unanswered, self._clock() + self.RELEARN_DELAY)
+        picked = self.pick_n_cards(1, exclude=exclude)
+        if not picked:
+            self._unanswered = None
+            logger.warning("no card available to pick")
+            return None
+        self._unanswered = picked[0].tid
+        return picked[0]
+
+    def pick_n_cards(
+        self, n: int, distinct: bool = True, exclude: list["Lexicard"] | None = None
+    ) -> list["Lexicard"]:
+        """Pick the n cards due first, in due order.
+
+        Args:
+                n: Number of cards to pick.
+                distinct: Kept for parity with ProbBucket; cards are always distinct here.
+                exclude: Optional list of cards to ignore during selection.
+
+        Returns:
+                The picked cards; fewer than n if not enough cards are available.
+        """
+        exclude_ids = {c.tid for c in exclude if c} if exclude else set()
+        skipped: list[tuple[float, int, int]] = []
+        picked: list[Lexicard] = []
+        while self._heap and len(picked) < n:
+            entry = heapq.heappop(self._heap)
+            _, seq, tid = entry
+            state = self._state.get(tid)
+            if state is None or state.seq != seq:
+                continue  # stale entry
+            skipped.append(entry)
+            if tid not in exclude_ids:
+                picked.append(self._cards[tid])
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+
+        if picked:
+            self._current_card = picked[0]
+        return picked
+
+    def pick_3_cards(self) -> tuple[Optional["Lexicard"], Optional["Lexicard"], Optional["Lexicard"]]:
+        """Pick the next due card as question and two confusable cards as incorrect answers.
+
+        Returns:
+                A tuple of (question_card, incorrect_1, incorrect_2).
+        """
+        q = self.pick_card()
+        if not q:
+            return None, None, None
+        return (q, *self.pick_distractors(q))
+
+    def pick_distractors(self, card: "Lexicard") -> tuple[Optional["Lexicard"], Optional["Lexicard"]]:
+        """Pick two incorrect answer cards for a question card, from the pool's distractor index.
+
+        Args:
+                card: The question card.
+
+        Returns:
+                A tuple of (incorrect_1, incorrect_2), None where the deck has too few candidates.
+        """
+        a1, a2 = [*self._pool.distractors.pick(card, 2, self.rng), None, None][:2]
+        return a1, a2
+
+    def promote(self, card: "Lexicard", high_priority: bool = False) -> None:
+        """Record a successful review and schedule the card further out.
+
+        Args:
+                card: The card that was answered correctly.
+                high_priority: If True, the answer was given without help (SM-2 quality 5 instead of 4).
+        """
+        self._review(card.tid, 5 if high_priority else 4)
+
+    def demote(self, card: "Lexicard") -> None:
+        """Record a failed review and bring the card back after RELEARN_DELAY.
+
+        Args:
+                card: The card that was answered incorrectly.
+        """
+        self._review(card.tid, 1)
+
+    def _review(self, tid: int, quality: int) -> None:
+        """Apply the SM-2 update for a review of the given quality (0-5)."""
+        if tid == self._unanswered:
+            self._unanswered = None
+        state = self._state.get(tid)
+        if state is None:
+            return
+        now = self._clock()
+        state.ease = max(self.MIN_EASE, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        if quality < 3:
+            state.reps = 0
+            state.interval = 0.0
+            self._push(tid, now + self.RELEARN_DELAY)
+            return
+
+        if state.reps == 0:
+            state.interval = self.DAY
+        elif state.reps == 1:
+            state.interval = 6 * self.DAY
+        else:
+            state.interval *= state.ease
+        state.reps += 1
+        self._push(tid, now + state.interval)
+
+    def apply_diff(self, diff: "DeckDiff", pool: CardPool | None = None) -> None:
+        """Apply a new version of the deck while keeping the schedules of its cards.
+
+        Changed cards keep their schedule, added cards are scheduled as new cards, and
+        removed cards are dropped; their heap entries become stale.
+
+        Args:
+                diff: Differences between the scheduled cards and the new version of the deck.
+                pool: Pool of the new version's cards, e.g. shared by its sessions; a private
+                        pool of the scheduled cards if omitted.
+        """
+        for _, card in diff.changed:
+            if card.tid in self._cards:
+                self._cards[card.tid] = card
+        for card in diff.removed:
+            self._cards.pop(card.tid, None)
+            self._state.pop(card.tid, None)
+        self._pool = pool if pool is not None else CardPool(self._cards.values())
+        self.add_cards(diff.added)
+
+        if self._current_card is not None:
+            self._current_card = self._cards.get(self._current_card.tid)
+
+    def forget_all(self) -> None:
+        """Remove every card from the scheduler."""
+        self._cards.clear()
+        self._pool = CardPool()
+        self._state.clear()
+        self._heap.clear()
+        self._current_card = None
+
+
+# Card selection engines by name, see SessionRegistry.engine
+ENGINES: dict[str, type[ProbBucket] | type[DueScheduler]] = {"probbucket": ProbBucket, "due": DueScheduler}
@@ -0,0 +1,328 @@
+"""Per-user practice sessions for the Lexicard application.
+
+This module provides the SessionRegistry class which owns the practice state of each
+learner on each deck: the card selection engine, the score and the state of the practice
+pages. Sessions are kept in LRU order under a memory budget; evicted and idle sessions
+are saved to their progress log and rebuilt from it on next use.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .deck_diff import DeckDiff
+from .prefetch import PrefetchQueue
+from .probbucket import CardPool, ProbBucket
+from .progress import PROGRESS_DIR, ProgressLog, ProgressWrite
+from .scheduler import ENGINES, DueScheduler
+
+if TYPE_CHECKING:
+    from .models import Deck
+    from .write_behind import WriteBehind
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+SessionKey = tuple[str, str]  # (user, deck name)
+
+
+class Tally:
+    """A simple observable counter for tracking scores."""
+
+    def __init__(self, tally: int = 0) -> None:
+        """Initialize the tally counter."""
+        self.tally: int = tally
+
+
+class Session:
+    """Practice state of one learner on one deck.
+
+    Attributes:
+            user: Name of the learner.
+            deck_name: Name of the deck being learned.
+            buckets: The card selection engine.
+            progress_log: Where the progress of a ProbBucket is recorded, None for other engines.
+            deck: The version of the deck the engine holds, see refresh.
+            score: The learner's score.
+            last_used: Clock time of the last get() or unpin() of the session.
+            pins: Number of open pages using the session, which is never evicted while pinned.
+    """
+
+    def __init__(
+        self,
+        user: str,
+        deck_name: str,
+        buckets: ProbBucket | DueScheduler,
+        progress_log: ProgressLog | None = None,
+        deck: "Deck | None" = None,
+    ) -> None:
+        """Initialize a session around a card selection engine."""
+        self.user = user
+        self.deck_name = deck_name
+        self.buckets = buckets
+        self.progress_log = progress_log
+        self.deck = deck
+        self.score = Tally(progress_log.score if progress_log else 0)
+        self.last_used = 0.0
+        self.pins = 0
+        self._pages: dict[str, Any] = {}
+
+    def page_state(self, page: str, factory: Callable[[], T]) -> T:
+        """Return the state of a practice page, created by factory on first use.
+
+        Args:
+                page: Name of the page, e.g. "single".
+                factory: Builds the initial state, e.g. the page's state class.
+
+        Returns:
+                The page state, shared by the learner's tabs.
+        """
+        state = self._pages.get(page)
+        if state is None:
+            state = self._pages[page] = factory()
+        return state
+
+    def refresh(self, deck: "Deck", pool: CardPool | None = None) -> None:
+        """Move the session to a new version of its deck, keeping the learning state.
+
+        The cards added, changed and removed since the version the engine holds are
+        applied to it, see DeckDiff, and the questions prefetched from the old version
+        are dropped.
+
+        Args:
+                deck: The new version of the deck.
+                pool: Card pool of the new version, shared by its sessions.
+        """
+        if self.deck is not None:
+            diff = DeckDiff(self.deck.cards, deck.cards)
+            if diff:
+                self.buckets.apply_diff(diff, pool)
+                for state in self._pages.values():
+                    if isinstance(state, PrefetchQueue):
+                        state.clear()
+        self.deck = deck
+
+    def add_score(self, points: int) -> None:
+        """Add points to the score and record the new score in the progress log, if any.
+
+        Args:
+                points: Points won by an answer.
+        """
+        self.score.tally += points
+        if self.progress_log is not None:
+            self.progress_log.record_score(self.score.tally)
+
+    def nbytes(self) -> int:
+        """Return the memory used by the session's engine, not counting the shared cards."""
+        return self.buckets.nbytes()
+
+    def close(self) -> None:
+        """Save the progress and the score; the session must not be used afterwards."""
+        if self.progress_log is not None:
+            self.progress_log.score = self.score.tally
+            self.progress_log.close()
+
+
+class SessionRegistry:
+    """The sessions of all the learners, by (user, deck name).
+
+    The ProbBuckets of a deck version share one CardPool, so a session costs its
+    per-learner arrays only. When the sessions outgrow max_bytes, or stay unused for
+    idle_seconds, the least recently used ones are closed, which snapshots their
+    progress; the next get() restores them from disk. A get() with a new version of the
+    deck refreshes the open session onto the pool of that version, see Session.refresh.
+    Pinned sessions, those of open pages, are kept: the pages hold them and would
+    otherwise keep using a closed session. With a writer, the progress logs record the
+    reviews and scores through it, off the clicks.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_seconds: float = 30 * 60,
+        engine: str = "probbucket",
+        progress_dir: str | Path = PROGRESS_DIR,
+        clock: Callable[[], float] = time.monotonic,
+        writer: "WriteBehind[ProgressWrite] | None" = None,
+    ) -> None:
+        """Initialize an empty registry.
+
+        Args:
+                max_bytes: Memory budget of the open sessions, see Session.nbytes.
+                idle_seconds: Sessions unused for this long are evicted.
+                engine: Card selection engine of the sessions opened from now on, a key of scheduler.ENGINES.
+                progress_dir: Folder holding the progress files.
+                clock: Function returning the current time in seconds.
+                writer: Optional write-behind buffer of the progress logs, see ProgressLog.
+        """
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.engine = engine
+        self.progress_dir = Path(progress_dir)
+        self._clock = clock
+        self.writer = writer
+        self._sessions: OrderedDict[SessionKey, Session] = OrderedDict()
+        self._pools: dict[str, tuple[Deck, CardPool]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of open sessions."""
+        return len(self._sessions)
+
+    def __contains__(self, key: SessionKey) -> bool:
+        """Check whether the session of a (user, deck name) pair is open."""
+        return key in self._sessions
+
+    def nbytes(self) -> int:
+        """Return the memory used by the open sessions."""
+        with self._lock:
+            return sum(session.nbytes() for session in self._sessions.values())
+
+    def get(self, user: str, deck: "Deck") -> Session:
+        """Return the session of a learner on a deck, opening it if needed.
+
+        Args:
+                user: Name of the learner.
+                deck: The deck being learned.
+
+        Returns:
+                The session, restored from the learner's progress log if it was evicted, and
+                refreshed if the deck is a new version of the session's one.
+        """
+        key = (user, deck.name)
+        now = self._clock()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                self._sessions.move_to_end(key)
+                session.last_used = now
+                evicted = self._pop_evictable(now)
+            else:
+                evicted = []
+        if session is not None and session.deck is not deck:
+            session.refresh(deck, self._pool(deck))
+        if session is None:
+            # Restoring reads the progress files, so it is done outside the lock
+            session = self._open(user, deck)
+            session.last_used = now
+            with self._lock:
+                # Another thread may have opened it meanwhile; keep the first one, whose
+                # log file is the one in use, and drop ours unclosed
+                session = self._sessions.setdefault(key, session)
+                self._sessions.move_to_end(key)
+                evicted = self._pop_evictable(now)
+        self._close(evicted)
+        return session
+
+    def pin(self, session: Session) -> None:
+        """Keep a session open while a page uses it, until a matching unpin().
+
+        Args:
+                session: A session returned by get().
+        """
+        with self._lock:
+            session.pins += 1
+
+    def unpin(self, session: Session) -> None:
+        """Release a pin; the session can be evicted again, once idle for idle_seconds from now.
+
+        Args:
+                session: A pinned session.
+        """
+        with self._lock:
+            session.pins -= 1
+            session.last_used = self._clock()
+
+    def peek(self, user: str, deck_name: str) -> Session | None:
+        """Return the open session of a learner on a deck, or None without opening it."""
+        with self._lock:
+            return self._sessions.get((user, deck_name))
+
+    def _open(self, user: str, deck: "Deck") -> Session:
+        """Build a session for a learner on a deck and restore its progress."""
+        engine = ENGINES[self.engine]
+        if engine is not ProbBucket:
+            # Only the ProbBucket progress is persisted; other engines start afresh
+            return Session(user, deck.name, engine(deck.cards, pool=self._pool(deck)), deck=deck)
+
+        bucket = ProbBucket(pool=self._pool(deck)).add_cards(deck.cards)
+        progress_log = ProgressLog(user, deck.name, self.progress_dir, self.writer)
+        progress_log.attach(bucket)
+        return Session(user, deck.name, bucket, progress_log, deck)
+
+    def _pool(self, deck: "Deck") -> CardPool:
+        """Return the card pool of a deck version, shared by the sessions on it."""
+        with self._lock:
+            pooled = self._pools.get(deck.name)
+            if pooled is None or pooled[0] is not deck:
+                # A new version of the deck gets a new pool; sessions on the old one keep it
+                pooled = self._pools[deck.name] = (deck, CardPool(deck.cards))
+            return pooled[1]
+
+    def _pop_evictable(self, now: float) -> list[Session]:
+        """Remove the idle sessions, then the least recently used ones over budget; call with the lock held.
+
+        Pinned sessions are skipped, so the budget may be exceeded while pages are open.
+        """
+        evicted = []
+        for key, session in list(self._sessions.items()):
+            if not session.pins and now - session.last_used >= self.idle_seconds:
+                evicted.append(self._sessions.pop(key))
+
+        total = sum(session.nbytes() for session in self._sessions.values())
+        # The most recent session stays, even alone over budget
+        for key, session in list(self._sessions.items())[:-1]:
+            if total <= self.max_bytes:
+                break
+            if not session.pins:
+                del self._sessions[key]
+                total -= session.nbytes()
+                evicted.append(session)
+        return evicted
+
+    def _close(self, sessions: list[Session]) -> None:
+        """Close evicted sessions, logging failures so that get() still succeeds."""
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                logger.exception("closing the session of %s on %s failed", session.user, session.deck_name)
+            else:
+                logger.debug("evicted the session of %s on %s", session.user, session.deck_name)
+
+    def evict(self, user: str, deck_name: str) -> bool:
+        """Close the session of a learner on a deck, if it is open.
+
+        Returns:
+                True if a session was closed.
+        """
+        with self._lock:
+            session = self._sessions.pop((user, deck_name), None)
+        if session is None:
+            return False
+        self._close([session])
+        return True
+
+    def evict_idle(self) -> int:
+        """Close the sessions unused for idle_seconds and those over budget.
+
+        Returns:
+                The number of sessions closed.
+        """
+        with self._lock:
+            evicted = self._pop_evictable(self._clock())
+        self._close(evicted)
+        return len(evicted)
+
+    def close(self) -> None:
+        """Close every session, e.g. on shutdown."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._pools.clear()
+        self._close(sessions)
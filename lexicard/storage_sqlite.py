@@ -0,0 +1,413 @@
+"""Optional SQLite storage backend for the Lexicard application.
+
+This module provides the SqliteStorage class which keeps decks, cards, users, review
+events and per-learner card schedules in one local SQLite database in WAL mode, so
+readers never wait on writers and data does not have to fit in memory. Queries run on
+a small thread pool, each worker holding its own connection; the run method awaits
+them without blocking the NiceGUI event loop.
+"""
+
+import asyncio
+import functools
+import sqlite3
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from .models import Deck, DeckInfo, Lexicard, User, construct_cards
+
+if TYPE_CHECKING:
+    from .deck_diff import DeckDiff
+
+T = TypeVar("T")
+
+# Default location of the database, next to the package
+DB_PATH = Path(__file__).parent.parent / "lexicard.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    author TEXT NOT NULL,
+    description TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    last_id_used INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS cards (
+    deck_id INTEGER NOT NULL REFERENCES decks (id) ON DELETE CASCADE,
+    tid INTEGER NOT NULL,
+    sound TEXT NOT NULL,
+    check_for_correction INTEGER NOT NULL,
+    phonetic TEXT NOT NULL,
+    target_word TEXT NOT NULL,
+    explain TEXT NOT NULL,
+    PRIMARY KEY (deck_id, tid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cards_tid ON cards (tid);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    signup_tstamp TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    highest_score_ever INTEGER NOT NULL DEFAULT 0,
+    highest_score_30d INTEGER NOT NULL DEFAULT 0,
+    streak INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS review_events (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    deck_id INTEGER NOT NULL REFERENCES decks (id) ON DELETE CASCADE,
+    tid INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS review_events_user_deck ON review_events (user_id, deck_id, ts);
+CREATE TABLE IF NOT EXISTS schedules (
+    user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    deck_id INTEGER NOT NULL REFERENCES decks (id) ON DELETE CASCADE,
+    tid INTEGER NOT NULL,
+    due REAL NOT NULL,
+    PRIMARY KEY (user_id, deck_id, tid)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS schedules_user_deck_due ON schedules (user_id, deck_id, due);
+"""
+
+CARD_COLUMNS = "tid, sound, check_for_correction, phonetic, target_word, explain"
+
+
+class SqliteStorage:
+    """Decks, users and learning history in a local SQLite database.
+
+    Every public method runs synchronously on the calling thread, with that thread's
+    own connection. From the event loop, wrap calls in run so they execute on the
+    storage's thread pool, e.g. ``await storage.run(storage.load_deck, "demodeck")``.
+    """
+
+    def __init__(self, path: str | Path = DB_PATH, workers: int = 4) -> None:
+        """Open (or create) a database and its schema.
+
+        Args:
+                path: Database file; ":memory:" is not supported since every thread
+                        opens its own connection.
+                workers: Number of threads, and so of connections, of the pool.
+        """
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lexicard-db")
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, safe in WAL mode
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a storage method on the thread pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        """Stop the thread pool and close every connection."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    # Decks
+
+    def _deck_id(self, conn: sqlite3.Connection, name: str) -> int | None:
+        """Return the id of a deck, or None."""
+        row = conn.execute("SELECT id FROM decks WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def save_deck(self, deck: Deck) -> int:
+        """Insert or replace a deck and all its cards, in one transaction.
+
+        Args:
+                deck: The deck to store; an existing deck of the same name is replaced.
+
+        Returns:
+                The id of the deck.
+        """
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO decks (name, author, description, target_language, last_id_used) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET author = excluded.author, "
+                "description = excluded.description, target_language = excluded.target_language, "
+                "last_id_used = excluded.last_id_used",
+                (deck.name, deck.author, deck.description, deck.target_language, deck.last_id_used),
+            )
+            deck_id = self._deck_id(conn, deck.name)
+            conn.execute("DELETE FROM cards WHERE deck_id = ?", (deck_id,))
+            self._insert_cards(conn, deck_id, deck.cards)
+        return deck_id
+
+    def upsert_cards(self, deck_name: str, cards: Iterable[Lexicard]) -> None:
+        """Insert or replace some cards of an existing deck.
+
+        Raises:
+                KeyError: If there is no deck of this name.
+        """
+        with self._connection() as conn:
+            deck_id = self._deck_id(conn, deck_name)
+            if deck_id is None:
+                raise KeyError(deck_name)
+            self._insert_cards(conn, deck_id, cards)
+
+    def _insert_cards(self, conn: sqlite3.Connection, deck_id: int, cards: Iterable[Lexicard]) -> None:
+        """Insert or replace cards of a deck, in the current transaction."""
+        conn.executemany(
+            f"INSERT OR REPLACE INTO cards (deck_id, {CARD_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (deck_id, c.tid, c.sound, c.check_for_correction, c.phonetic, c.target_word, c.explain)
+                for c in cards
+            ),
+        )
+
+    def apply_diff(self, deck_name: str, diff: "DeckDiff") -> None:
+        """Write only the added, changed and removed cards of a new version of a deck.
+
+        Raises:
+                KeyError: If there is no deck of this name.
+        """
+        with self._connection() as conn:
+            deck_id = self._deck_id(conn, deck_name)
+            if deck_id is None:
+                raise KeyError(deck_name)
+            self._insert_cards(conn, deck_id, [*diff.added, *(new for _, new in diff.changed)])
+            conn.executemany(
+                "DELETE FROM cards WHERE deck_id = ? AND tid = ?",
+                ((deck_id, card.tid) for card in diff.removed),
+            )
+            if diff.added:
+                conn.execute(
+                    "UPDATE decks SET last_id_used = max(last_id_used, ?) WHERE id = ?",
+                    (max(card.tid for card in diff.added), deck_id),
+                )
+
+    def delete_deck(self, name: str) -> None:
+        """Delete a deck, its cards and its learning history."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM decks WHERE name = ?", (name,))
+
+    def list_decks(self) -> list[DeckInfo]:
+        """Return the metadata and card count of every deck, sorted by name."""
+        rows = self._connection().execute(
+            "SELECT author, name, description, target_language, "
+            "(SELECT count(*) FROM cards WHERE deck_id = decks.id) FROM decks ORDER BY name"
+        )
+        return [
+            DeckInfo(author=a, name=n, description=d, target_language=t, card_count=c)
+            for a, n, d, t, c in rows
+        ]
+
+    def load_deck(self, name: str) -> Deck | None:
+        """Load a whole deck, or return None if there is none of this name."""
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT id, author, description, target_language, last_id_used FROM decks WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        deck_id, author, description, target_language, last_id_used = row
+        cards = [card for chunk in self._iter_deck_cards(conn, deck_id) for card in chunk]
+        return Deck(
+            author=author,
+            name=name,
+            description=description,
+            target_language=target_language,
+            last_id_used=last_id_used,
+            cards=cards,
+        )
+
+    def iter_cards(self, deck_name: str, chunk_size: int = 1000) -> Iterator[list[Lexicard]]:
+        """Stream the cards of a deck in tid order, in chunks, for decks too large to load.
+
+        Args:
+                deck_name: Name of the deck.
+                chunk_size: Number of cards per yielded chunk.
+
+        Yields:
+                Lists of up to chunk_size cards.
+        """
+        conn = self._connection()
+        deck_id = self._deck_id(conn, deck_name)
+        if deck_id is not None:
+            yield from self._iter_deck_cards(conn, deck_id, chunk_size)
+
+    def _iter_deck_cards(
+        self, conn: sqlite3.Connection, deck_id: int, chunk_size: int = 1000
+    ) -> Iterator[list[Lexicard]]:
+        """Stream the cards of a deck by id in tid order, in chunks; see iter_cards."""
+        cursor = conn.execute(f"SELECT {CARD_COLUMNS} FROM cards WHERE deck_id = ? ORDER BY tid", (deck_id,))
+        while rows := cursor.fetchmany(chunk_size):
+            yield self._cards(rows)
+
+    def get_card(self, deck_name: str, tid: int) -> Lexicard | None:
+        """Return one card of a deck by tid, or None."""
+        rows = self._connection().execute(
+            f"SELECT {CARD_COLUMNS} FROM cards JOIN decks ON decks.id = cards.deck_id "
+            "WHERE decks.name = ? AND tid = ?",
+            (deck_name, tid),
+        )
+        cards = self._cards(rows.fetchall())
+        return cards[0] if cards else None
+
+    @staticmethod
+    def _cards(rows: list[tuple]) -> list[Lexicard]:
+        """Build cards from rows of CARD_COLUMNS, already validated when stored."""
+        return construct_cards(
+            [
+                {
+                    "tid": tid,
+                    "sound": sound,
+                    "check_for_correction": bool(check),
+                    "phonetic": phonetic,
+                    "target_word": target_word,
+                    "explain": explain,
+                }
+                for tid, sound, check, phonetic, target_word, explain in rows
+            ]
+        )
+
+    def import_json_deck(self, path: str | Path) -> int:
+        """Store a JSON (or binary) deck file, with its journal replayed.
+
+        Returns:
+                The id of the deck.
+        """
+        from .deck_journal import load_deck_with_journal
+
+        return self.save_deck(load_deck_with_journal(path))
+
+    # Users
+
+    def _user_id(self, conn: sqlite3.Connection, name: str) -> int:
+        """Return the id of a user, creating a blank profile if needed."""
+        conn.execute("INSERT OR IGNORE INTO users (name) VALUES (?)", (name,))
+        return conn.execute("SELECT id FROM users WHERE name = ?", (name,)).fetchone()[0]
+
+    def save_user(self, user: User) -> None:
+        """Insert or update a user profile, by name; the stored id is the database's own."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO users (name, signup_tstamp, highest_score_ever, highest_score_30d, streak) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET "
+                "signup_tstamp = excluded.signup_tstamp, highest_score_ever = excluded.highest_score_ever, "
+                "highest_score_30d = excluded.highest_score_30d, streak = excluded.streak",
+                (
+                    user.name,
+                    user.signup_tstamp.isoformat(),
+                    user.highest_score_ever,
+                    user.highest_score_30d,
+                    user.streak,
+                ),
+            )
+
+    def load_user(self, name: str) -> User | None:
+        """Return a user profile, or None."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT id, name, signup_tstamp, highest_score_ever, highest_score_30d, streak "
+                "FROM users WHERE name = ?",
+                (name,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        tid, name, signup, best, best_30d, streak = row
+        return User(
+            tid=tid,
+            name=name,
+            signup_tstamp=datetime.fromisoformat(signup),
+            highest_score_ever=best,
+            highest_score_30d=best_30d,
+            streak=streak,
+        )
+
+    # Learning history
+
+    def record_reviews(self, user: str, deck_name: str, events: Iterable[dict[str, Any]]) -> None:
+        """Append review events of a user on a deck, in one transaction.
+
+        Args:
+                user: Name of the learner.
+                deck_name: Name of the deck.
+                events: Engine events such as {"op": "promote", "tid": 12, "ts": 1700000000.0};
+                        events without a tid are ignored, a missing ts means now.
+
+        Raises:
+                KeyError: If there is no deck of this name.
+        """
+        now = datetime.now().timestamp()
+        with self._connection() as conn:
+            deck_id = self._deck_id(conn, deck_name)
+            if deck_id is None:
+                raise KeyError(deck_name)
+            user_id = self._user_id(conn, user)
+            conn.executemany(
+                "INSERT INTO review_events (user_id, deck_id, tid, op, ts) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (user_id, deck_id, event["tid"], event["op"], event.get("ts", now))
+                    for event in events
+                    if "tid" in event
+                ),
+            )
+
+    def review_events(self, user: str, deck_name: str) -> list[dict[str, Any]]:
+        """Return the review events of a user on a deck, oldest first."""
+        rows = self._connection().execute(
+            "SELECT tid, op, ts FROM review_events "
+            "JOIN users ON users.id = user_id JOIN decks ON decks.id = deck_id "
+            "WHERE users.name = ? AND decks.name = ? ORDER BY ts, review_events.id",
+            (user, deck_name),
+        )
+        return [{"op": op, "tid": tid, "ts": ts} for tid, op, ts in rows]
+
+    def set_due(self, user: str, deck_name: str, dues: Iterable[tuple[int, float]]) -> None:
+        """Record when cards are due again for a user.
+
+        Args:
+                user: Name of the learner.
+                deck_name: Name of the deck.
+                dues: Pairs of (tid, due timestamp).
+
+        Raises:
+                KeyError: If there is no deck of this name.
+        """
+        with self._connection() as conn:
+            deck_id = self._deck_id(conn, deck_name)
+            if deck_id is None:
+                raise KeyError(deck_name)
+            user_id = self._user_id(conn, user)
+            conn.executemany(
+                "INSERT OR REPLACE INTO schedules (user_id, deck_id, tid, due) VALUES (?, ?, ?, ?)",
+                ((user_id, deck_id, tid, due) for tid, due in dues),
+            )
+
+    def due_cards(self, user: str, deck_name: str, now: float, limit: int = 100) -> list[tuple[int, float]]:
+        """Return the (tid, due) pairs due by now, earliest first, using the (user, deck, due) index."""
+        rows = self._connection().execute(
+            "SELECT tid, due FROM schedules "
+            "WHERE user_id = (SELECT id FROM users WHERE name = ?) "
+            "AND deck_id = (SELECT id FROM decks WHERE name = ?) AND due <= ? ORDER BY due LIMIT ?",
+            (user, deck_name, now, limit),
+        )
+        return rows.fetchall()
@@ -0,0 +1,214 @@
+"""Write-behind buffering for the Lexicard application.
+
+This module provides the WriteBehind class which collects writes in memory and hands
+them to the storage layer in batches from a background thread, so that recording a
+review costs a queue append instead of a file write.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+if TYPE_CHECKING:
+    from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteBehind(Generic[T]):
+    """A bounded buffer of pending writes, flushed in batches by a background thread.
+
+    Everything pending is written as one batch as soon as batch_size items are pending,
+    or interval seconds after the first of them arrived, whichever comes first; a writer
+    that lags behind writes larger batches instead of more of them. Memory is bounded
+    by max_pending: when that many items are waiting, put blocks until the writer makes
+    room, and offer, for callers on the event loop that must never wait for the disk,
+    drops the item, counting and logging it. close writes everything still pending. A
+    batch whose write raises is logged and dropped.
+
+    The thread is started by the first put and stops on close; putting again after a
+    close starts a new one. While the thread runs, close is registered to run at exit.
+    The condition is only notified when a waiter needs it, as every notify of a thread
+    blocked on it costs the caller a GIL handoff.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[list[T]], None],
+        max_pending: int = 10_000,
+        batch_size: int = 256,
+        interval: float = 1.0,
+        metrics: "Metrics | None" = None,
+        name: str = "write_behind",
+    ) -> None:
+        """Initialize an empty buffer.
+
+        Args:
+                write: Writes a batch of items to storage; called from the background thread.
+                max_pending: Number of pending items above which put blocks and offer drops.
+                batch_size: Number of pending items that trigger a write at once.
+                interval: Longest time, in seconds, an item waits for a smaller batch.
+                metrics: Optional instrumentation, records batch sizes, full buffers and failures.
+                name: Name of the thread and prefix of the metrics.
+        """
+        self.write = write
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.interval = interval
+        self.metrics = metrics
+        self.name = name
+        self._pending: deque[T] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._queued = 0  # items put so far
+        self._written = 0  # items handed to write so far, failed or not
+        self._flush_target = 0  # a flush waits until _written reaches it
+        self._idle = False  # whether the writer waits for the first item of a batch
+        self._blocked = 0  # puts waiting for room
+        self.dropped = 0  # items refused by offer on a full buffer
+        self._overflowing = False  # whether offer refused the last item
+
+    def __len__(self) -> int:
+        """Return the number of items not written yet."""
+        return len(self._pending)
+
+    def put(self, item: T, timeout: float | None = None) -> None:
+        """Queue one item to be written, blocking while the buffer is full.
+
+        Args:
+                item: What to write, as expected by the write function.
+                timeout: Longest wait for room in seconds, None to wait as long as needed.
+
+        Raises:
+                queue.Full: If the buffer is still full after timeout.
+        """
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self._incr(f"{self.name}.full")
+                self._cond.notify_all()
+                self._blocked += 1
+                try:
+                    if not self._cond.wait_for(lambda: len(self._pending) < self.max_pending, timeout):
+                        raise queue.Full
+                finally:
+                    self._blocked -= 1
+            self._append(item)
+
+    def full(self) -> bool:
+        """Return True if offer would drop an item now, as queue.Queue.full."""
+        return len(self._pending) >= self.max_pending
+
+    def offer(self, item: T) -> bool:
+        """Queue one item without waiting; on a full buffer, drop it.
+
+        Drops are counted in dropped and in the metrics, and logged once per overflow.
+
+        Args:
+                item: What to write, as expected by the write function.
+
+        Returns:
+                True if the item was queued, False if it was dropped.
+        """
+        with self._cond:
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                self._incr(f"{self.name}.dropped")
+                if not self._overflowing:
+                    self._overflowing = True
+                    logger.warning("%s: buffer full, dropping writes until the writer catches up", self.name)
+                return False
+            self._overflowing = False
+            self._append(item)
+            return True
+
+    def _append(self, item: T) -> None:
+        """Queue an item and wake or start the writer as needed; call with the lock held."""
+        self._pending.append(item)
+        self._queued += 1
+        pending = len(self._pending)
+        if (pending == 1 and self._idle) or pending == self.batch_size:
+            self._cond.notify_all()  # start the timer, or write a full batch now
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every item put so far is written.
+
+        Args:
+                timeout: Longest wait in seconds, None to wait as long as needed.
+
+        Returns:
+                True if the items are written, False on timeout.
+        """
+        with self._cond:
+            target = self._queued
+            self._flush_target = max(self._flush_target, target)
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self) -> None:
+        """Write everything pending and stop the background thread, e.g. on shutdown."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        atexit.unregister(self.close)
+        if thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self) -> None:
+        """Write batches as they fill up or time out, until closed and drained."""
+        while True:
+            with self._cond:
+                self._idle = True
+                self._cond.wait_for(lambda: self._pending or self._stopping)
+                self._idle = False
+                # The batch has its first item: wait at most interval for the rest
+                self._cond.wait_for(
+                    lambda: (
+                        self._stopping
+                        or len(self._pending) >= self.batch_size
+                        or self._flush_target > self._written
+                    ),
+                    self.interval,
+                )
+                if not self._pending:
+                    self._stopping = False
+                    self._thread = None
+                    return
+                batch = list(self._pending)
+                self._pending.clear()
+                if self._blocked:
+                    self._cond.notify_all()  # room for blocked puts
+            self._write(batch)
+            with self._cond:
+                flushing = self._flush_target > self._written
+                self._written += len(batch)
+                if flushing:
+                    self._cond.notify_all()
+
+    def _write(self, batch: list[T]) -> None:
+        """Write one batch, logging failures so that the thread keeps going."""
+        try:
+            self.write(batch)
+        except Exception:
+            logger.exception("%s: writing a batch of %d items failed, dropping it", self.name, len(batch))
+            self._incr(f"{self.name}.failed")
+        if self.metrics is not None:
+            self.metrics.observe(f"{self.name}.batch", len(batch))
+
+    def _incr(self, name: str) -> None:
+        """Increase a counter if instrumentation is enabled."""
+        if self.metrics is not None:
+            self.metrics.incr(name)
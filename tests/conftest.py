@@ -0,0 +1,34 @@
+import pytest
+from nicegui.testing import User
+from lexicard.models import Deck, Lexicard
+
+class FakeClock:
+    """A clock that only moves when a test sets now."""
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def make_cards(n=10, tids=None, with_sounds=False):
+    """Cards with tids 1 to n, or the given tids; with_sounds gives the odd tids a sound."""
+    return [Lexicard(tid=i, sound=f"s{i}" if with_sounds and i % 2 else "0", check_for_correction=False,
+                     phonetic=f"p{i}", target_word=f"t{i}", explain=f"e{i}") for i in tids or range(1, n + 1)]
+
+def make_deck(name="demo", n=10, tids=None):
+    return Deck(author="a", name=name, description="d", target_language="th", cards=make_cards(n, tids))
+
+@pytest.fixture
+def sample_cards():
+    return make_cards()
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def user(user: User, tmp_path) -> User:
+    """The NiceGUI test user, with the learners' progress kept in a temporary directory."""
+    from lexicard import front_commons
+    front_commons.session_registry.progress_dir = tmp_path / 'progress'
+    return user
@@ -0,0 +1,54 @@
+import pytest
+from lexicard.deck_binary import BinaryDeck, load_deck_from_binary_file, main, save_deck_to_binary_file
+from lexicard.models import Deck, Lexicard, load_deck_from_json_file, save_deck_to_json_file
+
+@pytest.fixture
+def deck():
+    cards = [
+        Lexicard(tid=tid, sound="0" if tid % 2 else f"s{tid}", check_for_correction=tid % 3 == 0,
+                 phonetic=f"p{tid}", target_word=f"ไทย{tid}", explain=f"explain {tid}")
+        for tid in (40, 7, 1538, 12, 3)
+    ]
+    return Deck(author="แรช", name="bin", description="d", target_language="th", cards=cards)
+
+def test_round_trip(deck, tmp_path):
+    path = tmp_path / "deck.lxd"
+    save_deck_to_binary_file(deck, path)
+    assert load_deck_from_binary_file(path) == deck
+
+def test_random_access(deck, tmp_path):
+    path = tmp_path / "deck.lxd"
+    save_deck_to_binary_file(deck, path)
+    with BinaryDeck(path) as binary:
+        assert binary.info.card_count == 5
+        assert binary.info.author == "แรช"
+        assert binary.card(-1) == deck.cards[-1]
+        assert binary.cards(1, 3) == deck.cards[1:3]
+        for card in deck.cards:
+            assert binary.by_tid(card.tid) == card
+        assert binary.by_tid(8) is None
+        with pytest.raises(IndexError):
+            binary.card(5)
+
+def test_empty_deck(tmp_path):
+    path = tmp_path / "empty.lxd"
+    empty = Deck(author="a", name="e", description="d", target_language="th")
+    save_deck_to_binary_file(empty, path)
+    with BinaryDeck(path) as binary:
+        assert len(binary) == 0
+        assert binary.by_tid(1) is None
+        assert binary.to_deck() == empty
+
+def test_rejects_other_files(deck, tmp_path):
+    path = tmp_path / "deck.json"
+    save_deck_to_json_file(deck, path)
+    with pytest.raises(ValueError):
+        BinaryDeck(path)
+
+def test_converter(deck, tmp_path):
+    source = tmp_path / "deck.json"
+    save_deck_to_json_file(deck, source)
+    main([str(source)])
+    assert load_deck_from_binary_file(tmp_path / "deck.lxd") == deck
+    main([str(tmp_path / "deck.lxd"), str(tmp_path / "back.json")])
+    assert load_deck_from_json_file(tmp_path / "back.json") == deck
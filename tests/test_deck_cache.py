@@ -0,0 +1,142 @@
+import asyncio
+import itertools
+import os
+import threading
+import time
+import pytest
+from lexicard.deck_binary import save_deck_to_binary_file
+from lexicard.deck_cache import DeckCache
+from lexicard.deck_journal import load_deck_with_journal
+from lexicard.metrics import Metrics
+from lexicard.models import Deck, Lexicard, save_deck_to_json_file
+
+def make_deck(name, n=3):
+    cards = [Lexicard(tid=i, sound="0", check_for_correction=False, phonetic="p", target_word="t", explain=f"e{i}")
+             for i in range(n)]
+    return Deck(author="a", name=name, description="d", target_language="th", cards=cards)
+
+@pytest.fixture
+def deck_file(tmp_path):
+    path = tmp_path / "deck.json"
+    save_deck_to_json_file(make_deck("one"), path)
+    return path
+
+def counting_loader(calls, delay=0.0):
+    def loader(path):
+        calls.append(path)
+        time.sleep(delay)
+        return load_deck_with_journal(path)
+    return loader
+
+def test_hit_returns_shared_deck(deck_file):
+    calls = []
+    metrics = Metrics()
+    cache = DeckCache(loader=counting_loader(calls), metrics=metrics)
+    assert cache.peek(deck_file) is None
+    deck = cache.get(deck_file)
+    assert cache.get(str(deck_file)) is deck
+    assert cache.peek(deck_file) is deck
+    assert len(calls) == 1
+    assert metrics.counters == {"deck_cache.miss": 1, "deck_cache.hit": 1}
+
+def test_new_version_is_reloaded(deck_file):
+    cache = DeckCache()
+    assert cache.get(deck_file).name == "one"
+    save_deck_to_json_file(make_deck("two", n=4), deck_file)
+    os.utime(deck_file, ns=(1, 1))
+    assert cache.get(deck_file).name == "two"
+    assert len(cache) == 1
+    cache.invalidate(deck_file)
+    assert len(cache) == 0 and cache.nbytes == 0
+
+def test_single_flight(deck_file):
+    calls = []
+    cache = DeckCache(loader=counting_loader(calls, delay=0.05))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(deck_file))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 8 and all(deck is results[0] for deck in results)
+
+async def test_get_async_single_flight(deck_file):
+    calls, async_calls = [], []
+    cache = DeckCache(loader=counting_loader(calls), async_loader=counting_loader(async_calls, delay=0.05))
+    results = await asyncio.gather(*(cache.get_async(deck_file) for _ in range(8)))
+    # the sync lookup is a hit, not a second load
+    results.append(cache.get(deck_file))
+    assert async_calls == [deck_file.resolve()] and calls == []
+    assert all(deck is results[0] for deck in results)
+    assert await cache.get_async(deck_file) is results[0]
+
+async def test_get_async_does_not_block_the_loop(deck_file):
+    def slow_loader(path):
+        time.sleep(0.2)
+        return load_deck_with_journal(path)
+
+    ticks = []
+
+    async def tick():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    await asyncio.sleep(0)
+    await DeckCache(loader=slow_loader).get_async(deck_file)
+    ticker.cancel()
+    assert len(ticks) > 5
+    assert max(b - a for a, b in itertools.pairwise(ticks)) < 0.15
+
+async def test_cancelled_caller_does_not_break_the_load(deck_file):
+    calls = []
+    cache = DeckCache(async_loader=counting_loader(calls, delay=0.1))
+    tasks = [asyncio.create_task(cache.get_async(deck_file)) for _ in range(4)]
+    await asyncio.sleep(0.02)
+    tasks[1].cancel()  # a waiter, e.g. a tab closed mid-load
+    tasks[0].cancel()  # the caller running the load
+    with pytest.raises(asyncio.CancelledError):
+        await tasks[1]
+    decks = await asyncio.gather(tasks[2], tasks[3])
+    assert decks[0] is decks[1] and len(calls) == 1
+    assert await cache.get_async(deck_file) is decks[0]
+
+async def test_get_async_failure(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{")
+    cache = DeckCache()
+    with pytest.raises(ValueError):
+        await cache.get_async(path)
+    assert len(cache) == 0
+
+def test_failed_load_is_not_cached(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text("{")
+    cache = DeckCache()
+    with pytest.raises(ValueError):
+        cache.get(path)
+    with pytest.raises(ValueError):
+        cache.get(path)
+    assert len(cache) == 0
+
+def test_lru_eviction_under_budget(tmp_path):
+    paths = []
+    for name in ("a", "b", "c"):
+        paths.append(tmp_path / f"{name}.json")
+        save_deck_to_json_file(make_deck(name), paths[-1])
+    budget = 2 * os.path.getsize(paths[0]) * DeckCache.MEMORY_FACTOR
+    cache = DeckCache(max_bytes=budget)
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])  # b is now the least recently used
+    cache.get(paths[2])
+    assert cache.peek(paths[1]) is None
+    assert cache.peek(paths[0]) is not None and cache.peek(paths[2]) is not None
+    assert cache.nbytes <= budget
+
+def test_binary_decks(tmp_path):
+    path = tmp_path / "deck.lxd"
+    save_deck_to_binary_file(make_deck("bin"), path)
+    assert DeckCache().get(path) == make_deck("bin")
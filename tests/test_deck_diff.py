@@ -0,0 +1,71 @@
+from lexicard.deck_diff import DeckDiff, content_hash
+from lexicard.deck_store import IndexedDeck
+from lexicard.models import Deck, Lexicard
+from lexicard.probbucket import KNOWN, LEARN, REVIEW, ProbBucket
+from lexicard.scheduler import DueScheduler
+
+def make_card(tid, explain=None, **fields):
+    data = dict(sound="0", check_for_correction=False, phonetic=f"p{tid}", target_word=f"ไทย{tid}")
+    data.update(fields)
+    return Lexicard(tid=tid, explain=explain or f"e{tid}", **data)
+
+def new_version():
+    return [make_card(1), make_card(2, "fixed"), make_card(4)]
+
+def test_content_hash_is_normalized():
+    assert content_hash(make_card(1)) == content_hash(make_card(1, phonetic=" p1 "))
+    assert content_hash(make_card(1)) == content_hash(make_card(2, phonetic="p1", target_word="ไทย1", explain="e1"))
+    # precomposed and decomposed "é"
+    assert content_hash(make_card(1, explain="caf\u00e9")) == content_hash(make_card(1, explain="cafe\u0301"))
+    assert content_hash(make_card(1)) != content_hash(make_card(1, check_for_correction=True))
+
+def test_diff():
+    diff = DeckDiff([make_card(1), make_card(2), make_card(3)], new_version())
+    assert diff
+    assert diff.to_dict() == {
+        "added": [4],
+        "changed": [{"tid": 2, "fields": {"explain": ["e2", "fixed"]}}],
+        "removed": [3],
+        "unchanged": 1,
+    }
+    assert not DeckDiff(new_version(), new_version())
+
+def test_indexed_deck_apply_diff():
+    old = [make_card(1), make_card(2), make_card(3)]
+    deck = IndexedDeck(Deck(author="a", name="d", description="d", target_language="th", cards=old))
+    deck.apply_diff(DeckDiff(old, new_version()))
+    assert sorted((c.tid, c.explain) for c in deck) == [(1, "e1"), (2, "fixed"), (4, "e4")]
+    assert deck.deck.last_id_used == 4
+
+def test_probbucket_keeps_learning_state():
+    old = [make_card(1), make_card(2), make_card(3)]
+    pb = ProbBucket(old)
+    pb.promote(old[0], high_priority=True)
+    pb.promote(old[1])
+    pb.apply_diff(DeckDiff(old, new_version()))
+    assert pb.bucket_of(make_card(1)) == KNOWN
+    assert pb.bucket_of(make_card(2)) == REVIEW
+    assert pb.bucket_of(make_card(3)) is None
+    assert pb.bucket_of(make_card(4)) == LEARN
+    assert [c.explain for c in pb.cards_in(REVIEW)] == ["fixed"]
+    assert pb.sizes() == (1, 1, 1)
+
+def test_probbucket_readds_removed_card():
+    old = [make_card(1), make_card(2)]
+    pb = ProbBucket(old)
+    pb.apply_diff(DeckDiff(old, [make_card(1)]))
+    pb.apply_diff(DeckDiff([make_card(1)], [make_card(1), make_card(2, "back")]))
+    assert [c.explain for c in pb.cards_in(LEARN)] == ["e1", "back"]
+
+def test_due_scheduler_keeps_schedules():
+    now = [1000.0]
+    old = [make_card(1), make_card(2), make_card(3)]
+    ds = DueScheduler(old, clock=lambda: now[0])
+    ds.promote(old[1])
+    due = ds.get_schedule(old[1]).due
+    ds.apply_diff(DeckDiff(old, new_version()))
+    assert ds.get_schedule(make_card(2)).due == due
+    assert ds.get_schedule(make_card(3)) is None
+    assert make_card(4) in ds
+    assert [c.tid for c in ds.pick_n_cards(3)] == [1, 4, 2]
+    assert ds.pick_n_cards(3)[2].explain == "fixed"
@@ -0,0 +1,93 @@
+import pytest
+from lexicard.deck_binary import save_deck_to_binary_file
+from lexicard.deck_cache import DeckCache
+from lexicard.deck_journal import DeckJournal, get_journal, journal_path, load_deck_with_journal
+from lexicard.models import Deck, Lexicard, load_deck_from_json_file, save_deck_to_json_file
+
+def make_card(tid, explain=None):
+    return Lexicard(tid=tid, sound="0", check_for_correction=False, phonetic="p", target_word="ไทย",
+                    explain=explain or f"e{tid}")
+
+@pytest.fixture
+def deck_file(tmp_path):
+    path = tmp_path / "deck.json"
+    save_deck_to_json_file(Deck(author="a", name="j", description="d", target_language="th",
+                                cards=[make_card(i) for i in range(5)]), path)
+    return path
+
+def test_atomic_save_leaves_no_temp_file(deck_file):
+    assert [p.name for p in deck_file.parent.iterdir()] == ["deck.json"]
+
+def test_edits_are_replayed_on_load(deck_file):
+    journal = DeckJournal(deck_file)
+    journal.upsert(make_card(2).model_copy(update={"check_for_correction": True}))
+    journal.upsert(make_card(9))
+    journal.delete(0)
+    journal.delete(42)
+    assert journal_path(deck_file).name == "deck.json.journal.jsonl"
+    assert len(load_deck_from_json_file(deck_file).cards) == 5  # deck file untouched
+
+    deck = load_deck_with_journal(deck_file)
+    assert [card.tid for card in deck.cards] == [1, 2, 3, 4, 9]
+    assert deck.cards[1].check_for_correction
+
+def test_torn_last_line_is_ignored(deck_file):
+    DeckJournal(deck_file).delete(1)
+    with journal_path(deck_file).open("a") as f:
+        f.write('{"op": "delete", "ti')
+    assert [card.tid for card in load_deck_with_journal(deck_file).cards] == [0, 2, 3, 4]
+
+def test_compact_folds_edits(deck_file):
+    journal = DeckJournal(deck_file)
+    journal.upsert(make_card(3, "fixed"))
+    expected = load_deck_with_journal(deck_file)
+    assert journal.compact() == 1
+    assert journal_path(deck_file).read_bytes() == b""
+    assert load_deck_from_json_file(deck_file) == expected
+    assert journal.compact() == 0
+
+def test_compaction_keeps_concurrent_appends(deck_file, monkeypatch):
+    journal = DeckJournal(deck_file)
+    journal.upsert(make_card(3, "first"))
+    original_save = save_deck_to_json_file
+
+    def slow_save(deck, path):
+        journal.upsert(make_card(4, "during"))  # appended while the deck is rewritten
+        original_save(deck, path)
+
+    monkeypatch.setattr("lexicard.deck_journal.save_deck_to_json_file", slow_save)
+    journal.compact()
+    assert load_deck_from_json_file(deck_file).cards[3].explain == "first"
+    assert load_deck_from_json_file(deck_file).cards[4].explain == "e4"
+    assert load_deck_with_journal(deck_file).cards[4].explain == "during"
+
+def test_background_compaction(deck_file, monkeypatch):
+    monkeypatch.setattr(DeckJournal, "COMPACT_BYTES", 1)
+    journal = DeckJournal(deck_file)
+    journal.upsert(make_card(0, "edited"))
+    journal.compact_in_background().join()
+    assert load_deck_from_json_file(deck_file).cards[0].explain == "edited"
+
+def test_binary_deck_journal(tmp_path):
+    path = tmp_path / "deck.lxd"
+    save_deck_to_binary_file(Deck(author="a", name="b", description="d", target_language="th",
+                                  cards=[make_card(1)]), path)
+    journal = get_journal(path)
+    assert get_journal(str(path)) is journal
+    journal.upsert(make_card(1, "edited"))
+    journal.compact()
+    assert load_deck_with_journal(path).cards[0].explain == "edited"
+
+def test_json_and_binary_files_have_their_own_journal(deck_file):
+    binary = deck_file.with_suffix(".lxd")
+    save_deck_to_binary_file(load_deck_from_json_file(deck_file), binary)
+    DeckJournal(deck_file).upsert(make_card(1, "json only"))
+    assert journal_path(binary) != journal_path(deck_file)
+    assert load_deck_with_journal(binary).cards[1].explain == "e1"
+    assert load_deck_with_journal(deck_file).cards[1].explain == "json only"
+
+def test_cache_sees_journal_edits(deck_file):
+    cache = DeckCache()
+    assert cache.get(deck_file).cards[0].explain == "e0"
+    DeckJournal(deck_file).upsert(make_card(0, "edited"))
+    assert cache.get(deck_file).cards[0].explain == "edited"
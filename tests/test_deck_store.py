@@ -0,0 +1,75 @@
+import pytest
+from conftest import make_deck
+from lexicard.deck_journal import journal_path, load_deck_with_journal
+from lexicard.deck_store import DeckStore, IndexedDeck
+from lexicard.models import FILE_PATH, Lexicard, load_deck_from_json_file, save_deck_to_json_file
+
+FIELDS = dict(sound="0", check_for_correction=False, phonetic="p", target_word="t")
+
+def test_lookup_and_ids():
+    deck = IndexedDeck(make_deck("store", tids=(3, 1, 7)))
+    assert deck.deck.last_id_used == 7
+    assert deck.get(1).explain == "e1" and deck.position(1) == 1
+    assert deck.get(2) is None and 2 not in deck
+    card = deck.create(explain="new", **FIELDS)
+    assert card.tid == 8 and deck.get(8) is card and deck.position(8) == 3
+    deck.delete(8)
+    assert deck.allocate_id() == 9  # never reused
+
+def test_update_and_delete_keep_the_index():
+    deck = IndexedDeck(make_deck(tids=(1, 2, 3, 4)))
+    deck.update(deck.get(2).model_copy(update={"explain": "fixed"}))
+    assert deck.deck.cards[1].explain == "fixed"
+    assert deck.delete(2).tid == 2
+    assert [c.tid for c in deck] == [1, 4, 3]
+    assert all(deck.position(c.tid) == i for i, c in enumerate(deck))
+    deck.delete(3)  # the last card
+    assert [c.tid for c in deck] == [1, 4]
+    with pytest.raises(KeyError):
+        deck.delete(3)
+    with pytest.raises(KeyError):
+        deck.update(Lexicard(tid=3, explain="x", **FIELDS))
+    with pytest.raises(ValueError):
+        deck.add(Lexicard(tid=1, explain="x", **FIELDS))
+
+def test_duplicate_tids_are_rejected():
+    with pytest.raises(ValueError):
+        IndexedDeck(make_deck(tids=(1, 1)))
+
+def test_store_manages_decks():
+    store = DeckStore()
+    store.add(make_deck("a"))
+    store.add(make_deck("b"))
+    assert len(store) == 2 and "a" in store
+    with pytest.raises(ValueError):
+        store.add(make_deck("a"))
+    assert store.remove("a").name == "a"
+    assert [deck.name for deck in store] == ["b"]
+
+def test_existing_json_deck_loads_unchanged():
+    deck = DeckStore().open(FILE_PATH)
+    original = load_deck_from_json_file(FILE_PATH)
+    assert deck.deck.cards == original.cards
+    assert deck.deck.last_id_used == max(c.tid for c in original.cards)
+
+def test_opened_deck_journals_edits(tmp_path):
+    path = tmp_path / "deck.json"
+    save_deck_to_json_file(make_deck("store", tids=(3, 1, 7)), path)
+    store = DeckStore()
+    deck = store.open(path)
+    deck.create(explain="new", **FIELDS)
+    deck.delete(8)
+    deck.delete(1)
+    assert journal_path(path).exists()
+    reloaded = load_deck_with_journal(path)
+    assert [c.tid for c in reloaded.cards] == [3, 7]
+    assert reloaded.last_id_used == 8
+
+    store.save("store")
+    assert journal_path(path).read_bytes() == b""
+    assert load_deck_from_json_file(path).last_id_used == 8
+    store.save("store", tmp_path / "copy.json")
+    assert load_deck_from_json_file(tmp_path / "copy.json") == deck.deck
+    store.add(make_deck("x"))
+    with pytest.raises(ValueError):
+        store.save("x")
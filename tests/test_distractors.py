@@ -0,0 +1,50 @@
+import pytest
+from lexicard.distractors import DistractorIndex, part_of_speech
+from lexicard.models import Lexicard
+from lexicard.probbucket import ProbBucket
+
+def make_card(tid, target_word, phonetic, explain):
+    return Lexicard(tid=tid, sound="0", check_for_correction=False, phonetic=phonetic, target_word=target_word, explain=explain)
+
+@pytest.fixture
+def thai_cards():
+    return [
+        make_card(1, "คุณ", "kun", "(pronoun)"),
+        make_card(2, "ผม", "pǒm", "(pronoun)"),
+        make_card(3, "ชั้น", "chán", "(pronoun)"),
+        make_card(4, "กิน", "gin", "to eat"),
+        make_card(5, "กินข้าว", "gin kâao", "to have a meal"),
+        make_card(6, "ข้าว", "kâao", "rice"),
+        make_card(7, "ขนม", "kà-nǒm", "snack"),
+        make_card(8, "ช้า", "cháa", "slowly"),
+    ]
+
+def test_part_of_speech():
+    assert part_of_speech("(pronoun)") == "(pronoun)"
+    assert part_of_speech("to eat") == "verb"
+    assert part_of_speech("slowly") == "adverb"
+    assert part_of_speech("rice") == "other"
+
+def test_candidates_have_distinct_texts(thai_cards):
+    index = DistractorIndex(thai_cards)
+    for card in thai_cards:
+        texts = [c.explain for c in index.candidates(card)]
+        assert card.explain not in texts
+        assert len(texts) == len(set(texts))
+        assert len(texts) >= 2
+
+def test_shared_bigrams_rank_first(thai_cards):
+    index = DistractorIndex(thai_cards)
+    # กินข้าว shares bigrams with both กิน and ข้าว
+    assert {c.tid for c in index.candidates(thai_cards[4])[:2]} == {4, 6}
+
+def test_pick_3_cards_never_duplicates_a_text(thai_cards):
+    pb = ProbBucket(thai_cards)
+    for _ in range(50):
+        cards = pb.pick_3_cards()
+        assert all(cards)
+        assert len({c.explain for c in cards}) == 3
+
+def test_tiny_deck_pads_with_none():
+    cards = [make_card(1, "a", "a", "same"), make_card(2, "b", "b", "same")]
+    assert ProbBucket(cards).pick_3_cards()[1:] == (None, None)
@@ -0,0 +1,126 @@
+import openpyxl
+import pytest
+from lexicard.deck_binary import load_deck_from_binary_file
+from lexicard.importer import build_decks, find_workbooks, import_sheet, lexicon_sheets, main, sheet_digests
+from lexicard.deck_journal import journal_path, load_deck_with_journal
+from lexicard.models import load_deck_from_json_file
+from lexicard.storage_sqlite import SqliteStorage
+
+HEADER = ["id", "has_sound", "has_typo", "phonetic", "thai", "english"]
+
+def write_workbook(path, sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets.items():
+        sheet = wb.create_sheet(title)
+        for row in rows:
+            sheet.append(row)
+    wb.save(path)
+
+def card_rows(tids):
+    return [HEADER] + [[tid, None, False, f"p{tid}", f"t{tid}", f"e{tid}"] for tid in tids]
+
+@pytest.fixture
+def workbooks(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    write_workbook(src / "one.xlsx", {"lexicon": card_rows([1, 2, 3]), "notes": [["some", "notes"]]})
+    write_workbook(src / "two.xlsx", {"verbs": [*card_rows([3, 4]), ["bad", None, False, "p", "t", "e"]],
+                                      "nouns": card_rows([5])})
+    (src / "readme.txt").write_text("not a workbook")
+    return src
+
+def test_find_workbooks_and_sheets(workbooks):
+    assert [p.name for p in find_workbooks([str(workbooks)])] == ["one.xlsx", "two.xlsx"]
+    assert [p.name for p in find_workbooks([str(workbooks / "t*.xlsx"), str(workbooks / "two.xlsx")])] == ["two.xlsx"]
+    assert lexicon_sheets(workbooks / "one.xlsx") == ["lexicon"]
+    assert lexicon_sheets(workbooks / "two.xlsx", ["nouns"]) == ["nouns"]
+
+def test_import_sheet_reports_row_errors(workbooks):
+    result = import_sheet(workbooks / "two.xlsx", "verbs")
+    assert [c["tid"] for c in result.cards] == [3, 4]
+    assert result.rows == 3
+    assert [row for row, _ in result.errors] == [4]
+
+def test_merge_by_deck_name(workbooks):
+    results = [import_sheet(workbooks / "one.xlsx", "lexicon"), import_sheet(workbooks / "two.xlsx", "verbs")]
+    decks, replaced = build_decks(results, "all", "me", "th")
+    assert replaced == 1
+    assert [c.tid for c in decks[0].cards] == [1, 2, 3, 4]
+    assert decks[0].last_id_used == 4
+
+def test_cli_one_deck_per_sheet(workbooks, tmp_path, capsys):
+    out = tmp_path / "out"
+    main([str(workbooks), "-o", str(out), "-j", "2"])
+    assert sorted(p.name for p in out.iterdir()) == [
+        "lexicard-import.json", "one.lexicon.json", "two.nouns.json", "two.verbs.json"]
+    assert [c.tid for c in load_deck_from_json_file(out / "two.verbs.json").cards] == [3, 4]
+    summary = capsys.readouterr().out
+    assert "row 4:" in summary
+    assert "3 sheets into 3 decks" in summary and "6 cards, 1 rejected" in summary
+
+def test_cli_merged_binary_and_sqlite(workbooks, tmp_path):
+    main([str(workbooks / "*.xlsx"), "-o", str(tmp_path), "--format", "lxd", "--deck-name", "all", "-j", "1"])
+    assert len(load_deck_from_binary_file(tmp_path / "all.lxd").cards) == 5
+    main([str(workbooks), "--sqlite", str(tmp_path / "decks.db"), "--sheet", "nouns"])
+    storage = SqliteStorage(tmp_path / "decks.db")
+    assert [(info.name, info.card_count) for info in storage.list_decks()] == [("two.nouns", 1)]
+    storage.close()
+
+def test_cli_without_workbooks(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path)])
+
+def test_incremental_reimport(workbooks, tmp_path, capsys):
+    import json
+    out = tmp_path / "out"
+    main([str(workbooks / "one.xlsx"), "-o", str(out)])
+    deck_path = out / "one.lexicon.json"
+    full = deck_path.read_bytes()
+
+    report_path = tmp_path / "report.json"
+    main([str(workbooks / "one.xlsx"), "-o", str(out), "--incremental", "--diff-report", str(report_path)])
+    assert json.loads(report_path.read_text()) == {"one.lexicon": {"skipped": True}}
+    assert "Nothing to import: 1 sheets unchanged, 1 decks skipped" in capsys.readouterr().out
+
+    rows = card_rows([1, 2, 4])
+    rows[2][5] = "fixed"  # tid 2
+    rows[1][4] = " t1 "  # whitespace only, not a change
+    write_workbook(workbooks / "one.xlsx", {"lexicon": rows})
+    main([str(workbooks / "one.xlsx"), "-o", str(out), "--incremental", "--diff-report", str(report_path)])
+    assert json.loads(report_path.read_text()) == {"one.lexicon": {
+        "added": [4], "changed": [{"tid": 2, "fields": {"explain": ["e2", "fixed"]}}], "removed": [3], "unchanged": 1}}
+    assert deck_path.read_bytes() == full  # the edits are in the journal
+    assert len(journal_path(deck_path).read_text().splitlines()) == 3
+    deck = load_deck_with_journal(deck_path)
+    assert sorted((c.tid, c.explain) for c in deck.cards) == [(1, "e1"), (2, "fixed"), (4, "e4")]
+
+    # A full import supersedes the journal
+    main([str(workbooks / "one.xlsx"), "-o", str(out)])
+    assert not journal_path(deck_path).exists()
+    assert len(load_deck_from_json_file(deck_path).cards) == 3
+
+def test_sheet_digests(workbooks):
+    before = sheet_digests(workbooks / "two.xlsx")
+    assert set(before) == {"nouns", "verbs"}
+    write_workbook(workbooks / "two.xlsx", {"verbs": [*card_rows([3, 4]), ["bad", None, False, "p", "t", "e"]],
+                                            "nouns": card_rows([5, 6])})
+    after = sheet_digests(workbooks / "two.xlsx")
+    assert after["nouns"] != before["nouns"]
+    assert after["verbs"] == before["verbs"]
+
+def test_incremental_reimport_sqlite(workbooks, tmp_path, capsys):
+    db = tmp_path / "decks.db"
+    main([str(workbooks / "two.xlsx"), "--sqlite", str(db), "--sheet", "nouns"])
+    write_workbook(workbooks / "two.xlsx", {"nouns": card_rows([5, 6])})
+    main([str(workbooks / "two.xlsx"), "--sqlite", str(db), "--incremental"])
+    storage = SqliteStorage(db)
+    deck = storage.load_deck("two.nouns")
+    storage.close()
+    assert [c.tid for c in deck.cards] == [5, 6] and deck.last_id_used == 6
+
+    capsys.readouterr()
+    write_workbook(workbooks / "two.xlsx", {"nouns": card_rows([5, 6]), "verbs": card_rows([3, 4])})
+    main([str(workbooks / "two.xlsx"), "--sqlite", str(db), "--incremental"])
+    summary = capsys.readouterr().out
+    assert "1 sheets into 1 decks" in summary and "1 sheets unchanged, 1 decks skipped" in summary
@@ -0,0 +1,65 @@
+import json
+import pytest
+from lexicard.lazy_deck import LazyDeck, list_decks, read_deck_info
+from lexicard.models import Deck, Lexicard, save_deck_to_json_file
+
+@pytest.fixture
+def deck():
+    cards = [
+        Lexicard(tid=i, sound="0", check_for_correction=False, phonetic=f"p{i}", target_word=f"t{i}", explain=f'e{i} "tid": {i}')
+        for i in range(1, 26)
+    ]
+    return Deck(author="a", name="lazy", description="d", target_language="th", cards=cards)
+
+@pytest.fixture
+def deck_path(deck, tmp_path):
+    path = tmp_path / "lazy.json"
+    save_deck_to_json_file(deck, path)
+    return path
+
+def test_info_without_validating_cards(deck_path):
+    lazy = LazyDeck(deck_path)
+    assert lazy.info.name == "lazy"
+    assert lazy.info.card_count == 25
+    assert lazy._raw == []
+    assert lazy._cards == {}
+
+def test_cards_on_demand(deck, deck_path):
+    lazy = LazyDeck(deck_path)
+    assert lazy.cards(0, 3) == deck.cards[:3]
+    assert len(lazy._raw) == 3
+    assert lazy.card(-1) == deck.cards[-1]
+    assert lazy.by_tid(12) == deck.cards[11]
+    assert lazy.by_tid(999) is None
+    with pytest.raises(IndexError):
+        lazy.card(25)
+    assert lazy.to_deck() == deck
+
+def test_to_deck_in_chunks(deck, deck_path, tmp_path):
+    assert LazyDeck(deck_path).to_deck(chunk_size=4) == deck
+    path = tmp_path / "reordered.json"
+    data = deck.model_dump()
+    path.write_text(json.dumps({"cards": data.pop("cards"), **data}))
+    assert LazyDeck(path).to_deck(chunk_size=4) == deck
+
+def test_metadata_after_cards(deck, tmp_path):
+    path = tmp_path / "reordered.json"
+    data = deck.model_dump()
+    path.write_text(json.dumps({"cards": data.pop("cards"), **data}))
+    lazy = LazyDeck(path)
+    assert lazy.info.card_count == 25
+    assert lazy.to_deck() == deck
+
+def test_empty_deck(tmp_path):
+    path = tmp_path / "empty.json"
+    save_deck_to_json_file(Deck(author="a", name="e", description="d", target_language="th"), path)
+    lazy = LazyDeck(path)
+    assert len(lazy) == 0
+    assert lazy.cards() == []
+
+def test_read_deck_info_is_cached(deck, deck_path, tmp_path):
+    assert read_deck_info(deck_path) is read_deck_info(deck_path)
+    deck.cards.pop()
+    save_deck_to_json_file(deck, deck_path)
+    assert read_deck_info(deck_path).card_count == 24
+    assert [info.name for info in list_decks(tmp_path)] == ["lazy"]
@@ -0,0 +1,36 @@
+import asyncio
+import time
+from lexicard.metrics import Histogram, LoopLagMonitor, Metrics
+
+def test_histogram_buckets():
+    h = Histogram(bounds=(1, 10))
+    for value in (0, 1, 5, 50):
+        h.observe(value)
+    data = h.to_dict()
+    assert data["count"] == 4
+    assert data["min"] == 0
+    assert data["max"] == 50
+    assert data["buckets"] == {"<=1": 2, "<=10": 1, ">10": 1}
+
+def test_metrics_snapshot_and_reset():
+    m = Metrics()
+    m.incr("picks.learn")
+    m.incr("picks.learn", 2)
+    m.observe("size.learn", 3)
+    snap = m.snapshot()
+    assert snap["counters"] == {"picks.learn": 3}
+    assert snap["histograms"]["size.learn"]["mean"] == 3
+    m.reset()
+    assert m.snapshot() == {"counters": {}, "histograms": {}}
+
+async def test_loop_lag_monitor():
+    metrics = Metrics()
+    monitor = LoopLagMonitor(metrics, interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)  # a blocking call on the loop
+    await asyncio.sleep(0.03)
+    monitor.stop()
+    lags = metrics.snapshot()["histograms"]["event_loop.lag_ms"]
+    assert lags["count"] >= 2
+    assert monitor.max_lag_ms >= 50 and lags["max"] == monitor.max_lag_ms
@@ -58,3 +58,72 @@ def test_deck_serialization(sample_deck, tmp_path):
     assert loaded_deck.author == sample_deck.author
     assert len(loaded_deck.cards) == len(sample_deck.cards)
     assert loaded_deck.cards[0].tid == sample_deck.cards[0].tid
+
+def write_lexicon(path, rows):
+    import openpyxl
+    wb = openpyxl.Workbook()
+    sheet = wb.active
+    sheet.title = "lexicon"
+    sheet.append(["tid", "sound", "check", "phonetic", "target_word", "explain"])
+    for row in rows:
+        sheet.append(row)
+    wb.save(path)
+
+def test_iter_cards_from_excel_in_chunks(tmp_path):
+    from lexicard.models import iter_cards_from_excel
+    path = tmp_path / "lexicon.xlsx"
+    rows = [[i, f"s{i}", False, f"p{i}", f"t{i}", f"e{i}"] for i in range(1, 8)]
+    rows.insert(3, ["not a number", "s", False, "p", "t", "e"])
+    rows.insert(5, [None, None, None, None, None, None])
+    write_lexicon(path, rows)
+
+    progress, errors = [], []
+    chunks = list(
+        iter_cards_from_excel(
+            path,
+            chunk_size=3,
+            on_progress=lambda *p: progress.append(p),
+            on_error=lambda row, e: errors.append(row),
+        )
+    )
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert [c.tid for chunk in chunks for c in chunk] == list(range(1, 8))
+    assert errors == [5]
+    assert progress[-1] == (9, 7, 1)
+
+def test_load_deck_from_excel(tmp_path):
+    from lexicard.models import load_deck_from_excel
+    path = tmp_path / "lexicon.xlsx"
+    write_lexicon(path, [[1, None, True, "p", "t", "e"], [42, None, False, "p", "t", "e"]])
+    deck = load_deck_from_excel(path)
+    assert deck.last_id_used == 42
+    assert deck.cards[0].sound == "0"
+    assert deck.cards[0].check_for_correction is True
+
+def test_validate_cards_in_bulk(sample_card):
+    from pydantic import ValidationError
+    from lexicard.models import validate_cards
+    rows = [sample_card.model_dump(), {**sample_card.model_dump(), "tid": "2"}]
+    assert [c.tid for c in validate_cards(rows)] == [1, 2]
+    with pytest.raises(ValidationError) as info:
+        validate_cards([*rows, {"tid": 3}])
+    assert info.value.errors()[0]["loc"][0] == 2
+
+def test_validate_chunk_reports_invalid_rows(sample_card):
+    from lexicard.models import _validate_chunk
+    errors = []
+    cards = _validate_chunk([2, 3], [{"tid": 3}, sample_card.model_dump()], lambda row, e: errors.append(row))
+    assert cards == [sample_card]
+    assert errors == [2]
+
+def test_construct_cards_matches_validation(sample_card):
+    from lexicard.models import construct_cards
+    card = construct_cards([sample_card.model_dump()])[0]
+    assert card == sample_card
+    assert card.model_dump() == sample_card.model_dump()
+    assert card.model_copy(update={"tid": 5}).tid == 5
+
+def test_trusted_json_load(sample_deck, tmp_path):
+    path = tmp_path / "deck.json"
+    save_deck_to_json_file(sample_deck, path)
+    assert load_deck_from_json_file(path, trusted=True) == sample_deck
@@ -0,0 +1,89 @@
+import random
+from conftest import make_cards
+from lexicard.prefetch import PrefetchQueue, question_card
+from lexicard.probbucket import LEARN, ProbBucket
+from lexicard.replay import DEMOTE, PROMOTE, answers_from_events
+from lexicard.scheduler import DueScheduler
+
+def test_pop_returns_queued_questions_in_order():
+    bucket = ProbBucket(make_cards(20, with_sounds=True), rng=random.Random(1))
+    queue = PrefetchQueue(bucket, size=3)
+    queue.fill()
+    assert len(queue) == 3
+    queued = [question for question, _ in queue._queue]
+    assert [queue.pop() for _ in range(3)] == queued
+    assert len(queue) == 0
+    assert queue.pop() is not None  # empty queue: picked now
+
+def test_queued_cards_are_distinct():
+    queue = PrefetchQueue(ProbBucket(make_cards(5, with_sounds=True), rng=random.Random(6)), size=5)
+    queue.fill()
+    assert len({question.tid for question, _ in queue._queue}) == 5
+
+def test_only_shown_cards_are_journaled():
+    events = []
+
+    class ListJournal:
+        def append(self, event):
+            events.append(event)
+
+    bucket = ProbBucket(make_cards(20, with_sounds=True), rng=random.Random(7))
+    bucket.promote(make_cards(20, with_sounds=True)[0])  # only non-empty buckets, so no weight change below
+    bucket.journal = ListJournal()
+    queue = PrefetchQueue(bucket, size=3)
+    queue.fill()
+    assert events == []
+    shown = []
+    for i in range(6):
+        card = queue.pop()
+        shown.append(card.tid)
+        if i % 2:
+            bucket.promote(card)
+        else:
+            bucket.demote(card)
+        queue.fill()
+    assert [event["tid"] for event in events if event["op"] == "pick"] == shown
+    assert answers_from_events(events) == [DEMOTE, PROMOTE] * 3
+
+def test_sounds_of_queued_cards():
+    queue = PrefetchQueue(ProbBucket(make_cards(20, with_sounds=True), rng=random.Random(2)), size=5)
+    queue.fill()
+    expected = [question.sound for question, _ in queue._queue if question.sound != "0"]
+    assert queue.sounds() == expected
+
+def test_moved_card_is_dropped():
+    cards = make_cards(20, with_sounds=True)
+    bucket = ProbBucket(cards, rng=random.Random(3))
+    bucket.promote(cards[0])  # review and learn are both non-empty from here on
+    queue = PrefetchQueue(bucket, size=3)
+    queue.fill()
+    first, second, third = (question for question, _ in queue._queue)
+    assert len({first.tid, second.tid, third.tid}) == 3 and bucket.bucket_of(second) == LEARN
+    bucket.promote(second)  # to review, the weights do not change
+    assert bucket.weights() == queue._weights
+    assert [queue.pop(), queue.pop()] == [first, third]
+
+def test_weight_change_drops_the_queue():
+    cards = make_cards(3, with_sounds=True)
+    bucket = ProbBucket(cards, rng=random.Random(4))
+    queue = PrefetchQueue(bucket, size=2)
+    queue.fill()
+    weights = bucket.weights()
+    bucket.promote(cards[0], high_priority=True)  # first known card
+    assert bucket.weights() != weights
+    queue.pop()
+    assert len(queue) == 0
+
+def test_multi_choice_questions():
+    bucket = ProbBucket(make_cards(20, with_sounds=True), rng=random.Random(5))
+    queue = PrefetchQueue(bucket, size=2, multi=True)
+    queue.fill()
+    question = queue.pop()
+    assert len(question) == 3 and all(question)
+    assert question_card(question) is question[0]
+
+def test_due_scheduler_is_not_prefetched():
+    queue = PrefetchQueue(DueScheduler(make_cards(20, with_sounds=True)), size=3)
+    queue.fill()
+    assert len(queue) == 0
+    assert queue.pop() is not None
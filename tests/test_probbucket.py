@@ -1,13 +1,7 @@
-import pytest
+from conftest import FakeClock
 from lexicard.models import Lexicard
-from lexicard.probbucket import ProbBucket
-
-@pytest.fixture
-def sample_cards():
-    return [
-        Lexicard(tid=i, sound="0", check_for_correction=False, phonetic=f"p{i}", target_word=f"t{i}", explain=f"e{i}")
-        for i in range(1, 11)
-    ]
+from lexicard.metrics import Metrics
+from lexicard.probbucket import KNOWN, LEARN, REVIEW, CardPool, ProbBucket
 
 def test_probbucket_init(sample_cards):
     pb = ProbBucket(sample_cards)
@@ -27,34 +21,34 @@ def test_promote_demote(sample_cards):
     card = sample_cards[0]
     
     # Initial state: in learn
-    assert card in pb._learn
+    assert pb.bucket_of(card) == LEARN
     
     # Promote to review
     pb.promote(card)
-    assert card not in pb._learn
-    assert card in pb._review
+    assert pb.bucket_of(card) != LEARN
+    assert pb.bucket_of(card) == REVIEW
     
     # Promote to known
     pb.promote(card)
-    assert card not in pb._review
-    assert card in pb._known
+    assert pb.bucket_of(card) != REVIEW
+    assert pb.bucket_of(card) == KNOWN
     
     # Demote to review
     pb.demote(card)
-    assert card not in pb._known
-    assert card in pb._review
+    assert pb.bucket_of(card) != KNOWN
+    assert pb.bucket_of(card) == REVIEW
     
     # Demote to learn
     pb.demote(card)
-    assert card not in pb._review
-    assert card in pb._learn
+    assert pb.bucket_of(card) != REVIEW
+    assert pb.bucket_of(card) == LEARN
 
 def test_promote_high_priority(sample_cards):
     pb = ProbBucket(sample_cards[:1])
     card = sample_cards[0]
     pb.promote(card, high_priority=True)
-    assert card in pb._known
-    assert card not in pb._learn
+    assert pb.bucket_of(card) == KNOWN
+    assert pb.bucket_of(card) != LEARN
 
 def test_pick_3_cards(sample_cards):
     pb = ProbBucket(sample_cards)
@@ -103,3 +97,164 @@ def test_x_add_cards_under_limit(sample_cards):
     pb.x_add_cards(sample_cards)
     assert len(pb._learn) == len(sample_cards)
 
+
+def test_index_tracks_slots_after_moves(sample_cards):
+    pb = ProbBucket(sample_cards)
+    for card in sample_cards[::2]:
+        pb.promote(card)
+    pb.promote(sample_cards[0])
+    for bucket, storage in enumerate((pb._known, pb._review, pb._learn)):
+        for slot, position in enumerate(storage):
+            assert pb._codes[position] == bucket
+            assert pb._slots[position] == slot
+    assert sum(pb.sizes()) == len(sample_cards)
+
+def test_bucket_of_and_contains(sample_cards):
+    pb = ProbBucket(sample_cards[:3])
+    assert pb.bucket_of(sample_cards[0]) == LEARN
+    pb.promote(sample_cards[0], high_priority=True)
+    assert pb.bucket_of(sample_cards[0]) == KNOWN
+    assert sample_cards[0] in pb
+    assert sample_cards[5] not in pb
+    assert pb.bucket_of(sample_cards[5]) is None
+
+def test_add_cards_ignores_duplicates(sample_cards):
+    pb = ProbBucket(sample_cards)
+    pb.add_cards(sample_cards[:3])
+    assert len(pb._learn) == len(sample_cards)
+
+def test_forget_known_updates_index(sample_cards):
+    pb = ProbBucket(sample_cards)
+    pb.promote(sample_cards[0], high_priority=True)
+    pb.forget_known()
+    assert sample_cards[0] not in pb
+    pb.add_cards([sample_cards[0]])
+    assert pb.bucket_of(sample_cards[0]) == LEARN
+
+def test_pick_never_returns_excluded(sample_cards):
+    pb = ProbBucket(sample_cards)
+    pb.promote(sample_cards[0], high_priority=True)
+    pb.promote(sample_cards[1])
+    exclude = sample_cards[:9]
+    for _ in range(50):
+        assert pb.pick_card(exclude) == sample_cards[9]
+    for storage in (pb._known, pb._review, pb._learn):
+        for slot, position in enumerate(storage):
+            assert pb._slots[position] == slot
+
+def test_pick_all_excluded_returns_none(sample_cards):
+    pb = ProbBucket(sample_cards[:2])
+    assert pb.pick_card(sample_cards[:2]) is None
+
+def test_pick_falls_back_to_unweighted_buckets(sample_cards):
+    pb = ProbBucket(sample_cards[:2])
+    pb.promote(sample_cards[0], high_priority=True)
+    # only the known bucket is weighted, and its single card is excluded
+    assert pb._pick([100, 0, 0], [sample_cards[0]]) == sample_cards[1]
+
+def test_pick_n_cards_distinct(sample_cards):
+    pb = ProbBucket(sample_cards)
+    pb.promote(sample_cards[0], high_priority=True)
+    pb.promote(sample_cards[1])
+    cards = pb.pick_n_cards(8, exclude=sample_cards[:2])
+    assert len(cards) == 8
+    assert len({c.tid for c in cards}) == 8
+    assert not {c.tid for c in cards} & {1, 2}
+    # picked ahead of time: nothing is shown until record_pick
+    assert pb._current_card is None
+    pb.record_pick(cards[0])
+    assert pb.get_current_card() == cards[0]
+
+def test_pick_n_cards_short_and_repeated(sample_cards):
+    pb = ProbBucket(sample_cards[:2])
+    assert len(pb.pick_n_cards(5)) == 2
+    assert len(pb.pick_n_cards(5, distinct=False)) == 5
+    assert ProbBucket().pick_n_cards(3) == []
+
+def test_shared_pool(sample_cards):
+    pool = CardPool(sample_cards)
+    pb1 = ProbBucket(pool=pool).add_cards(sample_cards)
+    pb2 = ProbBucket(pool=pool).add_cards(sample_cards[:5])
+    pb1.promote(sample_cards[0], high_priority=True)
+    assert pb1.bucket_of(sample_cards[0]) == KNOWN
+    assert pb2.bucket_of(sample_cards[0]) == LEARN
+    assert pb2.bucket_of(sample_cards[7]) is None
+    assert len(pool) == len(sample_cards)
+    assert pb1.nbytes() <= 17 * len(sample_cards)
+
+def test_cards_added_after_pool_creation(sample_cards):
+    pool = CardPool(sample_cards[:2])
+    pb = ProbBucket(pool=pool)
+    pb.add_cards(sample_cards)
+    assert len(pool) == len(sample_cards)
+    assert pb.sizes() == (0, 0, len(sample_cards))
+    assert pb.cards_in(LEARN) == sample_cards
+
+def test_metrics(sample_cards):
+    metrics = Metrics()
+    pb = ProbBucket(sample_cards[:3], metrics=metrics)
+    pb.promote(sample_cards[0], high_priority=True)
+    for _ in range(20):
+        pb.pick_card()
+    assert pb.pick_card(sample_cards[:3]) is None
+    counters = metrics.snapshot()["counters"]
+    assert counters["picks.known"] + counters["picks.learn"] == 20
+    assert counters["exclusion_failures"] == 1
+    assert counters["exclusions"] == 3
+    sizes = metrics.snapshot()["histograms"]["size.known"]
+    assert sizes["count"] == 2
+    assert sizes["max"] == 1
+
+def test_no_stdout_in_hot_path(sample_cards, capsys):
+    pb = ProbBucket(sample_cards)
+    pb.pick_card()
+    pb.pick_3_cards()
+    pb.promote(sample_cards[0])
+    pb.demote(sample_cards[0])
+    assert capsys.readouterr().out == ""
+
+def known_bucket(sample_cards):
+    clock = FakeClock()
+    pb = ProbBucket(sample_cards, clock=clock)
+    # cards 1..8 become known one second apart, then 1..4 are reviewed again later
+    for card in sample_cards[:8]:
+        clock.now += 1
+        pb.promote(card, high_priority=True)
+    for card in sample_cards[:4]:
+        clock.now += 1
+        pb.promote(card)
+    return pb
+
+def test_evict_longest_known(sample_cards):
+    pb = known_bucket(sample_cards)
+    assert pb.evict(3, "longest_known") == 3
+    assert {c.tid for c in pb.cards_in(KNOWN)} == {4, 5, 6, 7, 8}
+
+def test_evict_least_recent(sample_cards):
+    pb = known_bucket(sample_cards)
+    assert pb.evict(3, "least_recent") == 3
+    assert {c.tid for c in pb.cards_in(KNOWN)} == {1, 2, 3, 4, 8}
+
+def test_evict_bulk_keeps_slots(sample_cards):
+    pb = known_bucket(sample_cards)
+    assert pb.evict(6) == 6
+    assert pb.sizes() == (2, 0, 2)
+    for slot, position in enumerate(pb._known):
+        assert pb._slots[position] == slot
+    assert pb.evict(10) == 2
+
+def test_evict_custom_policy(sample_cards):
+    pb = known_bucket(sample_cards)
+    pb.evict(1, lambda bucket, k: [bucket.pool.position(8)])
+    assert sample_cards[7] not in pb
+
+def test_x_add_cards_over_limit(sample_cards):
+    pb = known_bucket(sample_cards)
+    pb.LIMIT = 12
+    new_cards = [
+        Lexicard(tid=i, sound="0", check_for_correction=False, phonetic="p", target_word="t", explain=f"e{i}")
+        for i in range(100, 105)
+    ]
+    pb.x_add_cards(new_cards, policy="longest_known")
+    assert pb.sizes() == (5, 0, 7)
+    assert {c.tid for c in pb.cards_in(KNOWN)} == {4, 5, 6, 7, 8}
@@ -0,0 +1,139 @@
+import json
+from lexicard.probbucket import KNOWN, LEARN, REVIEW, ProbBucket
+from lexicard.progress import ProgressLog, write_progress
+from lexicard.write_behind import WriteBehind
+
+def restored(sample_cards, tmp_path, clock=lambda: 1000):
+    return ProgressLog("toto", "demo deck", tmp_path).attach(ProbBucket(sample_cards, clock=clock))
+
+def test_events_are_appended(sample_cards, tmp_path):
+    pb = restored(sample_cards, tmp_path)
+    pb.promote(sample_cards[0], high_priority=True)
+    pb.demote(sample_cards[1])
+    pb.pick_card()
+    lines = (tmp_path / "toto--demo_deck.log.jsonl").read_text().splitlines()
+    events = [json.loads(line) for line in lines]
+    assert [e["op"] for e in events] == ["promote", "demote", "pick"]
+    assert [e["seq"] for e in events] == [1, 2, 3]
+    assert events[0] == {"seq": 1, "op": "promote", "tid": 1, "high_priority": True, "ts": 1000}
+
+def test_restore_from_log_tail(sample_cards, tmp_path):
+    pb = restored(sample_cards, tmp_path)
+    pb.promote(sample_cards[0], high_priority=True)
+    pb.promote(sample_cards[1])
+    pb.promote(sample_cards[2])
+    pb.demote(sample_cards[2])
+
+    pb2 = restored(sample_cards, tmp_path)
+    assert pb2.bucket_of(sample_cards[0]) == KNOWN
+    assert pb2.bucket_of(sample_cards[1]) == REVIEW
+    assert pb2.bucket_of(sample_cards[2]) == LEARN
+
+def test_snapshot_then_tail(sample_cards, tmp_path):
+    log = ProgressLog("toto", "demo deck", tmp_path)
+    log.SNAPSHOT_EVERY = 3
+    pb = log.attach(ProbBucket(sample_cards))
+    for card in sample_cards[:4]:
+        pb.promote(card)
+    # the snapshot holds the first 3 events, the log only the 4th
+    assert json.loads(log.snapshot_path.read_text())["seq"] == 3
+    assert len(log.log_path.read_text().splitlines()) == 1
+
+    pb2 = restored(sample_cards, tmp_path)
+    assert pb2.sizes() == (0, 4, 6)
+
+def test_review_times_survive_a_restore(sample_cards, tmp_path):
+    now = [0]
+    log = ProgressLog("toto", "demo deck", tmp_path)
+    log.SNAPSHOT_EVERY = 8
+    pb = log.attach(ProbBucket(sample_cards, clock=lambda: now[0]))
+    # cards 1..8 become known one second apart, then 1..4 are reviewed again later;
+    # the snapshot holds the first 8 events, the log the last 4
+    for card in sample_cards[:8] + sample_cards[:4]:
+        now[0] += 1
+        pb.promote(card, high_priority=True)
+    assert json.loads(log.snapshot_path.read_text())["seq"] == 8
+
+    pb2 = restored(sample_cards, tmp_path, clock=lambda: 100)
+    assert pb2.evict(3, "least_recent") == 3
+    assert {c.tid for c in pb2.cards_in(KNOWN)} == {1, 2, 3, 4, 8}
+    pb3 = restored(sample_cards, tmp_path, clock=lambda: 100)
+    assert pb3.evict(3, "longest_known") == 3
+    assert {c.tid for c in pb3.cards_in(KNOWN)} == {4, 5, 6, 7, 8}
+
+def test_stale_log_is_not_replayed_twice(sample_cards, tmp_path):
+    log = ProgressLog("toto", "demo deck", tmp_path)
+    pb = log.attach(ProbBucket(sample_cards))
+    pb.promote(sample_cards[0])
+    stale_log = log.log_path.read_text()
+    log.close()
+    # as if we crashed after writing the snapshot but before truncating the log
+    log.log_path.write_text(stale_log)
+    pb2 = restored(sample_cards, tmp_path)
+    assert pb2.bucket_of(sample_cards[0]) == REVIEW
+
+def test_write_behind_batches_events(sample_cards, tmp_path):
+    writer = WriteBehind(write_progress, batch_size=100, interval=60)
+    log = ProgressLog("toto", "demo deck", tmp_path, writer)
+    pb = log.attach(ProbBucket(sample_cards, clock=lambda: 1000))
+    pb.promote(sample_cards[0])
+    log.record_score(3)
+    assert not log.log_path.exists() and len(writer) == 2
+    assert writer.flush(timeout=5)
+    events = [json.loads(line) for line in log.log_path.read_text().splitlines()]
+    assert events == [{"seq": 1, "op": "promote", "tid": 1, "high_priority": False, "ts": 1000}, {"seq": 2, "op": "score", "score": 3}]
+
+    restored_log = ProgressLog("toto", "demo deck", tmp_path)
+    pb2 = restored_log.attach(ProbBucket(sample_cards))
+    assert pb2.bucket_of(sample_cards[0]) == REVIEW and restored_log.score == 3
+    writer.close()
+
+def test_write_behind_snapshots_in_order(sample_cards, tmp_path):
+    writer = WriteBehind(write_progress, batch_size=100, interval=60)
+    log = ProgressLog("toto", "demo deck", tmp_path, writer)
+    log.SNAPSHOT_EVERY = 3
+    pb = log.attach(ProbBucket(sample_cards))
+    for card in sample_cards[:4]:
+        pb.promote(card)
+    writer.close()
+    assert json.loads(log.snapshot_path.read_text())["seq"] == 3
+    assert [json.loads(line)["seq"] for line in log.log_path.read_text().splitlines()] == [4]
+
+def test_queued_writes_older_than_close_are_skipped(sample_cards, tmp_path):
+    writer = WriteBehind(write_progress, batch_size=100, interval=60)
+    log = ProgressLog("toto", "demo deck", tmp_path, writer)
+    log.SNAPSHOT_EVERY = 2
+    pb = log.attach(ProbBucket(sample_cards))
+    for card in sample_cards[:3]:
+        pb.promote(card)
+    log.close()  # snapshot at seq 3, while the writer still holds everything
+    writer.close()
+    assert json.loads(log.snapshot_path.read_text())["seq"] == 3
+    assert log.log_path.read_text() == ""
+    assert restored(sample_cards, tmp_path).sizes() == (0, 3, 7)
+
+def test_full_writer_drops_events_until_a_snapshot_fits(sample_cards, tmp_path):
+    writer = WriteBehind(write_progress, max_pending=2, batch_size=100, interval=60)
+    log = ProgressLog("toto", "demo deck", tmp_path, writer)
+    pb = log.attach(ProbBucket(sample_cards))
+    for card in sample_cards[:3]:
+        pb.promote(card)  # the third event is dropped, no snapshot is taken while the writer is full
+    assert len(writer) == 2 and writer.dropped == 1
+    assert writer.flush(timeout=5)
+    pb.promote(sample_cards[3])  # queued with a snapshot holding the dropped event
+    writer.close()
+    assert json.loads(log.snapshot_path.read_text())["seq"] == 4
+    assert restored(sample_cards, tmp_path).sizes() == (0, 4, 6)
+
+def test_lagging_writer_writes_the_last_snapshot(sample_cards, tmp_path, monkeypatch):
+    writer = WriteBehind(write_progress, batch_size=100, interval=60)
+    log = ProgressLog("toto", "demo deck", tmp_path, writer)
+    log.SNAPSHOT_EVERY = 2
+    pb = log.attach(ProbBucket(sample_cards))
+    for card in sample_cards[:5]:
+        pb.promote(card)
+    written = []
+    monkeypatch.setattr(log, "_write_snapshot", lambda state: written.append(state["seq"]))
+    writer.close()
+    assert written == [4]
+    assert [json.loads(line)["seq"] for line in log.log_path.read_text().splitlines()] == [5]
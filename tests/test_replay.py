@@ -0,0 +1,53 @@
+import random
+import pytest
+from conftest import make_cards
+from lexicard.probbucket import ProbBucket
+from lexicard.replay import DEMOTE, PROMOTE, PROMOTE_HIGH, SKIP, answers_from_events, replay
+
+@pytest.fixture
+def sample_cards():
+    return make_cards(30)
+
+ANSWER_SEQUENCE = [PROMOTE_HIGH, PROMOTE, DEMOTE, SKIP] * 25
+
+def test_same_seed_same_sequence(sample_cards):
+    first = replay(sample_cards, ANSWER_SEQUENCE, seed=42)
+    assert len(first) == 100
+    assert replay(sample_cards, ANSWER_SEQUENCE, seed=42) == first
+    assert replay(sample_cards, ANSWER_SEQUENCE, seed=43) != first
+
+def test_due_engine_replay(sample_cards):
+    first = replay(sample_cards, ANSWER_SEQUENCE, engine="due")
+    assert replay(sample_cards, ANSWER_SEQUENCE, engine="due") == first
+
+def test_unknown_answer(sample_cards):
+    with pytest.raises(ValueError):
+        replay(sample_cards, ["maybe"])
+
+def test_buckets_own_their_rng(sample_cards):
+    a = ProbBucket(sample_cards, rng=random.Random(7))
+    b = ProbBucket(sample_cards, rng=random.Random(7))
+    random.seed(0)
+    seq_a = [a.pick_card().tid for _ in range(20)]
+    random.random()
+    seq_b = [b.pick_card().tid for _ in range(20)]
+    assert seq_a == seq_b
+
+def test_answers_from_journal(sample_cards):
+    events = []
+    pb = ProbBucket(sample_cards, rng=random.Random(1))
+    pb.journal = events
+    shown = []
+    for answer in ANSWER_SEQUENCE[:12]:
+        card = pb.pick_card()
+        shown.append(card.tid)
+        if answer == PROMOTE_HIGH:
+            pb.promote(card, high_priority=True)
+        elif answer == PROMOTE:
+            pb.promote(card)
+        elif answer == DEMOTE:
+            pb.demote(card)
+    answers = answers_from_events(events)
+    assert answers == ANSWER_SEQUENCE[:12]
+    # the live session is reproduced from its seed and answers alone
+    assert replay(sample_cards, answers, seed=1) == shown
@@ -0,0 +1,78 @@
+from lexicard.scheduler import DueScheduler
+
+def test_new_cards_come_in_order(sample_cards, clock):
+    sched = DueScheduler(sample_cards, clock=clock)
+    assert len(sched) == 10
+    assert sched.pick_card() == sample_cards[0]
+    assert sched.pick_card([sample_cards[0]]) == sample_cards[1]
+
+def test_promote_pushes_card_back(sample_cards, clock):
+    sched = DueScheduler(sample_cards, clock=clock)
+    card = sched.pick_card()
+    sched.promote(card)
+    state = sched.get_schedule(card)
+    assert state.reps == 1
+    assert state.due == clock.now + DueScheduler.DAY
+    assert sched.pick_card() == sample_cards[1]
+
+def test_intervals_grow_with_ease(sample_cards, clock):
+    sched = DueScheduler(sample_cards[:1], clock=clock)
+    card = sample_cards[0]
+    intervals = []
+    for _ in range(4):
+        sched.promote(card, high_priority=True)
+        intervals.append(sched.get_schedule(card).interval)
+    assert intervals[:2] == [DueScheduler.DAY, 6 * DueScheduler.DAY]
+    assert intervals[3] > intervals[2] > intervals[1]
+
+def test_demote_resets_and_relearns_soon(sample_cards, clock):
+    sched = DueScheduler(sample_cards, clock=clock)
+    card = sample_cards[5]
+    sched.promote(card)
+    sched.promote(card)
+    sched.demote(card)
+    state = sched.get_schedule(card)
+    assert state.reps == 0
+    assert state.ease < DueScheduler.DEFAULT_EASE
+    assert state.due == clock.now + DueScheduler.RELEARN_DELAY
+    clock.now += 10 * DueScheduler.NEW_CARD_SPACING
+    # overdue by now, so it beats the new cards that are not due yet
+    assert sched.pick_card(sample_cards[:4]) == card
+
+def test_stale_entries_are_compacted(sample_cards, clock):
+    sched = DueScheduler(sample_cards[:2], clock=clock)
+    for _ in range(500):
+        sched.demote(sample_cards[0])
+    assert len(sched._heap) <= 2 * len(sched) + 65
+    assert sched.pick_card() == sample_cards[1]
+
+def test_pick_3_cards(sample_cards, clock):
+    sched = DueScheduler(sample_cards, clock=clock)
+    q, a1, a2 = sched.pick_3_cards()
+    assert q == sample_cards[0]
+    assert a1 is not None and a2 is not None
+    assert len({q.tid, a1.tid, a2.tid}) == 3
+
+def test_empty_scheduler(clock):
+    sched = DueScheduler(clock=clock)
+    assert sched.pick_card() is None
+    assert sched.pick_3_cards() == (None, None, None)
+
+def test_pick_n_cards_in_due_order(sample_cards, clock):
+    sched = DueScheduler(sample_cards, clock=clock)
+    assert sched.pick_n_cards(3, exclude=[sample_cards[1]]) == [sample_cards[0], sample_cards[2], sample_cards[3]]
+    assert len(sched.pick_n_cards(50)) == 10
+
+def test_skipped_card_is_requeued(sample_cards, clock):
+    sched = DueScheduler(sample_cards, clock=clock)
+    picks = [sched.pick_card() for _ in range(4)]
+    assert [card.tid for card in picks] == [1, 2, 3, 4]
+    assert sched.get_schedule(sample_cards[0]).due == clock.now + DueScheduler.RELEARN_DELAY
+    # an answered card is scheduled by its review, not requeued
+    sched.promote(picks[-1])
+    sched.pick_card()
+    assert sched.get_schedule(picks[-1]).due == clock.now + DueScheduler.DAY
+
+def test_single_card_skips_to_itself(sample_cards, clock):
+    sched = DueScheduler(sample_cards[:1], clock=clock)
+    assert sched.pick_card() == sched.pick_card() == sample_cards[0]
@@ -0,0 +1,137 @@
+from conftest import FakeClock, make_deck
+from lexicard.probbucket import KNOWN, LEARN
+from lexicard.scheduler import DueScheduler
+from lexicard.sessions import SessionRegistry
+
+def test_sessions_are_per_user_and_deck(tmp_path):
+    registry = SessionRegistry(progress_dir=tmp_path)
+    deck, other = make_deck(), make_deck("other")
+    alice, bob = registry.get("alice", deck), registry.get("bob", deck)
+    assert alice is registry.get("alice", deck)
+    assert alice is not bob and registry.get("alice", other) is not alice
+    assert len(registry) == 3
+
+    alice.buckets.promote(deck.cards[0], high_priority=True)
+    alice.score.tally += 2
+    assert bob.buckets.bucket_of(deck.cards[0]) == LEARN and bob.score.tally == 0
+    # the buckets of a deck share its card pool
+    assert alice.buckets.pool is bob.buckets.pool
+
+def test_page_state(tmp_path):
+    session = SessionRegistry(progress_dir=tmp_path).get("alice", make_deck())
+    state = session.page_state("single", dict)
+    assert session.page_state("single", dict) is state
+    assert session.page_state("multi", dict) is not state
+
+def test_evicted_session_is_restored(tmp_path):
+    registry = SessionRegistry(progress_dir=tmp_path)
+    deck = make_deck()
+    session = registry.get("alice", deck)
+    session.buckets.promote(deck.cards[0], high_priority=True)
+    session.add_score(5)
+
+    assert registry.evict("alice", "demo")
+    assert not registry.evict("alice", "demo")
+    assert ("alice", "demo") not in registry
+    restored = registry.get("alice", deck)
+    assert restored is not session
+    assert restored.buckets.bucket_of(deck.cards[0]) == KNOWN
+    assert restored.score.tally == 5
+
+def test_idle_sessions_are_evicted(tmp_path):
+    clock = FakeClock(0.0)
+    registry = SessionRegistry(idle_seconds=60, progress_dir=tmp_path, clock=clock)
+    deck = make_deck()
+    registry.get("alice", deck)
+    clock.now = 30
+    registry.get("bob", deck)
+    clock.now = 70
+    assert registry.evict_idle() == 1
+    assert ("alice", "demo") not in registry and ("bob", "demo") in registry
+    # a get() also sweeps idle sessions
+    clock.now = 200
+    registry.get("carol", deck)
+    assert len(registry) == 1
+
+def test_memory_budget_evicts_least_recently_used(tmp_path):
+    deck = make_deck()
+    per_session = SessionRegistry(progress_dir=tmp_path).get("probe", deck).nbytes()
+    registry = SessionRegistry(max_bytes=2 * per_session, progress_dir=tmp_path)
+    registry.get("alice", deck)
+    registry.get("bob", deck)
+    registry.get("alice", deck)  # bob is now the least recently used
+    registry.get("carol", deck)
+    assert ("bob", "demo") not in registry
+    assert ("alice", "demo") in registry and ("carol", "demo") in registry
+    assert registry.nbytes() <= registry.max_bytes
+
+def test_close_saves_every_session(tmp_path):
+    registry = SessionRegistry(progress_dir=tmp_path)
+    deck = make_deck()
+    registry.get("alice", deck).buckets.promote(deck.cards[1], high_priority=True)
+    registry.close()
+    assert len(registry) == 0
+    assert SessionRegistry(progress_dir=tmp_path).get("alice", deck).buckets.bucket_of(deck.cards[1]) == KNOWN
+
+def test_due_engine(tmp_path):
+    registry = SessionRegistry(engine="due", progress_dir=tmp_path)
+    session = registry.get("alice", make_deck())
+    assert isinstance(session.buckets, DueScheduler) and session.progress_log is None
+    assert session.nbytes() > 0
+    registry.close()
+
+def test_pinned_sessions_are_kept(tmp_path):
+    clock = FakeClock(0.0)
+    deck = make_deck()
+    per_session = SessionRegistry(progress_dir=tmp_path).get("probe", deck).nbytes()
+    registry = SessionRegistry(max_bytes=per_session, idle_seconds=60, progress_dir=tmp_path, clock=clock)
+    alice = registry.get("alice", deck)
+    registry.pin(alice)
+    registry.get("bob", deck)  # over budget, but alice is pinned
+    clock.now = 100
+    assert registry.evict_idle() == 1
+    assert ("alice", "demo") in registry and ("bob", "demo") not in registry
+    registry.unpin(alice)
+    clock.now = 150
+    assert registry.evict_idle() == 0  # idle for 50s only since the unpin
+    clock.now = 170
+    assert registry.evict_idle() == 1
+
+def test_new_deck_version_refreshes_the_session(tmp_path):
+    registry = SessionRegistry(progress_dir=tmp_path)
+    deck = make_deck()
+    session = registry.get("alice", deck)
+    session.buckets.promote(deck.cards[0], high_priority=True)
+    # card 1 edited, card 2 removed, card 11 added
+    cards = [deck.cards[0].model_copy(update={"explain": "new"}), *deck.cards[2:], make_deck(n=11).cards[-1]]
+    new_version = deck.model_copy(update={"cards": cards})
+
+    assert registry.get("alice", new_version) is session
+    assert session.deck is new_version
+    assert session.buckets.bucket_of(cards[0]) == KNOWN  # changed, kept its bucket
+    assert session.buckets.bucket_of(cards[-1]) == LEARN  # added
+    assert deck.cards[1] not in session.buckets  # removed
+    assert session.buckets.pick_n_cards(1, exclude=cards[1:])[0].explain == "new"
+
+def test_refresh_moves_to_the_pool_of_the_new_version(tmp_path):
+    registry = SessionRegistry(progress_dir=tmp_path)
+    deck = make_deck(n=5)
+    alice, bob = registry.get("alice", deck), registry.get("bob", deck)
+    old_pool = bob.buckets.pool
+    new_version = deck.model_copy(update={"cards": deck.cards[:3]})
+
+    assert registry.get("alice", new_version) is alice
+    assert alice.buckets.pool is not old_pool and len(old_pool) == 5  # bob's version is left alone
+    assert registry.get("carol", new_version).buckets.pool is alice.buckets.pool
+    distractors = {card.tid for _ in range(300) for card in alice.buckets.pick_distractors(deck.cards[0]) if card}
+    assert distractors == {2, 3}
+
+def test_engines_share_the_distractor_index_of_the_deck_version(tmp_path):
+    deck = make_deck()
+    for engine in ("probbucket", "due"):
+        registry = SessionRegistry(progress_dir=tmp_path, engine=engine)
+        alice, bob = registry.get("alice", deck), registry.get("bob", deck)
+        assert alice.buckets.pool is bob.buckets.pool
+        index = alice.buckets.pool.build_distractors()
+        assert bob.buckets.pool.distractors is index
+        assert all(alice.buckets.pick_distractors(deck.cards[0]))
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+from datetime import datetime
+import pytest
+from lexicard.models import FILE_PATH, Deck, Lexicard, User, load_deck_from_json_file
+from lexicard.storage_sqlite import SqliteStorage
+
+def make_deck(name="sql", n=5):
+    cards = [Lexicard(tid=i, sound="0", check_for_correction=i == 2, phonetic=f"p{i}", target_word=f"ไทย{i}",
+                      explain=f"e{i}") for i in range(1, n + 1)]
+    return Deck(author="a", name=name, description="d", target_language="th", last_id_used=n, cards=cards)
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SqliteStorage(tmp_path / "test.db", workers=2)
+    yield storage
+    storage.close()
+
+def test_wal_mode(storage):
+    assert storage._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_deck_round_trip(storage):
+    deck = make_deck()
+    storage.save_deck(deck)
+    assert storage.load_deck("sql") == deck
+    assert storage.load_deck("missing") is None
+    assert storage.get_card("sql", 2) == deck.cards[1]
+    assert storage.get_card("sql", 99) is None
+    assert [len(chunk) for chunk in storage.iter_cards("sql", chunk_size=2)] == [2, 2, 1]
+
+    deck.cards = deck.cards[:2]
+    storage.save_deck(deck)
+    assert storage.load_deck("sql") == deck
+    storage.upsert_cards("sql", [deck.cards[0].model_copy(update={"explain": "fixed"})])
+    assert storage.get_card("sql", 1).explain == "fixed"
+    with pytest.raises(KeyError):
+        storage.upsert_cards("missing", [])
+
+def test_list_and_delete_decks(storage):
+    storage.save_deck(make_deck("b", 3))
+    storage.save_deck(make_deck("a", 2))
+    assert [(info.name, info.card_count) for info in storage.list_decks()] == [("a", 2), ("b", 3)]
+    storage.delete_deck("a")
+    assert [info.name for info in storage.list_decks()] == ["b"]
+
+def test_import_existing_json_deck(storage):
+    storage.import_json_deck(FILE_PATH)
+    original = load_deck_from_json_file(FILE_PATH)
+    assert storage.load_deck(original.name).cards == sorted(original.cards, key=lambda c: c.tid)
+
+def test_users(storage):
+    user = User(tid=0, name="toto", signup_tstamp=datetime(2024, 1, 2, 3, 4), highest_score_ever=302,
+                highest_score_30d=101, streak=21)
+    storage.save_user(user)
+    loaded = storage.load_user("toto")
+    assert loaded.model_dump(exclude={"tid"}) == user.model_dump(exclude={"tid"})
+    assert storage.load_user("nobody") is None
+
+def test_reviews_and_due_cards(storage):
+    storage.save_deck(make_deck())
+    storage.record_reviews("toto", "sql", [{"op": "promote", "tid": 1, "ts": 10.0}, {"op": "demote", "tid": 2, "ts": 20.0},
+                                           {"op": "reset"}])
+    assert storage.review_events("toto", "sql") == [{"op": "promote", "tid": 1, "ts": 10.0},
+                                                    {"op": "demote", "tid": 2, "ts": 20.0}]
+    storage.set_due("toto", "sql", [(1, 300.0), (2, 100.0), (3, 900.0)])
+    storage.set_due("toto", "sql", [(3, 50.0)])
+    assert storage.due_cards("toto", "sql", now=500.0) == [(3, 50.0), (2, 100.0), (1, 300.0)]
+    assert storage.due_cards("toto", "sql", now=500.0, limit=1) == [(3, 50.0)]
+    assert storage.due_cards("other", "sql", now=500.0) == []
+    plan = storage._connection().execute(
+        "EXPLAIN QUERY PLAN SELECT tid FROM schedules WHERE user_id = 1 AND deck_id = 1 AND due <= 5 ORDER BY due"
+    ).fetchall()
+    assert "schedules_user_deck_due" in str(plan)
+    storage.delete_deck("sql")
+    assert storage.review_events("toto", "sql") == []
+
+async def test_run_on_the_pool(storage):
+    storage.save_deck(make_deck())
+    threads = set()
+
+    def load(name):
+        threads.add(threading.current_thread().name)
+        return storage.load_deck(name)
+
+    decks = await asyncio.gather(*(storage.run(load, "sql") for _ in range(4)))
+    assert all(deck == make_deck() for deck in decks)
+    assert all(name.startswith("lexicard-db") for name in threads)
@@ -35,3 +35,49 @@ async def test_single_mode_page(user: User):
     # Check for the learning buttons
     await user.should_see('Already Known')
     await user.should_see('Mistake')
+
+async def test_tab_storage_holds_deck_reference(user: User):
+    from nicegui import app
+    await login(user)
+    await user.open('/page_mode_multi')
+    await user.should_see('Select the correct translation')
+    with user.client:
+        stored = dict(app.storage.tab)
+    assert 'deck' not in stored
+    assert stored['deck_path'].endswith('deck_data.json') and len(stored['deck_version']) == 3
+
+async def test_audio_route_serves_audio_only(user: User):
+    import pytest
+    from fastapi import HTTPException
+    from lexicard.front_commons import audio_file
+    assert audio_file('ขนม.mp3').path.name == 'ขนม.mp3'
+    for name in ('decxample.xlsx', 'missing.mp3', '..'):
+        with pytest.raises(HTTPException):
+            audio_file(name)
+
+async def test_page_pins_its_session(user: User, monkeypatch):
+    from lexicard.front_commons import get_tab_session, session_registry
+    await login(user)
+    await user.open('/page_mode_multi')
+    await user.should_see('Select the correct translation')
+    with user.client:
+        session = get_tab_session()
+    assert session is not None and session.pins == 1
+    monkeypatch.setattr(session_registry, 'idle_seconds', 0)
+    session_registry.evict_idle()
+    # the handlers of the page keep using the session it was rendered with, still open
+    assert session_registry.peek('toto', session.deck_name) is session
+
+async def test_deck_info_counts_journal_edits(user: User, tmp_path):
+    from lexicard.deck_journal import get_journal
+    from lexicard.front_commons import get_deck_info
+    from lexicard.models import Deck, Lexicard, save_deck_to_json_file
+    cards = [Lexicard(tid=i, sound='0', check_for_correction=False, phonetic='p', target_word=f't{i}', explain='e')
+             for i in range(3)]
+    path = tmp_path / 'deck.json'
+    save_deck_to_json_file(Deck(author='a', name='journaled', description='d', target_language='th', cards=cards), path)
+    assert get_deck_info(str(path)).card_count == 3
+    get_journal(path).delete(0)
+    assert get_deck_info(str(path), load=False) is None  # would need a load
+    assert get_deck_info(str(path)).card_count == 2
+    assert get_deck_info(str(path), load=False).card_count == 2
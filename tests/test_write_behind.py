@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+import pytest
+from lexicard.metrics import Metrics
+from lexicard.write_behind import WriteBehind
+
+def test_full_batches_are_written_at_once():
+    batches = []
+    written = threading.Event()
+    writer = WriteBehind(lambda batch: (batches.append(batch), written.set()), batch_size=3, interval=60)
+    for i in range(3):
+        writer.put(i)
+    assert written.wait(timeout=5)  # long before the interval
+    assert batches == [[0, 1, 2]]
+    for i in range(3, 7):
+        writer.put(i)
+    assert writer.flush(timeout=5)
+    assert [item for batch in batches for item in batch] == list(range(7))
+    writer.close()
+
+def test_timer_writes_a_partial_batch():
+    written = threading.Event()
+    writer = WriteBehind(lambda batch: written.set(), batch_size=100, interval=0.01)
+    writer.put("a")
+    assert written.wait(timeout=5)
+    writer.close()
+
+def test_timer_writes_later_partial_batches():
+    batches = []
+    writer = WriteBehind(batches.append, batch_size=100, interval=0.05)
+    writer.put(1)
+    assert writer.flush(timeout=5)
+    writer.put(2)  # the writer is idle again
+    writer.put(3)
+    deadline = time.monotonic() + 5
+    while len(batches) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert batches == [[1], [2, 3]]
+    writer.close()
+
+def test_close_writes_everything_and_can_restart():
+    batches = []
+    writer = WriteBehind(batches.append, batch_size=100, interval=60)
+    writer.put(1)
+    writer.put(2)
+    writer.close()
+    assert batches == [[1, 2]] and len(writer) == 0
+    writer.put(3)
+    writer.close()
+    assert batches == [[1, 2], [3]]
+
+def test_full_buffer_blocks_put():
+    started, release = threading.Event(), threading.Event()
+
+    def write(batch):
+        started.set()
+        release.wait(timeout=5)
+
+    metrics = Metrics()
+    writer = WriteBehind(write, max_pending=2, batch_size=1, interval=60, metrics=metrics)
+    writer.put(0)
+    assert started.wait(timeout=5)  # the writer took 0 and blocks
+    writer.put(1)
+    writer.put(2)
+    with pytest.raises(queue.Full):
+        writer.put(3, timeout=0.05)
+    assert metrics.counters["write_behind.full"] == 1
+    release.set()
+    writer.put(3, timeout=5)
+    writer.close()
+    assert len(writer) == 0
+
+def test_full_buffer_drops_offers(caplog):
+    metrics = Metrics()
+    writer = WriteBehind(lambda batch: None, max_pending=2, batch_size=100, interval=60, metrics=metrics)
+    assert writer.offer(0) and writer.offer(1)
+    assert not writer.offer(2) and not writer.offer(3)
+    assert writer.dropped == 2 and metrics.counters["write_behind.dropped"] == 2
+    assert len(caplog.records) == 1  # logged once per overflow
+    assert writer.flush(timeout=5)
+    assert writer.offer(4)
+    writer.close()
+    assert len(writer) == 0
+
+def test_failed_batch_is_dropped():
+    batches = []
+
+    def write(batch):
+        if batch == [1]:
+            raise OSError("disk full")
+        batches.append(batch)
+
+    metrics = Metrics()
+    writer = WriteBehind(write, batch_size=1, interval=60, metrics=metrics)
+    for i in range(3):
+        writer.put(i)
+        assert writer.flush(timeout=5)
+    writer.close()
+    assert batches == [[0], [2]]
+    assert metrics.counters["write_behind.failed"] == 1